@@ -0,0 +1,76 @@
+import pygame
+from functools import lru_cache
+from game_core.constants import *
+from game_core.tank_sprites import turret_angle_index, turret_end_offset_at
+from game_core.trajectory import Trajectory, launch_velocity, first_impact
+
+
+class AimPreview:
+    """
+    Class which represents predicted flight of the shell the active tank would fire. Flights are memoized by tank
+    position, turret angle, power and ground version, so they are solved again only after aim or ground changes
+    """
+    def __init__(self, ground, tank_index=None, pixel_accurate=False, cache_size=aim_preview_cache_size):
+        """
+        Initialize preview
+        :param ground: Ground object
+        :param tank_index: TankIndex object with tanks which may be hit, only ground is checked if None
+        :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+        :param cache_size: number of flights kept at once
+        """
+        self.ground = ground
+        self.tank_index = tank_index
+        self.pixel_accurate = pixel_accurate
+        self.flight_at = lru_cache(maxsize=cache_size)(self.find_flight)
+
+    def find_flight(self, position, angle_index, power, version):
+        """
+        Solves flight of the shell
+        :param position: (x, y) position of the tank
+        :param angle_index: index of turret angle
+        :param power: power of the shot
+        :param version: ground version the flight is solved for, only a part of the memo key
+        :return: tuple of (x, y) points of the flight, the last one where the shell hits or leaves the world
+        """
+        trajectory = self.trajectory(position, angle_index, power)
+        impact = first_impact(trajectory, self.ground, self.tank_index, self.pixel_accurate)
+        end_time = impact.time if impact else trajectory.end_time(self.ground.width)
+        return tuple(point for _, point in trajectory.sample(aim_preview_step, end_time))
+
+    @staticmethod
+    def trajectory(position, angle_index, power):
+        """
+        Returns trajectory of the shell
+        :param position: (x, y) position of the tank
+        :param angle_index: index of turret angle
+        :param power: power of the shot
+        :return: Trajectory object
+        """
+        offset_x, offset_y = turret_end_offset_at(angle_index)
+        return Trajectory((position[0] + offset_x, position[1] + offset_y),
+                          launch_velocity(power, initial_turret_angle + angle_index * angle_step))
+
+    def flight(self, tank):
+        """
+        Returns predicted flight of the shell fired by the tank
+        :param tank: Tank object
+        :return: tuple of (x, y) points of the flight
+        """
+        key = tank.get_tank_position(), turret_angle_index(tank.turret_angle), tank.tank_power
+        # chunks the flight crosses are generated first, so solving the flight does not change the version
+        trajectory = self.trajectory(*key)
+        end_x = trajectory.position(trajectory.end_time(self.ground.width))[0]
+        self.ground.ensure_generated(int(min(trajectory.start[0], end_x)), int(max(trajectory.start[0], end_x)) + 1)
+        return self.flight_at(*key, self.ground.version)
+
+    def draw(self, display, camera, tank):
+        """
+        Draws predicted flight of the shell as dotted line in tank's color
+        :param display: surface to draw on
+        :param camera: Camera object converting world coordinates to display ones
+        :param tank: Tank object
+        :return: none
+        """
+        for point in self.flight(tank):
+            if camera.is_visible(point[0]):
+                pygame.draw.circle(display, tank.player_color, camera.to_screen(point), 1)
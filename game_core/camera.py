@@ -0,0 +1,42 @@
+from game_core.constants import *
+
+
+class Camera:
+    """
+    Class which represents horizontally scrolling camera showing part of the world on display
+    """
+    def __init__(self, world_width=display_width):
+        """
+        Initialize camera
+        :param world_width: width of the world in columns
+        """
+        self.world_width = world_width
+        self.x = 0
+
+    def follow(self, x_coord):
+        """
+        Centers camera on given x coordinate, without showing anything outside the world
+        :param x_coord: x coordinate in the world
+        :return: True if camera moved, False otherwise
+        """
+        new_x = min(max(int(x_coord) - int(display_width / 2), 0), max(self.world_width - display_width, 0))
+        moved = new_x != self.x
+        self.x = new_x
+        return moved
+
+    def to_screen(self, point):
+        """
+        Converts world coordinates to display coordinates
+        :param point: (x, y) coordinates in the world
+        :return: (x, y) coordinates on display
+        """
+        return int(point[0]) - self.x, int(point[1])
+
+    def is_visible(self, x_coord, margin=0):
+        """
+        Tells if x coordinate is shown on display
+        :param x_coord: x coordinate in the world
+        :param margin: additional distance from display edges
+        :return: flag True/False
+        """
+        return self.x - margin <= x_coord < self.x + display_width + margin
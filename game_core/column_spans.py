@@ -0,0 +1,69 @@
+from bisect import bisect_right
+
+# Solid spans of one ground column are stored as flat sorted list [top_0, bottom_0, top_1, bottom_1, ...], where
+# each span covers rows [top, bottom). Screen y grows downwards, so the first span is the ground surface.
+
+
+def subtract_span(spans, top, bottom):
+    """
+    Removes rows [top, bottom) from solid spans
+    :param spans: solid spans of the column
+    :param top: first removed row
+    :param bottom: row after last removed one
+    :return: new list of solid spans
+    """
+    result = []
+    for index in range(0, len(spans), 2):
+        span_top, span_bottom = spans[index], spans[index + 1]
+        if span_bottom <= top or span_top >= bottom:
+            result.extend((span_top, span_bottom))
+            continue
+        if span_top < top:
+            result.extend((span_top, top))
+        if span_bottom > bottom:
+            result.extend((bottom, span_bottom))
+    return result
+
+
+def insert_span(spans, top, bottom):
+    """
+    Adds rows [top, bottom) to solid spans, merging touching spans
+    :param spans: solid spans of the column
+    :param top: first added row
+    :param bottom: row after last added one
+    :return: new list of solid spans
+    """
+    pairs = sorted([(spans[index], spans[index + 1]) for index in range(0, len(spans), 2)] + [(top, bottom)])
+    result = []
+    for span_top, span_bottom in pairs:
+        if result and span_top <= result[-1]:
+            result[-1] = max(result[-1], span_bottom)
+        else:
+            result.extend((span_top, span_bottom))
+    return result
+
+
+def is_solid(spans, y):
+    """
+    Tells if row y is inside any solid span
+    :param spans: solid spans of the column
+    :param y: row to check
+    :return: flag True/False
+    """
+    return bisect_right(spans, y) % 2 == 1
+
+
+def landing_height(spans, y, floor):
+    """
+    Returns top of the solid span containing row y, or of the first one below it
+    :param spans: solid spans of the column
+    :param y: row to check
+    :param floor: value returned when there is no solid below
+    :return: landing height
+    """
+    index = bisect_right(spans, y)
+    if index % 2 == 1:
+        return spans[index - 1]
+    if index < len(spans):
+        return spans[index]
+    return floor
@@ -5,6 +5,12 @@ from math import pi
 display_width = 1600
 display_height = 900
 
+# world constants
+world_screens = 1
+max_world_screens = 8
+chunk_width = 400
+chunk_keep_distance = 400
+
 # color constants
 white = (255, 255, 255)
 black = (0, 0, 0)
@@ -33,25 +39,88 @@ initial_turret_angle = -pi/2
 initial_tank_health = 100
 tank_explosion_power = 40
 tank_explosion_radius = 100
+spawn_candidates = 8
+damage_occlusion = False
+# part of explosion damage stopped when the whole way to the tank goes through the ground
+occlusion_attenuation = 0.75
+occlusion_samples = 16
+tank_index_cell_width = 64
+pixel_accurate_collision = False
+# rendered tank sprites kept at once, each (color, turret angle) pair takes about 11 kB
+tank_sprites_cache_size = 1024
 
 # simple shell constants
 min_shell_speed = 12
 max_shell_speed = 22
 shell_speed_step = (max_shell_speed-min_shell_speed)/100
+# shells follow a parabola, speed is in pixels and gravity in pixels per squared time unit
+shell_gravity = 0.3
+# flight time shown in one frame of shell animation
+shell_frame_time = 1.5
+# predicted flight of the active tank's shell, drawn with a dot per this much flight time
+aim_preview = False
+aim_preview_step = 2 * shell_frame_time
+aim_preview_cache_size = 256
 simple_shell_power = 80
 simple_shell_radius = 50
 
+# weapons, a tank switches between them with TAB
+weapons = ['shell', 'mirv', 'roller', 'digger']
+# (power, radius) of explosion of each weapon's warhead
+weapon_explosions = {'shell': (simple_shell_power, simple_shell_radius), 'mirv': (40, 35), 'roller': (70, 45),
+                     'digger': (60, 40)}
+# MIRV splits at the top of its flight, warheads fly apart by this horizontal speed difference
+mirv_warheads = 5
+mirv_spread = 1.2
+# roller rolls along ground surface, in pixels per flight time unit, and explodes on a rise or tank in its way
+roller_speed = 3
+roller_max_climb = 2
+roller_max_distance = 400
+# digger goes on through the ground, in pixels per flight time unit, carving a tunnel before it explodes
+digger_speed = 3
+digger_length = 120
+digger_radius = 8
+
 # temporary simple ground
 ground_height_min = 500
 ground_height_max = 800
+ground_overhangs = False
+terrain_algorithm = 'segments'
+terrain_seed = None
+# worlds whose generated heightmaps are kept, each with all its chunks
+terrain_cache_size = 16
+sloughing_gravity = 1500
+animate_sloughing = True
+granular_terrain = False
+# maximal height difference of neighbouring columns of loose ground, 1 gives 45 degrees angle of repose
+granular_max_step = 1
+granular_max_steps = 20000
+granular_steps_per_frame = 32
+maps_directory = 'assets/maps'
+map_name = None
 
 # player settings
 health_bar_init_positions = [(10, 10), (1490, 10), (10, 45), (1490, 45)]
 health_bar_length = 100
+health_bar_height = 25
+# with more players health bars share cells of a grid at the top of the display
+hud_height = 140
+hud_min_cell_width = 150
 players_number = 3
-max_players_number = 4
+players_numbers = [2, 3, 4, 6, 8, 12, 16, 25, 50]
+max_players_number = players_numbers[-1]
 tanks_number = 2
-max_tanks_number = 5
+tanks_numbers = [1, 2, 3, 4, 5, 10]
+max_tanks_number = tanks_numbers[-1]
+# generated battlefield gets wider when tanks do not fit, to this multiple of the tightest width
+spawn_room_factor = 1.5
+# computer players take the last places, a level is (seconds of shot search per turn, standard deviation of turret
+# angle error, standard deviation of power error)
+computer_players = 0
+computer_level = 'normal'
+computer_levels = {'easy': (0.02, 6 * angle_step, 8), 'normal': (0.1, 2 * angle_step, 3), 'hard': (0.5, 0, 0)}
+# turret angle steps and power points a computer player changes in one frame while aiming
+computer_aim_steps = 4
 
 
 # PyGame fonts
@@ -0,0 +1,66 @@
+import numpy as np
+from game_core.constants import *
+
+
+def overlapping_groups(craters):
+    """
+    Splits craters into groups of overlapping ones
+    :param craters: list of ((x, y), radius) pairs
+    :return: list of groups, each a list of ((x, y), radius) pairs
+    """
+    parents = list(range(len(craters)))
+
+    def root(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for first in range(len(craters)):
+        (x1, y1), r1 = craters[first]
+        for second in range(first + 1, len(craters)):
+            (x2, y2), r2 = craters[second]
+            if (x1 - x2) ** 2 + (y1 - y2) ** 2 < (r1 + r2) ** 2:
+                parents[root(second)] = root(first)
+
+    groups = {}
+    for index, crater in enumerate(craters):
+        groups.setdefault(root(index), []).append(crater)
+    return list(groups.values())
+
+
+def explosion_damages(positions, explosions, exposures=None):
+    """
+    Computes damage taken by all tanks from all explosions of one wave
+    :param positions: array of (x, y) tanks positions
+    :param explosions: list of ((x, y), power, radius) explosions
+    :param exposures: array of tanks exposures, one row per explosion, plain sight for all tanks if None
+    :return: array of summed damages, one per tank
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    if len(positions) == 0 or len(explosions) == 0:
+        return np.zeros(len(positions), dtype=np.int64)
+    points = np.array([point for point, _, _ in explosions], dtype=np.float64).reshape(-1, 2)
+    powers = np.array([power for _, power, _ in explosions], dtype=np.float64)
+    radii = np.array([radius for _, _, radius in explosions], dtype=np.float64)
+    return damage_matrix(positions, points, powers, radii, exposures).sum(axis=0)
+
+
+def damage_matrix(positions, points, powers, radii, exposures=None):
+    """
+    Computes damage dealt to every tank by every explosion separately
+    :param positions: array of (x, y) tanks positions
+    :param points: array of (x, y) explosion points
+    :param powers: array of explosion powers, one per explosion, or one power of all explosions
+    :param radii: array of explosion radii, one per explosion, or one radius of all explosions
+    :param exposures: array of tanks exposures, one row per explosion, plain sight for all tanks if None
+    :return: array of damages, one row per explosion and one column per tank
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    powers = np.broadcast_to(np.asarray(powers, dtype=np.float64), len(points))[:, np.newaxis]
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), len(points))[:, np.newaxis]
+    distances = np.hypot(positions[:, 0] - points[:, 0:1], positions[:, 1] - points[:, 1:2]).astype(np.int64)
+    attenuations = 1 if exposures is None else 1 - occlusion_attenuation * (1 - np.asarray(exposures))
+    damages = ((radii - distances) / radii * powers * attenuations).astype(np.int64)
+    return np.where(distances < radii, damages, 0)
@@ -1,24 +1,53 @@
 import pygame
-from shapely.geometry import LineString
-from random import choice
-from math import sin, cos
+import numpy as np
+from collections import deque
+from random import Random
 from game_core.constants import *
-from game_core.ground import Ground
+from game_core.ground import Ground, merge_intervals, intervals_overlap
 from game_core.player import Player
-from game_core.utils import animate_ground_sloughing, halt_whole_game, animate_explosion, message_to_screen
+from game_core.camera import Camera
+from game_core.tank_index import TankIndex
+from game_core.spawn_allocator import SpawnAllocator, spawn_width
+from game_core.turn_ring import TurnRing
+from game_core.hud import Hud, players_colors
+from game_core.trajectory import launch_velocity
+from game_core.projectiles import Projectiles
+from game_core.shot_search import ShotSearch
+from game_core.aim_preview import AimPreview
+from game_core.granular import GranularFlow
+from game_core.explosions import explosion_damages
+from game_core.map_library import MapLibrary
+from game_core.terrain_generator import generate_heightmap
+from game_core.utils import animate_ground_sloughing, halt_whole_game, animate_explosions, message_to_screen
 
 
 class GameManager:
     """
     Class which represents game manager object in game
     """
-    def __init__(self, player_number, tank_number):
+    def __init__(self, player_number, tank_number, overhangs=ground_overhangs, terrain=terrain_algorithm,
+                 seed=terrain_seed, world_width=display_width * world_screens, map_name=None,
+                 granular=granular_terrain, occlusion=damage_occlusion, pixel_collision=pixel_accurate_collision,
+                 computers=computer_players, level=computer_level, preview=aim_preview):
         """
         Init function
         :param player_number: number of players
         :param tank_number: number of tanks for each player
+        :param overhangs: flag if craters may leave overhangs and tunnels
+        :param terrain: name of terrain generation algorithm
+        :param seed: terrain seed used for every round, random one for each round if None
+        :param world_width: width of the battlefield, may be larger than display, generated battlefield gets wider
+        when tanks do not fit
+        :param map_name: name of the map from map library, randomly generated ground is used if None
+        :param granular: flag if loose ground slides down slopes steeper than the angle of repose
+        :param occlusion: flag if ground between explosion and tank weakens the damage
+        :param pixel_collision: flag if shells hit drawn pixels of tanks, turrets and wheels included
+        :param computers: number of players the game plays for, they take the last places
+        :param level: name of computer players level from computer_levels
+        :param preview: flag if predicted flight of the active tank's shell is drawn
         """
         self.players = []
+        self.player_turns = TurnRing()
         self.active_player = None
         self.game_display = pygame.display.set_mode((display_width, display_height))
         pygame.display.set_caption('ScorchedEarth')
@@ -28,120 +57,204 @@ class GameManager:
         self.ground = None
         self.players_number = player_number
         self.tank_number = tank_number
+        self.overhangs = overhangs
+        self.terrain = terrain
+        self.seed = seed
+        self.world_width = max(world_width, display_width)
+        self.map_library = MapLibrary()
+        self.map_name = map_name
+        self.granular = granular
+        self.occlusion = occlusion
+        self.pixel_collision = pixel_collision
+        if level not in computer_levels:
+            raise ValueError('unknown computer level {}'.format(level))
+        self.computers = min(max(computers, 0), player_number)
+        self.level = level
+        self.shot_search = None
+        self.preview = preview
+        self.aim_preview = None
+        if map_name is not None:
+            self.world_width = max(self.map_library.open(map_name).width, display_width)
+        elif spawn_width(player_number * tank_number) > self.world_width:
+            self.world_width = int(spawn_width(player_number * tank_number) * spawn_room_factor)
+        # fails fast, before the first round, when tanks do not fit
+        SpawnAllocator(self.world_width, player_number * tank_number)
+        self.camera = Camera(self.world_width)
+        self.tank_index = TankIndex()
+        self.hud = None
+        self.init_tanks_positions = []
 
-    def reinitialize_players(self):
+    def reinitialize_players(self, seed=None):
         """
         Reinitialize available tanks in the game
+        :param seed: terrain seed of the round, game's seed is used if None
         :return: none
         """
-        self.ground = Ground(self.game_display)
+        self.ground = Ground(self.game_display, self.overhangs, self.terrain, seed if seed is not None else self.seed,
+                             self.world_width)
+        if self.map_name is not None:
+            self.ground.load_map(self.map_library.open(self.map_name))
+        self.camera.x = 0
+        self.tank_index = TankIndex()
+        self.hud = Hud(self.players_number, self.tank_number)
+        self.aim_preview = AimPreview(self.ground, self.tank_index, self.pixel_collision)
         self.players = []
-        left_colors = player_colors[:]
+        left_colors = players_colors(max(self.players_number, len(player_colors)))
+        Random().shuffle(left_colors)
         for i in range(self.players_number):
-            chosen_color = choice(left_colors)
-            left_colors.remove(chosen_color)
-            self.players.append(Player(self.game_display, self.tank_number, chosen_color, i))
-        init_tanks_positions = []
+            level = self.level if i >= self.players_number - self.computers else None
+            self.players.append(Player(self.game_display, self.tank_number, left_colors[i], i, self.camera,
+                                       self.tank_index, self.players_number, level))
+        self.init_tanks_positions = []
+        allocator = SpawnAllocator(self.world_width, self.players_number * self.tank_number,
+                                   rng=Random(self.ground.seed))
         for player in self.players:
-            player.initialize_tanks(init_tanks_positions, self.ground)
+            player.initialize_tanks(self.init_tanks_positions, self.ground, allocator)
+        self.ground.take_dirty_intervals()
+        self.player_turns = TurnRing(self.players)
         self.active_player = self.players[0]
+        self.shot_search = None
 
-    def check_collision(self, prev_shell_position, current_shell_position):
+    def correct_ground(self, craters):
         """
-        Checks collision of shell with other objects and return coordinates of shell collision
-        :param prev_shell_position: Coordinates of previous shell position
-        :param current_shell_position: Coordinates of updated shell position
-        :return: Coordinates of collision or None if no collision detected
+        Corrects ground after simultaneous explosions
+        :param craters: list of ((x, y), radius) pairs
+        :return: none
         """
-        line1 = LineString([prev_shell_position, current_shell_position])
-
-        for player in self.players:
-            intersection = player.check_collision_with_tanks(line1)
-            if intersection:
-                return intersection
-
-        return self.ground.check_collision(line1)
+        left_ground = self.ground.update_after_explosions(craters)
+        crater_intervals = merge_intervals([(point[0] - radius, point[0] + radius) for point, radius in craters])
+        if self.granular:
+            if len(left_ground) > 0:
+                self.ground.update_after_sloughing(left_ground)
+            self.settle_granular_ground(crater_intervals[0][0], crater_intervals[-1][1])
+        elif len(left_ground) > 0:
+            if animate_sloughing:
+                self.draw_dirty(crater_intervals)
+                animate_ground_sloughing(self.game_display, left_ground, self.ground, -self.camera.x)
+            self.ground.update_after_sloughing(left_ground)
 
-    def correct_ground(self, point, explosion_radius):
+    def settle_granular_ground(self, left, right):
         """
-        Corrects ground after explosion
-        :param point: point of explosion
-        :param explosion_radius: radius of explosion
+        Lets loose ground slide until it rests at the angle of repose, showing the flow if sloughing is animated
+        :param left: first column of disturbed ground
+        :param right: column after the last one of disturbed ground
         :return: none
         """
-        left_ground = self.ground.update_after_explosion(point, explosion_radius)
-        if len(left_ground) > 0:
-            self.draw_all()
-            animate_ground_sloughing(self.game_display, left_ground, self.ground)
-            self.ground.update_after_sloughing(left_ground)
+        flow = GranularFlow(self.ground, left, right)
+        if not animate_sloughing:
+            flow.settle()
+            return
+        for _ in range(granular_max_steps // granular_steps_per_frame):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    halt_whole_game()
+            changed = [flow.step() for _ in range(granular_steps_per_frame)]
+            self.draw_dirty(merge_intervals([interval for interval in changed if interval]))
+            if flow.is_settled():
+                break
+            self.clock.tick(60)
 
-    def apply_players_damages(self, collision_point, shell_power, shell_radius):
+    def resolve_explosions(self, explosions):
         """
-        Applies damages for players tanks
-        :param collision_point: point of collision
-        :param shell_power: power of shell
-        :param shell_radius: radius of shell
+        Resolves chain reaction started by explosions. Explosions are queued in waves, every wave carves its craters
+        together and damages all tanks at once, tanks destroyed by a wave explode in the next one
+        :param explosions: list of ((x, y), power, radius) explosions of the first wave
         :return: none
         """
-        explosion_points = []
-        for player in self.players:
-            explosion_points.extend(player.apply_damage(collision_point, shell_power, shell_radius))
-        if len(explosion_points) > 0:
-            for point in explosion_points:
-                self.correct_ground(point, tank_explosion_radius)
-                self.apply_players_damages(point, tank_explosion_power, tank_explosion_radius)
+        waves = deque([explosions])
+        while waves:
+            wave = waves.popleft()
+            self.correct_ground([(point, radius) for point, _, radius in wave])
+            tanks = [tank for player in self.players for tank in player.active_tanks]
+            if not tanks:
+                continue
+            positions = np.array([tank.get_tank_position() for tank in tanks], dtype=np.float64)
+            exposures = self.tanks_exposures(positions, wave) if self.occlusion else None
+            damages = explosion_damages(positions, wave, exposures)
+            destroyed = [tank for tank, damage in zip(tanks, damages.tolist()) if tank.take_damage(damage)]
+            for player in self.players:
+                player.update_tanks_list()
+            if destroyed:
+                waves.append([(tank.get_tank_position(), tank_explosion_power, tank_explosion_radius)
+                              for tank in destroyed])
+
+    def tanks_exposures(self, positions, explosions):
+        """
+        Finds how much ground covers tanks from explosions, tanks in radius of an explosion are checked in one call
+        :param positions: array of (x, y) tanks positions
+        :param explosions: list of ((x, y), power, radius) explosions
+        :return: array of exposures, one row per explosion and one column per tank
+        """
+        exposures = np.ones((len(explosions), len(positions)))
+        for row, (point, _, radius) in enumerate(explosions):
+            near = np.flatnonzero(np.hypot(positions[:, 0] - point[0], positions[:, 1] - point[1]) < radius)
+            exposures[row, near] = self.ground.explosion_exposure(point, positions[near])
+        return exposures
 
-    def correct_tanks_heights(self):
+    def correct_tanks_heights(self, intervals=None):
         """
-        Corrects heights of all players' tanks
+        Corrects heights of players' tanks standing on changed ground
+        :param intervals: sorted list of disjoint (left, right) intervals of changed columns, all tanks if None
         :return: none
         """
         for player in self.players:
-            player.correct_tanks_heights(self.ground)
+            player.correct_tanks_heights(self.ground, intervals)
 
-    def fire_simple_shell(self, tank_object):
+    def fire_weapon(self, tank_object):
         """
-        Show animation of shooting simple shell
-        :param tank_object: tank object that shoots the shell
+        Show animation of shooting tank's weapon, all its projectiles are advanced together until none is left
+        :param tank_object: tank object that shoots the weapon
         :return: none
         """
         (power, gun_angle, fire_sound, color, gun_end_coord) = tank_object.get_init_data_for_shell()
         pygame.mixer.Sound.play(fire_sound)
-        speed = min_shell_speed + shell_speed_step * power
-        shell_position = list(gun_end_coord)
-        elapsed_time = 0.1
+        # flights are known before projectiles leave the turret, frames only show points of their paths
+        projectiles = Projectiles(self.ground, self.tank_index, self.pixel_collision)
+        projectiles.launch([gun_end_coord], [launch_velocity(power, gun_angle)], tank_object.weapon)
 
-        fire = True
-
-        while fire:
+        while len(projectiles) > 0:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     halt_whole_game()
 
-            prev_shell_position = list(shell_position)
-            vertical_speed = -((speed * cos(gun_angle)) - 10 * elapsed_time / 2)
-            horizontal_speed = (speed * sin(gun_angle))
-            shell_position[0] += int(horizontal_speed * elapsed_time)
-            shell_position[1] += int(vertical_speed * elapsed_time)
-            elapsed_time += 0.1
-
-            if shell_position[1] > 2 * display_height:
-                break
+            explosions, craters = projectiles.advance(shell_frame_time)
+            positions = projectiles.positions().tolist()
+            if positions and self.camera.follow(positions[0][0]):
+                self.draw_all(positions[0][0])
+            for position in positions:
+                pygame.draw.circle(self.game_display, color, self.camera.to_screen(position), 4)
 
-            collision_point = self.check_collision(prev_shell_position, shell_position)
-
-            if collision_point:
-                animate_explosion(self.game_display, collision_point, self.strike_earth_sound, simple_shell_radius)
-                self.correct_ground(collision_point, simple_shell_radius)
-                self.apply_players_damages(collision_point, simple_shell_power, simple_shell_radius)
-                self.correct_tanks_heights()
-                fire = False
-            else:
-                pygame.draw.circle(self.game_display, color, (shell_position[0], shell_position[1]), 4)
+            if craters:
+                self.correct_ground(craters)
+            if explosions:
+                animate_explosions(self.game_display, [(self.camera.to_screen(point), radius)
+                                                       for point, _, radius in explosions], self.strike_earth_sound)
+                self.resolve_explosions(explosions)
+            if craters or explosions:
+                dirty_intervals = self.ground.take_dirty_intervals()
+                self.correct_tanks_heights(dirty_intervals)
+                self.draw_dirty(merge_intervals(dirty_intervals + self.ground.take_dirty_intervals()))
 
             pygame.display.update()
             self.clock.tick(60)
 
+    def play_computer_turn(self, tank_object):
+        """
+        Plays a frame of computer player's turn, the shot is searched in background and then aimed step by step
+        :param tank_object: active tank of the computer player
+        :return: True if the tank has fired, False while it is still searching or aiming
+        """
+        if self.shot_search is None:
+            self.shot_search = ShotSearch(tank_object, self.active_player, self.players, self.ground, self.tank_index,
+                                          self.active_player.computer_level, self.pixel_collision)
+            self.shot_search.start()
+            return False
+        if self.shot_search.shot is None or not tank_object.aim_at(*self.shot_search.shot):
+            return False
+        self.shot_search = None
+        self.fire_weapon(tank_object)
+        return True
+
     def update_players(self):
         """
         Updates each player information
@@ -151,28 +264,76 @@ class GameManager:
         for player in self.players:
             if player.is_in_game():
                 left_players.append(player)
+            else:
+                # removing the active player passes the turn to the next one
+                self.player_turns.remove(player)
 
-        if self.active_player in left_players:
-            self.active_player = left_players[(left_players.index(self.active_player) + 1) % len(left_players)]
-        else:
-            if len(left_players) > 0:
-                init_index = self.players.index(self.active_player)
-                while True:
-                    self.active_player = self.players[(init_index + 1) % len(self.players)]
-                    if self.active_player in left_players:
-                        break
+        if self.active_player in self.player_turns:
+            self.player_turns.advance()
+        if self.player_turns.current is not None:
+            self.active_player = self.player_turns.current
 
         self.players = left_players
 
-    def draw_all(self):
+    def save_map(self):
+        """
+        Saves ground of the current round, as it was before any explosion, to map library
+        :return: path of the saved map
+        """
+        if self.map_name is not None:
+            map_file = self.map_library.open(self.map_name)
+            # copied, as the library replaces the file viewed by the map
+            heights, name = np.array(map_file.heights), map_file.name
+        else:
+            heights = generate_heightmap(self.ground.algorithm, self.ground.seed, 0, self.ground.width)
+            name = '{}_{}'.format(self.ground.algorithm, self.ground.seed)
+        spawn_slots = [position[0] for position in self.init_tanks_positions]
+        return self.map_library.add(name, heights, spawn_slots, self.ground.seed, self.ground.algorithm)
+
+    def draw_all(self, shell_x_coord=None, active_tank=None):
         """
         Draws all elements on display
+        :param shell_x_coord: x coordinate of flying shell, ground around it is kept ready to draw
+        :param active_tank: chosen tank, shown highlighted together with its power
         :return: none
         """
-        self.game_display.fill(black)
-        self.ground.draw()
+        # ground surface is opaque and covers the whole display, so no fill is needed
+        self.ground.draw(self.camera)
+        keep_x_coords = [] if shell_x_coord is None else [shell_x_coord]
         for player in self.players:
-            player.draw_tanks_and_bars()
+            player.draw_tanks()
+            keep_x_coords.extend(tank.get_tank_position()[0] for tank in player.active_tanks)
+        if self.preview and active_tank:
+            self.aim_preview.draw(self.game_display, self.camera, active_tank)
+        flashing = active_tank.show_tank_special() if active_tank else False
+        self.hud.update_health_bars([tank for player in self.players for tank in player.active_tanks],
+                                    active_tank if flashing else None)
+        self.hud.update_power(active_tank)
+        self.hud.draw(self.game_display)
+        self.ground.evict_chunk_surfaces(keep_x_coords, self.camera)
+
+    def draw_dirty(self, intervals):
+        """
+        Redraws and updates only display regions over changed columns and under changed health bars, together with
+        tanks and health bars there
+        :param intervals: sorted list of disjoint (left, right) intervals of changed columns
+        :return: none
+        """
+        if not intervals:
+            return
+        hud_rects = self.hud.update_health_bars([tank for player in self.players for tank in player.active_tanks])
+        # ground is drawn under changed health bars too, so cleared ones do not stay on the display
+        intervals = merge_intervals(intervals + [(self.camera.x + rect.left, self.camera.x + rect.right)
+                                                 for rect in hud_rects])
+        rects = self.ground.draw(self.camera, intervals)
+        for player in self.players:
+            for tank in player.active_tanks:
+                tank_x = tank.get_tank_position()[0]
+                if intervals_overlap(intervals, tank_x - tank.get_reach(), tank_x + tank.get_reach()):
+                    tank.draw_tank()
+                    rects.append(tank.get_screen_rect())
+        self.hud.draw(self.game_display, rects)
+        pygame.display.update(rects)
 
     def run(self):
         """
@@ -192,7 +353,9 @@ class GameManager:
             if game_over:
                 message_to_screen(self.game_display, "Game over", red, -50, FontSize.LARGE, sys_font=False)
                 message_to_screen(self.game_display, "S - play again", green, 50, sys_font=False)
-                message_to_screen(self.game_display, "Q - quit", green, 80, sys_font=False)
+                message_to_screen(self.game_display, "R - replay this map", green, 80, sys_font=False)
+                message_to_screen(self.game_display, "M - save this map", green, 110, sys_font=False)
+                message_to_screen(self.game_display, "Q - quit", green, 140, sys_font=False)
                 pygame.display.update()
                 while game_over:
                     for event in pygame.event.get():
@@ -200,8 +363,12 @@ class GameManager:
                             if event.key == pygame.K_q:
                                 game_exit = True
                                 game_over = False
-                            if event.key == pygame.K_s:
-                                self.reinitialize_players()
+                            if event.key == pygame.K_m:
+                                self.save_map()
+                                message_to_screen(self.game_display, "Map saved", green, 180, sys_font=False)
+                                pygame.display.update()
+                            if event.key == pygame.K_s or event.key == pygame.K_r:
+                                self.reinitialize_players(self.ground.seed if event.key == pygame.K_r else None)
                                 active_tank = self.players[0].next_active_tank()
                                 game_exit = False
                                 game_over = False
@@ -213,7 +380,7 @@ class GameManager:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     game_exit = True
-                elif event.type == pygame.KEYDOWN:
+                elif event.type == pygame.KEYDOWN and not self.active_player.is_computer():
                     if event.key == pygame.K_UP:
                         power_change = 1
                     elif event.key == pygame.K_DOWN:
@@ -224,8 +391,10 @@ class GameManager:
                     elif event.key == pygame.K_RIGHT:
                         # change angle
                         angle_change = angle_step
+                    elif event.key == pygame.K_TAB:
+                        active_tank.change_weapon()
                     elif event.key == pygame.K_SPACE:
-                        self.fire_simple_shell(active_tank)
+                        self.fire_weapon(active_tank)
                         self.update_players()
                         active_tank = self.active_player.next_active_tank()
                 elif event.type == pygame.KEYUP:
@@ -234,14 +403,18 @@ class GameManager:
                     elif event.key == pygame.K_UP or event.key == pygame.K_DOWN:
                         power_change = 0
 
-            self.draw_all()
+            if active_tank and self.active_player.is_computer() and self.play_computer_turn(active_tank):
+                self.update_players()
+                active_tank = self.active_player.next_active_tank()
+
+            if active_tank:
+                self.camera.follow(active_tank.get_tank_position()[0])
+            self.draw_all(active_tank=active_tank)
 
             if len(self.players) <= 1:
                 game_over = True
 
-            if active_tank:
-                active_tank.show_tank_special()
-                active_tank.show_tanks_power()
+            if active_tank and not self.active_player.is_computer():
                 active_tank.update_turret_angle(angle_change)
                 active_tank.update_tank_power(power_change)
 
@@ -0,0 +1,94 @@
+import numpy as np
+from game_core.constants import *
+
+
+class GranularFlow:
+    """
+    Class which represents loose ground sliding down slopes steeper than the angle of repose. Every step is a whole
+    array cellular automaton update of neighbouring column pairs, alternating even and odd pairs so every column
+    trades ground with one neighbour at a time. Only the active region, where ground still moves, is updated
+    """
+    def __init__(self, ground, left, right, max_step=granular_max_step):
+        """
+        Initialize flow
+        :param ground: Ground object
+        :param left: first column of initially active region
+        :param right: column after the last one of initially active region
+        :param max_step: maximal stable height difference of neighbouring columns, defines angle of repose
+        """
+        self.ground = ground
+        self.max_step = max_step
+        # pairs crossing the region borders may be unstable too
+        self.left = max(left - 1, 0)
+        self.right = min(right + 1, ground.width)
+        # regions changed by the last two steps, one of each parity, pairs of both parities may be unstable there
+        self.changed = [(self.left, self.right), (self.left, self.right)]
+        self.parity = 0
+        self.steps = 0
+        # columns with caves or overhangs do not take part in the flow
+        self.fixed = np.zeros(ground.width, dtype=bool)
+        self.fixed[list(ground.spans)] = True
+
+    def is_settled(self):
+        """
+        Tells if the ground stopped moving
+        :return: flag True/False
+        """
+        return self.left >= self.right
+
+    def step(self):
+        """
+        Moves ground between neighbouring column pairs of one parity inside active region
+        :return: (left, right) interval of changed columns or None if nothing moved
+        """
+        if self.is_settled():
+            return None
+        self.ground.ensure_generated(self.left, self.right)
+        heights = self.ground.heights
+        start = self.left + (self.parity - self.left) % 2
+        self.parity ^= 1
+        upper, lower = heights[start:self.right - 1:2], heights[start + 1:self.right:2]
+        # screen y grows downwards, positive difference means the left column is higher
+        difference = lower - upper
+        excess = np.abs(difference) - self.max_step
+        moved = np.where(excess > 0, (excess + 1) // 2, 0) * np.sign(difference)
+        moved[self.fixed[start:self.right - 1:2] | self.fixed[start + 1:self.right:2]] = 0
+        changed = np.flatnonzero(moved)
+        self.steps += 1
+        if len(changed) == 0:
+            self.shrink_region(None)
+            return None
+        upper += moved
+        lower -= moved
+        left = start + 2 * int(changed[0])
+        right = start + 2 * int(changed[-1]) + 2
+        self.ground.mark_changed(left, right)
+        self.shrink_region((max(left - 1, 0), min(right + 1, self.ground.width)))
+        return left, right
+
+    def shrink_region(self, changed):
+        """
+        Sets active region to cover changes of the last two steps. Pairs of the parity just updated are stable
+        except next to columns changed later, pairs of the other parity may still be unstable wherever they were
+        before the step or next to its changes
+        :param changed: (left, right) interval around columns changed by the step, None if nothing moved
+        :return: none
+        """
+        self.changed = [self.changed[1], changed]
+        regions = [region for region in self.changed if region is not None]
+        if not regions:
+            self.left = self.right
+            return
+        self.left = min(left for left, _ in regions)
+        self.right = max(right for _, right in regions)
+
+    def settle(self, max_steps=granular_max_steps):
+        """
+        Runs the flow until ground stops moving
+        :param max_steps: maximal number of steps
+        :return: none
+        """
+        for _ in range(max_steps):
+            if self.is_settled():
+                break
+            self.step()
@@ -1,101 +1,542 @@
 import pygame
-from random import randint
-from shapely.geometry import LineString, Point, MultiPoint
+import numpy as np
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from random import randint, randrange
 from game_core.constants import *
+from game_core.heightmap_index import HeightmapIndex
+from game_core.terrain_stats import TerrainStats
+from game_core.column_spans import subtract_span, insert_span, is_solid
+from game_core.terrain_generator import generate_heightmap
+from game_core.sloughing import solve_sloughing
+from game_core.explosions import overlapping_groups
+
+# crater bounds of columns outside the crater
+empty_crater = np.iinfo(np.int32).max
+
+
+@lru_cache(maxsize=32)
+def crater_stencil(radius):
+    """
+    Returns half heights of explosion circle for each column offset in range [-radius, radius)
+    :param radius: radius of explosion
+    :return: read-only array of half heights, cached per radius
+    """
+    offsets = np.arange(-radius, radius)
+    half_heights = np.sqrt(radius ** 2 - offsets ** 2)
+    half_heights.flags.writeable = False
+    return half_heights
+
+
+def merge_intervals(intervals):
+    """
+    Merges overlapping and touching intervals
+    :param intervals: list of (left, right) tuples
+    :return: sorted list of disjoint (left, right) tuples
+    """
+    merged = []
+    for left, right in sorted(intervals):
+        if merged and left <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], right))
+        else:
+            merged.append((left, right))
+    return merged
+
+
+def intervals_overlap(intervals, left, right):
+    """
+    Tells if range [left, right) overlaps any of the intervals
+    :param intervals: sorted list of disjoint (left, right) tuples, as returned by merge_intervals
+    :param left: first column of the range
+    :param right: column after the last one of the range
+    :return: flag True/False
+    """
+    position = bisect_left(intervals, (right,))
+    return position > 0 and intervals[position - 1][1] > left
+
+
+def merge_crater_layers(uppers, lowers):
+    """
+    Merges vertical crater bounds of several craters into disjoint layers, empty bounds are marked by empty_crater
+    :param uppers: array of upper bounds, one row per crater and one column per ground column
+    :param lowers: array of lower bounds of the same shape
+    :return: list of (upper, lower) arrays, in each column non empty layers are disjoint and sorted from the top
+    """
+    order = np.argsort(uppers, axis=0, kind='stable')
+    uppers, lowers = np.take_along_axis(uppers, order, 0), np.take_along_axis(lowers, order, 0)
+    layers = []
+    current_upper, current_lower = uppers[0], lowers[0]
+    for upper, lower in zip(uppers[1:], lowers[1:]):
+        joined = upper <= current_lower
+        layers.append((np.where(joined, empty_crater, current_upper), np.where(joined, empty_crater, current_lower)))
+        current_upper = np.where(joined, current_upper, upper)
+        current_lower = np.where(joined, np.maximum(current_lower, lower), lower)
+    layers.append((current_upper, current_lower))
+    return layers
 
 
 class Ground:
-    def __init__(self, game_display):
+    """
+    Class which represents ground object in game, stored as a heightmap with one surface height per column. Columns
+    with caves or overhangs additionally keep their solid spans, columns without entry are solid down to the bottom.
+    World is split into chunks of columns, which are generated when first needed and drawn from their own surfaces
+    """
+    def __init__(self, game_display, overhangs=False, algorithm=terrain_algorithm, seed=None, width=display_width):
+        """
+        Initialize ground
+        :param game_display: handle to display
+        :param overhangs: flag if craters may leave overhangs and tunnels instead of sloughing the ground above them
+        :param algorithm: name of terrain generation algorithm
+        :param seed: terrain seed, random one is chosen if None
+        :param width: width of the world in columns
+        """
         self.game_display = game_display
         self.ground_height = 0
-        self.points = []
-        self.reinitialize()
-
-    def reinitialize(self):
-        heights = []
-        x_step = int(display_width/10)
-        for i in range(11):
-            heights.append((x_step*i, randint(ground_height_min, ground_height_max)))
-        ground_line = LineString(heights)
-        for i in range(display_width):
-            point = ground_line.intersection(LineString([(i, 0), (i, display_height)]))
-            self.points.append([int(point.x), int(point.y)])
+        self.width = width
+        self.heights = np.full(width, display_height, dtype=np.int32)
+        self.generated = np.zeros(-(-width // chunk_width), dtype=bool)
+        self.spans = {}
+        self.spawn_slots = []
+        self.overhangs = overhangs
+        self.algorithm = algorithm
+        self.seed = None
+        self.index = None
+        self.stats = None
+        self.chunk_surfaces = {}
+        self.changed_intervals = []
+        self.dirty_intervals = []
+        self.version = 0
+        self.reinitialize(seed)
+
+    @property
+    def points(self):
+        """
+        Ground surface points of generated columns, one [x, y] pair per column, no chunk is generated for them
+        :return: read-only snapshot of the heightmap as (columns, 2) array
+        """
+        columns = np.flatnonzero(np.repeat(self.generated, chunk_width)[:self.width])
+        return np.column_stack((columns, self.heights[columns]))
+
+    def reinitialize(self, seed=None):
+        """
+        Generates new ground, the same seed always gives the same ground
+        :param seed: terrain seed, random one is chosen if None
+        :return: none
+        """
+        self.seed = seed if seed is not None else randrange(2 ** 32)
+        self.heights = np.full(self.width, display_height, dtype=np.int32)
+        self.generated[:] = False
+        self.spans = {}
+        self.index = HeightmapIndex(self.heights)
+        self.stats = TerrainStats(self.heights)
+        self.chunk_surfaces = {}
+        self.changed_intervals = []
+        self.dirty_intervals = []
+        self.version += 1
 
         self.ground_height = randint(ground_height_min, ground_height_max)
 
-    def draw(self):
-        for i in range(display_width):
-            pygame.draw.line(self.game_display,
-                             dark_green,
-                             (i, display_height),
-                             (self.points[i][0], self.points[i][1]))
-
-    def check_collision(self, line):
-        intersection_point = None
-        step = 1
-        if int(line.coords[0][0]) > int(line.coords[1][0]):
-            step = -1
-        for index in range(int(line.coords[0][0]), int(line.coords[1][0]), step):
-            ground_line = LineString([[index, display_height],
-                                      [index, self.get_ground_height_at_point(index)]])
-            intersection = ground_line.intersection(line)
-            if intersection:
-                intersection_point = int(intersection.x), int(intersection.y)
-                break
-
-        if not intersection_point:
-            display_line = LineString([[0, display_height], [display_width, display_height]])
-            intersection_display = display_line.intersection(line)
-            if intersection_display:
-                intersection_point = int(intersection_display.x), int(intersection_display.y)
-
-        return intersection_point
+    def load_map(self, map_file):
+        """
+        Replaces ground with heights of the map
+        :param map_file: MapFile object of the same width as the ground
+        :return: none
+        """
+        self.reinitialize(map_file.seed)
+        columns = min(self.width, map_file.width)
+        self.heights[:columns] = map_file.heights[:columns]
+        self.generated[:] = True
+        self.spawn_slots = map_file.spawn_slots.tolist()
+        self.mark_changed(0, self.width)
+
+    def ensure_generated(self, left, right):
+        """
+        Generates all not yet generated chunks overlapping columns [left, right)
+        :param left: first column
+        :param right: column after the last one
+        :return: none
+        """
+        first_chunk = max(left, 0) // chunk_width
+        last_chunk = (min(right, self.width) - 1) // chunk_width
+        if first_chunk > last_chunk or self.generated[first_chunk:last_chunk + 1].all():
+            return
+        for chunk in range(first_chunk, last_chunk + 1):
+            if not self.generated[chunk]:
+                start, stop = chunk * chunk_width, min((chunk + 1) * chunk_width, self.width)
+                self.heights[start:stop] = generate_heightmap(self.algorithm, self.seed, start, stop)
+                self.generated[chunk] = True
+                self.mark_changed(start, stop)
+
+    def draw(self, camera=None, intervals=None):
+        """
+        Draws visible part of the ground on display, repainting only changed columns of cached chunk surfaces
+        :param camera: Camera object, left edge of the world is shown if None
+        :param intervals: sorted list of disjoint (left, right) column intervals to draw, whole view is drawn if None
+        :return: list of drawn display rectangles
+        """
+        view_left = camera.x if camera else 0
+        first_chunk = view_left // chunk_width
+        last_chunk = (min(view_left + display_width, self.width) - 1) // chunk_width
+        self.ensure_generated(first_chunk * chunk_width, (last_chunk + 1) * chunk_width)
+        for chunk in range(first_chunk, min(last_chunk + 1, len(self.generated))):
+            if chunk not in self.chunk_surfaces:
+                self.chunk_surfaces[chunk] = pygame.Surface((chunk_width, display_height))
+                self.changed_intervals.append((chunk * chunk_width, min((chunk + 1) * chunk_width, self.width)))
+        self.repaint_changed_columns()
+        if intervals is None:
+            for chunk in range(first_chunk, min(last_chunk + 1, len(self.generated))):
+                self.game_display.blit(self.chunk_surfaces[chunk], (chunk * chunk_width - view_left, 0))
+            return [pygame.Rect(0, 0, display_width, display_height)]
+
+        rects = []
+        for left, right in intervals:
+            left, right = max(left, view_left), min(right, view_left + display_width, self.width)
+            if left >= right:
+                continue
+            for chunk in range(left // chunk_width, (right - 1) // chunk_width + 1):
+                start, stop = max(left, chunk * chunk_width), min(right, (chunk + 1) * chunk_width)
+                area = pygame.Rect(start - chunk * chunk_width, 0, stop - start, display_height)
+                rects.append(self.game_display.blit(self.chunk_surfaces[chunk], (start - view_left, 0), area))
+        return rects
+
+    def repaint_changed_columns(self):
+        """
+        Repaints changed columns of existing chunk surfaces with bulk pixel writes
+        :return: none
+        """
+        rows = np.arange(display_height)
+        for left, right in merge_intervals(self.changed_intervals):
+            for chunk in range(left // chunk_width, (right - 1) // chunk_width + 1):
+                if chunk not in self.chunk_surfaces:
+                    continue
+                surface = self.chunk_surfaces[chunk]
+                start, stop = max(left, chunk * chunk_width), min(right, (chunk + 1) * chunk_width)
+                solid = rows[np.newaxis, :] >= self.heights[start:stop, np.newaxis]
+                for column in [column for column in self.spans if start <= column < stop]:
+                    solid[column - start] = False
+                    spans = self.spans[column]
+                    for index in range(0, len(spans), 2):
+                        solid[column - start, spans[index]:spans[index + 1]] = True
+                pixels = pygame.surfarray.pixels2d(surface)
+                pixels[start - chunk * chunk_width:stop - chunk * chunk_width] = \
+                    np.where(solid, surface.map_rgb(dark_green), surface.map_rgb(black))
+                del pixels
+        self.changed_intervals = []
+
+    def evict_chunk_surfaces(self, keep_x_coords, camera=None):
+        """
+        Frees surfaces of chunks which are far from all given points and not visible
+        :param keep_x_coords: x coordinates of tanks and shells
+        :param camera: Camera object
+        :return: none
+        """
+        view_left = camera.x if camera else 0
+        for chunk in list(self.chunk_surfaces):
+            left, right = chunk * chunk_width, (chunk + 1) * chunk_width
+            if right > view_left and left < view_left + display_width:
+                continue
+            if any(left - chunk_keep_distance <= x_coord < right + chunk_keep_distance for x_coord in keep_x_coords):
+                continue
+            del self.chunk_surfaces[chunk]
 
     def get_ground_height_at_point(self, x_coord):
-        if x_coord < 0 or x_coord >= display_width:
+        if x_coord < 0 or x_coord >= self.width:
             return display_height
-        return self.points[x_coord][1]
+        if not self.generated[x_coord // chunk_width]:
+            self.ensure_generated(x_coord, x_coord + 1)
+        return int(self.heights[x_coord])
+
+    def window_average(self, left, right):
+        """
+        Returns average ground height in columns [left, right), columns outside the world count as the bottom
+        :param left: first column
+        :param right: column after the last one
+        :return: average height rounded down
+        """
+        inner_left, inner_right = max(left, 0), min(right, self.width)
+        total = display_height * (right - left - max(inner_right - inner_left, 0))
+        if inner_left < inner_right:
+            self.ensure_generated(inner_left, inner_right)
+            total += self.stats.range_sum(inner_left, inner_right)
+        return total // (right - left)
+
+    def window_slope(self, left, right):
+        """
+        Returns slope of line fitted to ground heights in columns [left, right) inside the world
+        :param left: first column
+        :param right: column after the last one
+        :return: change of height per column, positive when ground goes down to the right
+        """
+        left, right = max(left, 0), min(right, self.width)
+        if right - left < 2:
+            return 0.0
+        self.ensure_generated(left, right)
+        return self.stats.range_slope(left, right)
+
+    def window_flatness(self, left, right):
+        """
+        Returns difference between the lowest and the highest ground point in columns [left, right), columns outside
+        the world count as the bottom
+        :param left: first column
+        :param right: column after the last one
+        :return: height difference, 0 for flat ground
+        """
+        inner_left, inner_right = max(left, 0), min(right, self.width)
+        if inner_left >= inner_right:
+            return 0
+        self.ensure_generated(inner_left, inner_right)
+        highest = self.index.range_min(inner_left, inner_right)
+        lowest = display_height if inner_right - inner_left < right - left else self.index.range_max(inner_left,
+                                                                                                      inner_right)
+        return lowest - highest
+
+    def get_column_spans(self, x_coord):
+        """
+        Returns solid spans of the column
+        :param x_coord: x coordinate
+        :return: flat list [top_0, bottom_0, top_1, bottom_1, ...]
+        """
+        if x_coord in self.spans:
+            return self.spans[x_coord]
+        height = self.get_ground_height_at_point(x_coord)
+        return [height, display_height] if height < display_height else []
+
+    def set_column_spans(self, x_coord, spans):
+        """
+        Sets solid spans of the column, keeping spans entry only for columns with caves or overhangs
+        :param x_coord: x coordinate
+        :param spans: flat list [top_0, bottom_0, top_1, bottom_1, ...]
+        :return: none
+        """
+        self.spans.pop(x_coord, None)
+        if not spans:
+            self.heights[x_coord] = display_height
+        else:
+            self.heights[x_coord] = spans[0]
+            if len(spans) > 2 or spans[1] != display_height:
+                self.spans[x_coord] = spans
 
     def correct_heights(self, interval, new_height):
-        for i in range(interval[0], interval[1]):
-            self.points[i][1] = new_height
+        """
+        Flattens ground in interval to new height, filling caves below it
+        :param interval: (left, right) columns
+        :param new_height: new height of the ground
+        :return: none
+        """
+        left, right = max(interval[0], 0), max(interval[1], 0)
+        self.ensure_generated(left, right)
+        for column in [column for column in self.spans if left <= column < right]:
+            del self.spans[column]
+        self.heights[left:right] = new_height
+        self.mark_changed(interval[0], interval[1])
+
+    def mark_changed(self, left, right):
+        """
+        Propagates change of heights in columns [left, right) to structures built over the heightmap, any change bumps
+        ground version
+        :param left: first changed column
+        :param right: column after last changed one
+        :return: none
+        """
+        self.version += 1
+        self.index.update(left, right)
+        self.stats.update(left, right)
+        left, right = max(left, 0), min(right, self.width)
+        if left < right:
+            self.changed_intervals.append((left, right))
+            self.dirty_intervals.append((left, right))
+
+    def take_dirty_intervals(self):
+        """
+        Returns columns changed since the last call, so that only tanks and display regions over them get updated
+        :return: sorted list of disjoint (left, right) intervals
+        """
+        dirty_intervals = merge_intervals(self.dirty_intervals)
+        self.dirty_intervals = []
+        return dirty_intervals
 
     def update_after_explosion(self, explosion_point, explosion_radius):
+        """
+        Carves explosion crater out of the ground
+        :param explosion_point: coordinates of explosion point
+        :param explosion_radius: radius of explosion
+        :return: list of floating ground pieces [[x, bottom_y], [x, top_y]] left above the crater
+        """
+        return self.update_after_explosions([(explosion_point, explosion_radius)])
+
+    def update_after_explosions(self, craters):
+        """
+        Carves craters of simultaneous explosions, overlapping craters are carved together in one pass
+        :param craters: list of ((x, y), radius) pairs
+        :return: list of floating ground pieces [[x, bottom_y], [x, top_y]] left above the craters
+        """
+        left_ground = []
+        for group in overlapping_groups(craters):
+            left_ground.extend(self.carve_craters(group))
+        return left_ground
+
+    def carve_craters(self, craters):
+        """
+        Carves union of overlapping craters out of the ground
+        :param craters: list of ((x, y), radius) pairs
+        :return: list of floating ground pieces [[x, bottom_y], [x, top_y]] left above the craters
+        """
+        max_left = max(0, min(int(point[0]) - radius for point, radius in craters))
+        max_right = min(self.width, max(int(point[0]) + radius for point, radius in craters))
+        if max_left >= max_right:
+            return []
+        self.ensure_generated(max_left - 1, max_right + 1)
+
+        uppers = np.full((len(craters), max_right - max_left), empty_crater, dtype=np.int32)
+        lowers = np.full((len(craters), max_right - max_left), empty_crater, dtype=np.int32)
+        for index, (point, radius) in enumerate(craters):
+            center_x, center_y = int(point[0]), int(point[1])
+            left, right = max(max_left, center_x - radius), min(max_right, center_x + radius)
+            if left >= right:
+                continue
+            stencil_start = left - (center_x - radius)
+            half_heights = crater_stencil(radius)[stencil_start:stencil_start + right - left]
+            uppers[index, left - max_left:right - max_left] = center_y - half_heights
+            lowers[index, left - max_left:right - max_left] = np.minimum(center_y + half_heights, display_height)
+        layers = merge_crater_layers(uppers, lowers)
+        if self.overhangs:
+            return self.carve_spans(max_left, layers)
+
+        heights = self.heights[max_left:max_right]
         left_ground = []
-        explosion_circle = Point(explosion_point).buffer(explosion_radius).boundary
-        max_left = max(0, explosion_point[0]-explosion_radius)
-        max_right = min(display_width, explosion_point[0]+explosion_radius)
-        for i in range(max_left, max_right):
-            ground_line = LineString([[i, display_height], self.points[i]])
-            intersection = explosion_circle.intersection(ground_line)
-            if explosion_point[1] + explosion_radius > display_height:
-                left_start = explosion_point[1] - explosion_radius
-                if self.points[i][1] < left_start:
-                    left_ground.append([[i, left_start], [i, self.points[i][1]]])
-                    self.points[i][1] = display_height
-                else:
-                    self.points[i][1] = display_height
-            elif isinstance(intersection, MultiPoint):
-                first_point = intersection.geoms[0]
-                second_point = intersection.geoms[1]
-                fst_coordinate = i, min(int(first_point.coords[0][1]), int(second_point.coords[0][1]))
-                snd_coordinate = i, max(int(first_point.coords[0][1]), int(second_point.coords[0][1]))
-
-                left_length = fst_coordinate[1] - self.points[i][1]
-                if left_length > 0:
-                    left_ground.append([[i, fst_coordinate[1]], [i, self.points[i][1]]])
-                self.points[i][1] = snd_coordinate[1]
-            elif isinstance(intersection, Point):
-                if not explosion_circle.contains(intersection):
-                    self.points[i][1] = int(intersection.coords[0][1])
+        for upper, lower in layers:
+            hit = (heights < lower) & (upper < lower)
+            floating = np.nonzero(hit & (heights < upper))[0]
+            left_ground.extend([[[max_left + index, top], [max_left + index, height]]
+                                for index, top, height in zip(floating.tolist(),
+                                                              upper[floating].tolist(),
+                                                              heights[floating].tolist())])
+            heights[hit] = lower[hit]
+        self.mark_changed(max_left, max_right)
 
         return left_ground
 
-    def draw_temp_after_explosion(self, explosion_point, explosion_radius):
-        pygame.draw.circle(self.game_display, black, explosion_point, explosion_radius)
+    def carve_spans(self, first_column, layers):
+        """
+        Carves craters out of the ground, leaving overhangs and tunnels where the ground is still supported
+        :param first_column: first column of the craters
+        :param layers: list of (upper, lower) arrays of crater bounds in each column, sorted from the top
+        :return: list of unsupported ground pieces [[x, bottom_y], [x, top_y]]
+        """
+        last_column = first_column + len(layers[0][0])
+        heights = self.heights[first_column:last_column]
+        caves = np.zeros(last_column - first_column, dtype=bool)
+        for column in self.spans:
+            if first_column <= column < last_column:
+                caves[column - first_column] = True
 
-    def update_after_sloughing(self, left_ground):
-        for line in left_ground:
-            length = line[0][1] - line[1][1]
-            self.points[line[0][0]][1] -= length
+        for upper, lower in layers:
+            hit = (heights < lower) & (upper < lower)
+            from_surface = hit & ~caves & (upper <= heights)
+            heights[from_surface] = lower[from_surface]
+            for index in np.nonzero(hit & ~from_surface)[0].tolist():
+                column = first_column + index
+                self.set_column_spans(column, subtract_span(self.get_column_spans(column),
+                                                            int(upper[index]), int(lower[index])))
+                caves[index] = column in self.spans
+
+        left_ground = []
+        changed_left, changed_right = first_column - 1, last_column + 1
+        for column, top, bottom in self.unsupported_spans(first_column - 1, last_column + 1):
+            self.set_column_spans(column, subtract_span(self.get_column_spans(column), top, bottom))
+            left_ground.append([[column, bottom], [column, top]])
+            changed_left, changed_right = min(changed_left, column), max(changed_right, column + 1)
+        self.mark_changed(changed_left, changed_right)
+
+        return left_ground
 
+    def unsupported_spans(self, left, right):
+        """
+        Finds ground spans hanging over air which are not connected to ground reaching the bottom of the world. Spans
+        are connected when they overlap in neighbouring columns, connected spans fall together
+        :param left: first column with changed spans
+        :param right: column after the last one with changed spans
+        :return: sorted list of (x, top, bottom) unsupported spans, possibly reaching past the changed columns
+        """
+        supported, unsupported = set(), set()
+        for column in range(max(left, 0), min(right, self.width)):
+            spans = self.spans.get(column, [])
+            for index in range(0, len(spans), 2):
+                start = (column, spans[index], spans[index + 1])
+                if start[2] >= display_height or start in supported or start in unsupported:
+                    continue
+                # flood fill over overlapping spans, stopped as soon as it reaches supported ground
+                piece, queue, grounded = {start}, deque([start]), False
+                while queue and not grounded:
+                    x_coord, top, bottom = queue.popleft()
+                    for neighbour in (x_coord - 1, x_coord + 1):
+                        if not 0 <= neighbour < self.width:
+                            continue
+                        neighbour_spans = self.get_column_spans(neighbour)
+                        for span in zip([neighbour] * len(neighbour_spans), neighbour_spans[::2],
+                                        neighbour_spans[1::2]):
+                            if span[1] >= bottom or span[2] <= top:
+                                continue
+                            if span[2] >= display_height or span in supported:
+                                grounded = True
+                                break
+                            if span not in piece:
+                                piece.add(span)
+                                queue.append(span)
+                        if grounded:
+                            break
+                (supported if grounded else unsupported).update(piece)
+        return sorted(unsupported)
+
+    def explosion_exposure(self, explosion_point, targets, samples=occlusion_samples):
+        """
+        Samples the ground along rays from explosion to all targets at once
+        :param explosion_point: coordinates of explosion point
+        :param targets: array of (x, y) target coordinates
+        :param samples: number of samples along each ray
+        :return: array of fractions of ray samples not inside the ground, 1 for targets in plain sight
+        """
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+        if len(targets) == 0:
+            return np.ones(0)
+        fractions = (np.arange(samples) + 0.5) / samples
+        xs = explosion_point[0] + (targets[:, 0:1] - explosion_point[0]) * fractions
+        ys = explosion_point[1] + (targets[:, 1:2] - explosion_point[1]) * fractions
+        columns = xs.astype(np.int64)
+        inside = (columns >= 0) & (columns < self.width)
+        columns = np.clip(columns, 0, self.width - 1)
+        self.ensure_generated(int(columns.min()), int(columns.max()) + 1)
+        blocked = inside & (ys >= self.heights[columns])
+        if self.spans:
+            for target, sample in zip(*np.nonzero(blocked)):
+                column = int(columns[target, sample])
+                if column in self.spans:
+                    blocked[target, sample] = is_solid(self.spans[column], ys[target, sample])
+        return 1 - blocked.mean(axis=1)
+
+    def solve_sloughing(self, left_ground):
+        """
+        Computes where falling ground pieces come to rest
+        :param left_ground: list of ground pieces [[x, bottom_y], [x, top_y]]
+        :return: SloughingSolution object
+        """
+        return solve_sloughing(self, left_ground)
+
+    def update_after_sloughing(self, left_ground):
+        """
+        Puts fallen ground pieces on top of the ground below them
+        :param left_ground: list of ground pieces [[x, bottom_y], [x, top_y]]
+        :return: none
+        """
+        if not left_ground:
+            return
+        solution = self.solve_sloughing(left_ground)
+        lengths = solution.bottoms - solution.tops
+        in_spans = np.array([column in self.spans for column in solution.columns.tolist()], dtype=bool)
+        np.subtract.at(self.heights, solution.columns[~in_spans], lengths[~in_spans].astype(np.int32))
+        for piece in np.nonzero(in_spans)[0].tolist():
+            column, rest_bottom = int(solution.columns[piece]), int(solution.rest_bottoms[piece])
+            self.set_column_spans(column, insert_span(self.get_column_spans(column),
+                                                      rest_bottom - int(lengths[piece]), rest_bottom))
+        self.mark_changed(int(solution.columns.min()), int(solution.columns.max()) + 1)
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class HeightmapIndex:
+    """
+    Class which represents min-height and max-height pyramids over the ground heightmap. Screen y grows downwards, so
+    the minimum of a column range is the highest ground point in it
+    """
+    def __init__(self, heights):
+        """
+        Initialize index
+        :param heights: heightmap array, one surface height per column
+        """
+        self.heights = heights
+        self.levels = []
+        self.max_levels = []
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Builds whole pyramid from the heightmap
+        :return: none
+        """
+        size = 1
+        while size < len(self.heights):
+            size *= 2
+        base = np.full(size, np.iinfo(np.int32).max, dtype=np.int32)
+        base[:len(self.heights)] = self.heights
+        self.levels = [base]
+        while len(self.levels[-1]) > 1:
+            previous = self.levels[-1]
+            self.levels.append(np.minimum(previous[0::2], previous[1::2]))
+        base = np.full(size, np.iinfo(np.int32).min, dtype=np.int32)
+        base[:len(self.heights)] = self.heights
+        self.max_levels = [base]
+        while len(self.max_levels[-1]) > 1:
+            previous = self.max_levels[-1]
+            self.max_levels.append(np.maximum(previous[0::2], previous[1::2]))
+
+    def update(self, left, right):
+        """
+        Updates pyramid after heights in columns [left, right) have changed
+        :param left: first changed column
+        :param right: column after last changed one
+        :return: none
+        """
+        left = max(left, 0)
+        right = min(right, len(self.heights))
+        if left >= right:
+            return
+        self.levels[0][left:right] = self.heights[left:right]
+        self.max_levels[0][left:right] = self.heights[left:right]
+        for level in range(1, len(self.levels)):
+            left //= 2
+            right = (right + 1) // 2
+            previous = self.levels[level - 1]
+            self.levels[level][left:right] = np.minimum(previous[2 * left:2 * right:2],
+                                                        previous[2 * left + 1:2 * right:2])
+            previous = self.max_levels[level - 1]
+            self.max_levels[level][left:right] = np.maximum(previous[2 * left:2 * right:2],
+                                                            previous[2 * left + 1:2 * right:2])
+
+    @staticmethod
+    def range_query(levels, left, right, function, initial):
+        """
+        Combines pyramid values of columns [left, right) in O(log n)
+        :param levels: pyramid levels
+        :param left: first column
+        :param right: column after the last one
+        :param function: function combining two values
+        :param initial: value returned for empty range
+        :return: combined value
+        """
+        result = initial
+        for level in levels:
+            if left >= right:
+                break
+            if left & 1:
+                result = function(result, int(level[left]))
+                left += 1
+            if right & 1:
+                right -= 1
+                result = function(result, int(level[right]))
+            left //= 2
+            right //= 2
+        return result
+
+    def range_min(self, left, right):
+        """
+        Returns minimal height, so the highest ground point, in columns [left, right)
+        :param left: first column
+        :param right: column after the last one
+        :return: minimal height or None for empty range
+        """
+        left, right = max(left, 0), min(right, len(self.heights))
+        return self.range_query(self.levels, left, right, min, None if left >= right else np.iinfo(np.int32).max)
+
+    def range_max(self, left, right):
+        """
+        Returns maximal height, so the lowest ground point, in columns [left, right)
+        :param left: first column
+        :param right: column after the last one
+        :return: maximal height or None for empty range
+        """
+        left, right = max(left, 0), min(right, len(self.heights))
+        return self.range_query(self.max_levels, left, right, max, None if left >= right else np.iinfo(np.int32).min)
@@ -0,0 +1,138 @@
+import pygame
+from colorsys import hsv_to_rgb
+from math import ceil
+from game_core.constants import *
+
+
+def is_classic_layout(players_number, tanks_number):
+    """
+    Tells if health bars keep classic corners of the display
+    :param players_number: number of players in the game
+    :param tanks_number: number of tanks of each player
+    :return: flag True/False
+    """
+    return players_number <= len(health_bar_init_positions) and \
+        tanks_number * (health_bar_length + 10) <= display_width // 2
+
+
+def health_bars_layout(player_number, players_number, tanks_number):
+    """
+    Returns health bars rectangles of player's tanks. Up to four players with a few tanks keep classic corners of
+    the display, more players share a grid of cells at the top of the display and bars shrink to fit the cells
+    :param player_number: number of the player, starting from 0
+    :param players_number: number of players in the game
+    :param tanks_number: number of tanks of each player
+    :return: list of (x, y, width, height) tuples, one per tank
+    """
+    if is_classic_layout(players_number, tanks_number):
+        x, y = health_bar_init_positions[player_number]
+        return [(x + (health_bar_length + 10) * i * (-1) ** player_number, y, health_bar_length, health_bar_height)
+                for i in range(tanks_number)]
+
+    columns = min(players_number, max(display_width // hud_min_cell_width, 1))
+    rows = ceil(players_number / columns)
+    cell_width, row_height = display_width // columns, min(hud_height // rows, health_bar_height + 10)
+    gap = 2 if tanks_number > 1 else 0
+    width = max(min(health_bar_length, (cell_width - 10) // tanks_number - gap), 1)
+    height = max(row_height - 4, 2)
+    x = (player_number % columns) * cell_width + 5
+    y = (player_number // columns) * row_height + 2
+    return [(x + (width + gap) * i, y, width, height) for i in range(tanks_number)]
+
+
+def players_colors(players_number):
+    """
+    Returns distinct colors for players, classic colors go first and further ones are spread over hues
+    :param players_number: number of players in the game
+    :return: list of colors
+    """
+    colors = player_colors[:players_number]
+    for index in range(players_number - len(colors)):
+        # golden ratio steps keep consecutive hues far apart
+        red_part, green_part, blue_part = hsv_to_rgb((index * 0.618034) % 1, 0.8 - 0.3 * (index % 2), 0.95)
+        colors.append((int(red_part * 255), int(green_part * 255), int(blue_part * 255)))
+    return colors
+
+
+class Hud:
+    """
+    Class which represents HUD layer, health bars and power readout kept on their own transparent surface. Widgets
+    are re-rendered only when their values change and the layer is composited onto the display with one blit
+    """
+    def __init__(self, players_number, tanks_number):
+        """
+        Initialize HUD layer
+        :param players_number: number of players in the game
+        :param tanks_number: number of tanks of each player
+        """
+        # power readout goes below the grid of health bars when the grid takes the top of the display
+        self.power_y = 10 if is_classic_layout(players_number, tanks_number) else hud_height + 5
+        self.surface = pygame.Surface((display_width, self.power_y + 40), pygame.SRCALPHA)
+        self.health_bars = {}
+        self.power = None
+        self.power_rect = None
+
+    def clear(self, rect):
+        """
+        Makes part of the layer transparent again
+        :param rect: pygame Rect to clear
+        :return: none
+        """
+        self.surface.fill((0, 0, 0, 0), rect)
+
+    def update_health_bars(self, tanks, active_tank=None):
+        """
+        Re-renders health bars whose tank health changed, bars of tanks no longer in game are removed
+        :param tanks: list of tanks in game
+        :param active_tank: tank which health bar is shown white, none if None
+        :return: list of pygame Rects which changed
+        """
+        changed = []
+        left_tanks = set(tanks)
+        for tank in [tank for tank in self.health_bars if tank not in left_tanks]:
+            rect = self.health_bars.pop(tank)[1]
+            self.clear(rect)
+            changed.append(rect)
+        for tank in tanks:
+            state = (tank.tank_health, tank is active_tank)
+            if tank in self.health_bars and self.health_bars[tank][0] == state:
+                continue
+            rect = tank.get_health_bar_rect()
+            tank.draw_health_bar(state[1], self.surface)
+            self.health_bars[tank] = (state, rect)
+            changed.append(rect)
+        return changed
+
+    def update_power(self, tank=None):
+        """
+        Re-renders power readout if power or weapon changed
+        :param tank: tank which power is shown, readout is removed if None
+        :return: list of pygame Rects which changed
+        """
+        power = (tank.tank_power, tank.weapon) if tank is not None else None
+        if power == self.power:
+            return []
+        changed = []
+        if self.power_rect is not None:
+            self.clear(self.power_rect)
+            changed.append(self.power_rect)
+            self.power_rect = None
+        if tank is not None:
+            self.power_rect = tank.show_tanks_power(self.surface, self.power_y)
+            changed.append(self.power_rect)
+        self.power = power
+        return changed
+
+    def draw(self, game_display, rects=None):
+        """
+        Composites the layer onto the display. Semi-transparent pixels darken what they cover each time, so the layer
+        may be composited only onto freshly drawn parts of the display
+        :param game_display: PyGame display
+        :param rects: list of pygame Rects of freshly drawn display parts, whole layer is composited if None
+        :return: list of pygame Rects covered by the layer
+        """
+        if rects is None:
+            return [game_display.blit(self.surface, (0, 0))]
+        bounds = self.surface.get_rect()
+        return [game_display.blit(self.surface, area.topleft, area)
+                for area in (bounds.clip(rect) for rect in rects) if area.width and area.height]
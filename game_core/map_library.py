@@ -0,0 +1,182 @@
+import os
+import re
+import mmap
+import struct
+import numpy as np
+from game_core.constants import *
+
+# map file layout, all values little-endian:
+# header (magic, version, width, height, seed, spawn slots number, name length, algorithm length),
+# name and algorithm as utf-8, heights as int16 per column, spawn slots as int32 x coordinates
+map_magic = b'PSEM'
+map_version = 1
+map_header = struct.Struct('<4sHIHqHHH')
+map_extension = '.psem'
+
+
+def map_key(name):
+    """
+    Returns name of the map as used in library index and file names
+    :param name: name of the map
+    :return: name with characters other than letters, digits and underscores replaced
+    """
+    return re.sub(r'[^A-Za-z0-9_]', '_', name)
+
+
+def map_file_name(name, seed):
+    """
+    Returns file name of the map, name and seed are kept in it so library can be indexed without opening files
+    :param name: name of the map
+    :param seed: seed of the map
+    :return: file name
+    """
+    return '{}-{}{}'.format(seed, map_key(name), map_extension)
+
+
+def save_map(path, heights, spawn_slots=(), name='', seed=0, algorithm=''):
+    """
+    Saves map to binary file, the file is replaced at once so that mappings of the old one stay valid
+    :param path: path of the file
+    :param heights: heightmap array, one surface height per column
+    :param spawn_slots: x coordinates where tanks may be placed
+    :param name: name of the map
+    :param seed: seed the map was generated from
+    :param algorithm: name of the algorithm the map was generated with
+    :return: none
+    """
+    name_bytes, algorithm_bytes = name.encode('utf-8'), algorithm.encode('utf-8')
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as map_file:
+        map_file.write(map_header.pack(map_magic, map_version, len(heights), display_height, seed,
+                                       len(spawn_slots), len(name_bytes), len(algorithm_bytes)))
+        map_file.write(name_bytes)
+        map_file.write(algorithm_bytes)
+        map_file.write(np.asarray(heights, dtype='<i2').tobytes())
+        map_file.write(np.asarray(spawn_slots, dtype='<i4').tobytes())
+    os.replace(temporary_path, path)
+
+
+class MapFile:
+    """
+    Class which represents memory mapped map file, heights and spawn slots are read straight from the mapping
+    """
+    def __init__(self, path):
+        """
+        Opens map file
+        :param path: path of the file
+        """
+        with open(path, 'rb') as map_file:
+            self.buffer = mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.width, self.height, self.seed, spawns_number, name_length,
+         algorithm_length) = map_header.unpack_from(self.buffer)
+        if magic != map_magic or version > map_version:
+            self.buffer.close()
+            raise ValueError('{} is not a supported map file'.format(path))
+        offset = map_header.size
+        self.name = self.buffer[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+        self.algorithm = self.buffer[offset:offset + algorithm_length].decode('utf-8')
+        offset += algorithm_length
+        self.heights = np.frombuffer(self.buffer, dtype='<i2', count=self.width, offset=offset)
+        offset += 2 * self.width
+        self.spawn_slots = np.frombuffer(self.buffer, dtype='<i4', count=spawns_number, offset=offset)
+
+    def close(self):
+        """
+        Closes the mapping, views of it are dropped first. Mapping viewed from elsewhere is left open and released
+        when the last view is gone
+        :return: none
+        """
+        self.heights = None
+        self.spawn_slots = None
+        try:
+            self.buffer.close()
+        except BufferError:
+            pass
+
+
+class MapLibrary:
+    """
+    Class which represents directory of map files indexed by name and seed
+    """
+    def __init__(self, directory=maps_directory):
+        """
+        Initialize library
+        :param directory: directory with map files
+        """
+        self.directory = directory
+        self.by_name = {}
+        self.by_seed = {}
+        self.opened = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rebuilds index from file names, files themselves are not read. Of files with the same name or seed the most
+        recently saved one is indexed
+        :return: none
+        """
+        self.by_name, self.by_seed = {}, {}
+        if not os.path.isdir(self.directory):
+            return
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(map_extension)]
+        for entry in sorted(entries, key=lambda entry: (entry.stat().st_mtime_ns, entry.name)):
+            seed, _, name = entry.name[:-len(map_extension)].partition('-')
+            self.by_name[name] = entry.path
+            if seed.isdigit():
+                self.by_seed[int(seed)] = entry.path
+
+    def names(self):
+        """
+        Returns names of all maps in library
+        :return: sorted list of names
+        """
+        return sorted(self.by_name)
+
+    def open(self, name=None, seed=None):
+        """
+        Opens map by name or seed, opened maps stay mapped
+        :param name: name of the map
+        :param seed: seed of the map, used if name is None
+        :return: MapFile object
+        """
+        path = self.by_name[map_key(name)] if name is not None else self.by_seed[seed]
+        if path not in self.opened:
+            self.opened[path] = MapFile(path)
+        return self.opened[path]
+
+    def add(self, name, heights, spawn_slots=(), seed=0, algorithm=''):
+        """
+        Saves new map to library, file of the map saved earlier under the same name with other seed is removed
+        :param name: name of the map
+        :param heights: heightmap array
+        :param spawn_slots: x coordinates where tanks may be placed
+        :param seed: seed the map was generated from
+        :param algorithm: name of the algorithm the map was generated with
+        :return: path of the saved file
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, map_file_name(name, seed))
+        # heights may be a view of the very file being replaced
+        heights, spawn_slots = np.array(heights), np.array(spawn_slots)
+        save_map(path, heights, spawn_slots, name, seed, algorithm)
+        if path in self.opened:
+            self.opened.pop(path).close()
+        self.remove(self.by_name.get(map_key(name)), path)
+        self.by_name[map_key(name)] = path
+        self.by_seed[seed] = path
+        return path
+
+    def remove(self, path, kept_path):
+        """
+        Removes map file from library and directory, its mapping stays valid until closed
+        :param path: path of the file, nothing is removed if None or the same as kept_path
+        :param kept_path: path of the file which replaces it
+        :return: none
+        """
+        if path is None or path == kept_path:
+            return
+        if os.path.exists(path):
+            os.remove(path)
+        self.opened.pop(path, None)
+        self.by_seed = {seed: seed_path for seed, seed_path in self.by_seed.items() if seed_path != path}
@@ -1,59 +1,61 @@
-from random import randrange
 from game_core.constants import *
+from game_core.spawn_allocator import SpawnAllocator
 from game_core.tank import Tank
+from game_core.ground import intervals_overlap
+from game_core.turn_ring import TurnRing
+from game_core.hud import health_bars_layout
 
 
 class Player:
     """
     Class which represents player object in game
     """
-    def __init__(self, game_display, number_of_tanks, color, player_number):
+    def __init__(self, game_display, number_of_tanks, color, player_number, camera=None, tank_index=None,
+                 players_number=None, computer_level=None):
         """
         Initialize player
         :param game_display: main game screen
         :param number_of_tanks: initial number of tanks
         :param color: player's color
         :param player_number: players number, relevant in choosing health bar positions
+        :param camera: Camera object shared by player's tanks
+        :param tank_index: TankIndex object shared by all tanks in the game
+        :param players_number: number of players in the game, relevant in choosing health bar positions
+        :param computer_level: name of level from computer_levels if the game plays for the player, None otherwise
         """
         self.number_of_tanks = number_of_tanks
         self.color = color
         self.player_number = player_number
-        self.health_bars_pos = health_bar_init_positions[player_number]
+        self.health_bars = health_bars_layout(player_number, players_number or player_number + 1, number_of_tanks)
         self.active_tanks = []
         self.game_display = game_display
-        self.next_tank = None
+        self.tank_turns = TurnRing()
         self.in_game = False
+        self.camera = camera
+        self.tank_index = tank_index
+        self.computer_level = computer_level
 
-    def initialize_tanks(self, actual_tanks_positions, ground):
+    def initialize_tanks(self, actual_tanks_positions, ground, allocator=None):
         """
         Reinitialize available tanks in the game of specified player
+        :param actual_tanks_positions: positions of already placed tanks, new ones are appended
+        :param ground: ground object handle
+        :param allocator: SpawnAllocator object shared by all players, new one is made if None
         :return: none
         """
         self.active_tanks = []
-        tab = 5+int(tank_width/2)
-        # initialize possible health bar positions
-        health_bar_positions = [(self.health_bars_pos[0] + (health_bar_length+10)*i*(-1)**self.player_number,
-                                 self.health_bars_pos[1])
-                                for i in range(self.number_of_tanks)]
+        if allocator is None:
+            allocator = SpawnAllocator(ground.width, self.number_of_tanks, [tank[0] for tank in actual_tanks_positions])
         for i in range(self.number_of_tanks):
-            generate = True
-            while generate:
-                tank_pos_x = randrange(tab, display_width-tab)
-                good_choice = True
-                for tank in actual_tanks_positions:
-                    if abs(tank_pos_x - tank[0]) < tank_width+10:
-                        good_choice = False
-                        break
-                if good_choice:
-                    ground_height = self.define_optimal_height(tank_pos_x, ground)
-                    initial_y_coord = ground_height - full_tank_height
-                    self.active_tanks.append(
-                        Tank(self.game_display, (tank_pos_x, initial_y_coord), health_bar_positions[i], self.color))
-                    ground.correct_heights((tank_pos_x-int(tank_width/2), tank_pos_x+int(tank_width/2)),
-                                           ground_height)
-                    actual_tanks_positions.append((tank_pos_x, initial_y_coord))
-                    generate = False
-        self.next_tank = self.active_tanks[0]
+            tank_pos_x = allocator.allocate(ground, ground.spawn_slots)
+            ground_height = self.define_optimal_height(tank_pos_x, ground)
+            initial_y_coord = ground_height - full_tank_height
+            self.active_tanks.append(
+                Tank(self.game_display, (tank_pos_x, initial_y_coord), self.health_bars[i][:2], self.color,
+                     self.camera, self.tank_index, self.health_bars[i][2:]))
+            ground.correct_heights((tank_pos_x-int(tank_width/2), tank_pos_x+int(tank_width/2)), ground_height)
+            actual_tanks_positions.append((tank_pos_x, initial_y_coord))
+        self.tank_turns = TurnRing(self.active_tanks)
         self.in_game = True
 
     def define_optimal_height(self, x_coord, ground):
@@ -63,19 +65,15 @@ class Player:
         :param ground: ground object handle
         :return: optimal height
         """
-        ground_heights = []
-        for index in range(x_coord - int(tank_width / 2), x_coord + int(tank_width / 2)):
-            ground_heights.append(ground.get_ground_height_at_point(index))
-        return int(sum(ground_heights)/len(ground_heights))
+        return ground.window_average(x_coord - int(tank_width / 2), x_coord + int(tank_width / 2))
 
-    def draw_tanks_and_bars(self):
+    def draw_tanks(self):
         """
-        Draw all active tanks and their health bars
+        Draw all active tanks, their health bars are kept by the HUD
         :return: none
         """
         for tank in self.active_tanks:
             tank.draw_tank()
-            tank.draw_health_bar()
 
     def update_tanks_list(self):
         """
@@ -88,59 +86,31 @@ class Player:
             if tank.get_tank_health() > 0:
                 left_tanks.append(tank)
             else:
+                if self.tank_index is not None:
+                    self.tank_index.remove(tank)
+                self.tank_turns.remove(tank)
                 tank.self_destruct()
 
+        self.active_tanks = left_tanks
         if len(left_tanks) == 0:
-            self.next_tank = None
             self.in_game = False
-            self.active_tanks = []
-        else:
-            if self.next_tank not in left_tanks:
-                while True:
-                    self.next_tank = \
-                        self.active_tanks[(self.active_tanks.index(self.next_tank) + 1) % len(self.active_tanks)]
-                    if self.next_tank in left_tanks:
-                        break
-
-            self.active_tanks = left_tanks
-
-    def check_collision_with_tanks(self, line):
-        """
-        Checks if collision took place with any of the player's tanks
-        :param line: last line of shell trajectory
-        :return: collision point as tuple if collision took place, None otherwise
-        """
-        for tank in self.active_tanks:
-            intersection = tank.check_collision_with_tank(line)
-            if intersection:
-                return intersection
-        return None
-
-    def apply_damage(self, collision_point, shell_power, shell_radius):
-        """
-        Applies if necessary any damage to each tank of the player
-        :param collision_point: coordinates of collision/eplosion
-        :param shell_power: power of explosion
-        :param shell_radius: radius of explosion
-        :return: returns coordinates of destroyed tanks, so that tanks exposions could be applied
-        """
-        destructed_tanks = []
-        for tank in self.active_tanks:
-            if tank.apply_damage(collision_point, shell_power, shell_radius):
-                destructed_tanks.append(tank.get_tank_position())
-        self.update_tanks_list()
-        return destructed_tanks
 
     def next_active_tank(self):
         """
         Get active tank and setup next one
         :return: player's active tank
         """
-        ret_tank = self.next_tank
-        if ret_tank:
-            self.next_tank = self.active_tanks[(self.active_tanks.index(self.next_tank) + 1) % len(self.active_tanks)]
+        ret_tank = self.tank_turns.current
+        self.tank_turns.advance()
         return ret_tank
 
+    def is_computer(self):
+        """
+        Tells if the game plays for the player
+        :return: flag True/False
+        """
+        return self.computer_level is not None
+
     def is_in_game(self):
         """
         Tells if the player is still in game
@@ -148,14 +118,19 @@ class Player:
         """
         return self.in_game
 
-    def correct_tanks_heights(self, ground):
+    def correct_tanks_heights(self, ground, intervals=None):
         """
-        Correct all tanks heights
+        Correct heights of tanks standing on changed ground
         :param ground: ground object
+        :param intervals: sorted list of disjoint (left, right) intervals of changed columns, all tanks if None
         :return: none
         """
+        half_width = int(tank_width/2)
         for tank in self.active_tanks:
             tank_pos_x = tank.get_tank_position()[0]
+            if intervals is not None and not intervals_overlap(intervals, tank_pos_x - half_width,
+                                                               tank_pos_x + half_width):
+                continue
             opt_height = self.define_optimal_height(tank.get_tank_position()[0], ground)
             new_height = opt_height - full_tank_height
             tank.animate_tank_fall(new_height)
@@ -0,0 +1,302 @@
+import numpy as np
+from math import inf
+from game_core.constants import *
+from game_core.trajectory import batch_flight_impacts, batch_end_times
+
+# states of projectiles
+FLYING, ROLLING, DIGGING = range(3)
+
+
+class Projectiles:
+    """
+    Class which represents all live projectiles, kept in parallel arrays, one entry per projectile, and advanced
+    together. Flights are solved in closed form when projectiles are launched and again only after ground changes
+    """
+    fields = ('weapons', 'states', 'launched', 'xs', 'ys', 'velocities_x', 'velocities_y', 'splits', 'split_times',
+              'ends', 'lands', 'on_tanks', 'impacts_x', 'impacts_y', 'travelled')
+
+    def __init__(self, ground, tank_index=None, pixel_accurate=False):
+        """
+        Initialize projectiles, none is live
+        :param ground: Ground object
+        :param tank_index: TankIndex object with tanks which may be hit, only ground is hit if None
+        :param pixel_accurate: flag if drawn pixels of tanks are hit by flying projectiles instead of tank body boxes
+        """
+        self.ground = ground
+        self.tank_index = tank_index
+        self.pixel_accurate = pixel_accurate
+        self.time = 0.0
+        self.version = ground.version
+        # index of weapon in weapons and state of projectile
+        self.weapons = np.zeros(0, dtype=np.int64)
+        self.states = np.zeros(0, dtype=np.int64)
+        # flying projectiles are at (x, y) with velocity (velocity_x, velocity_y) at launch time, rolling and digging
+        # ones are at (x, y) now and move by (velocity_x, velocity_y) pixels in a flight time unit
+        self.launched = np.zeros(0)
+        self.xs = np.zeros(0)
+        self.ys = np.zeros(0)
+        self.velocities_x = np.zeros(0)
+        self.velocities_y = np.zeros(0)
+        # MIRVs which split at the top of their flight, before they land
+        self.splits = np.zeros(0, dtype=bool)
+        self.split_times = np.zeros(0)
+        # flights end at impacts, if they land, or when projectiles leave the world
+        self.ends = np.zeros(0)
+        self.lands = np.zeros(0, dtype=bool)
+        self.on_tanks = np.zeros(0, dtype=bool)
+        self.impacts_x = np.zeros(0)
+        self.impacts_y = np.zeros(0)
+        # pixels rolled or dug
+        self.travelled = np.zeros(0)
+
+    def __len__(self):
+        return len(self.states)
+
+    def launch(self, starts, velocities, weapon, time=None):
+        """
+        Launches projectiles, their flights are solved at once
+        :param starts: array of (x, y) launch points
+        :param velocities: array of (x, y) launch velocities
+        :param weapon: name of weapon from weapons
+        :param time: launch time, current time if None
+        :return: none
+        """
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        velocities = np.asarray(velocities, dtype=np.float64).reshape(-1, 2)
+        first = len(self)
+        self.append(weapons=weapons.index(weapon), states=FLYING, launched=self.time if time is None else time,
+                    xs=starts[:, 0], ys=starts[:, 1], velocities_x=velocities[:, 0], velocities_y=velocities[:, 1],
+                    splits=weapon == 'mirv')
+        self.solve_flights(np.arange(first, len(self)))
+
+    def append(self, **values):
+        """
+        Appends projectiles, fields without value are zeros
+        :param values: arrays of new projectiles' fields, or one value of all of them, the number of projectiles is
+        taken from xs
+        :return: none
+        """
+        number = len(values['xs'])
+        for name in self.fields:
+            column = getattr(self, name)
+            added = np.broadcast_to(np.asarray(values.get(name, 0), dtype=column.dtype), number)
+            setattr(self, name, np.concatenate((column, added)))
+
+    def keep(self, kept):
+        """
+        Removes projectiles
+        :param kept: boolean array, False for removed projectiles
+        :return: none
+        """
+        for name in self.fields:
+            setattr(self, name, getattr(self, name)[kept])
+
+    def solve_flights(self, flights):
+        """
+        Solves flights of projectiles from their launch
+        :param flights: array of indices of flying projectiles
+        :return: none
+        """
+        if len(flights) == 0:
+            return
+        shots = (self.xs[flights], self.ys[flights], self.velocities_x[flights], self.velocities_y[flights])
+        impacts = batch_flight_impacts(shots, self.ground, self.tank_index, self.pixel_accurate)
+        lands = np.isfinite(impacts.times)
+        self.lands[flights] = lands
+        self.on_tanks[flights] = impacts.tanks.astype(bool)
+        self.ends[flights] = self.launched[flights] + np.where(lands, impacts.times,
+                                                               batch_end_times(shots, self.ground.width))
+        self.impacts_x[flights], self.impacts_y[flights] = impacts.points[:, 0], impacts.points[:, 1]
+        rising = self.splits[flights] & (shots[3] < 0)
+        self.split_times[flights] = np.where(rising, self.launched[flights] - shots[3] / shell_gravity, inf)
+        self.version = self.ground.version
+
+    def rebase_flights(self):
+        """
+        Moves launch of flying projectiles to current time and solves their flights again, as ground has changed
+        :return: none
+        """
+        flights = np.flatnonzero(self.states == FLYING)
+        times = self.time - self.launched[flights]
+        self.xs[flights] += self.velocities_x[flights] * times
+        self.ys[flights] += (self.velocities_y[flights] + shell_gravity * times / 2) * times
+        self.velocities_y[flights] += shell_gravity * times
+        self.launched[flights] = self.time
+        self.solve_flights(flights)
+        self.version = self.ground.version
+
+    def positions(self):
+        """
+        Returns current positions of projectiles
+        :return: array of (x, y) integer points
+        """
+        times = np.where(self.states == FLYING, self.time - self.launched, 0)
+        return np.stack((self.xs + self.velocities_x * times,
+                         self.ys + (self.velocities_y + shell_gravity * times / 2) * times), axis=1).astype(np.int64)
+
+    def advance(self, time_step):
+        """
+        Advances all projectiles together, MIRVs split, landed projectiles explode or start to roll or dig
+        :param time_step: flight time of the step
+        :return: (explosions, craters), list of ((x, y), power, radius) explosions and list of ((x, y), radius)
+        craters of whole tunnels of diggers which finished in this step
+        """
+        if self.version != self.ground.version:
+            self.rebase_flights()
+        self.time += time_step
+        self.split_mirvs()
+        exploded = np.zeros(len(self), dtype=bool)
+        gone = np.zeros(len(self), dtype=bool)
+        points = np.zeros((len(self), 2))
+        self.land_flights(exploded, gone, points)
+        self.roll(time_step, exploded, gone, points)
+        craters = self.dig(time_step, exploded, gone, points)
+        explosions = [((int(x), int(y)),) + weapon_explosions[weapons[weapon]]
+                      for (x, y), weapon in zip(points[exploded].tolist(), self.weapons[exploded].tolist())]
+        self.keep(~(exploded | gone))
+        return explosions, craters
+
+    def split_mirvs(self):
+        """
+        Replaces MIRVs at the top of their flights by their warheads
+        :return: none
+        """
+        splitting = (self.states == FLYING) & (self.split_times <= self.time) & (self.split_times < self.ends)
+        if not splitting.any():
+            return
+        times = self.split_times[splitting] - self.launched[splitting]
+        tops_x = self.xs[splitting] + self.velocities_x[splitting] * times
+        tops_y = self.ys[splitting] + self.velocities_y[splitting] * times / 2
+        spreads = mirv_spread * (np.arange(mirv_warheads) - (mirv_warheads - 1) / 2)
+        velocities_x = (self.velocities_x[splitting][:, np.newaxis] + spreads).ravel()
+        launched = np.repeat(self.split_times[splitting], mirv_warheads)
+        self.keep(~splitting)
+        first = len(self)
+        self.append(weapons=weapons.index('mirv'), states=FLYING, launched=launched,
+                    xs=np.repeat(tops_x, mirv_warheads), ys=np.repeat(tops_y, mirv_warheads),
+                    velocities_x=velocities_x, velocities_y=0.0)
+        self.solve_flights(np.arange(first, len(self)))
+
+    def land_flights(self, exploded, gone, points):
+        """
+        Ends flights which are over, projectiles which hit a tank or are not rollers or diggers explode
+        :param exploded: boolean array where exploding projectiles are marked
+        :param gone: boolean array where projectiles which left the world are marked
+        :param points: array where explosion points are stored
+        :return: none
+        """
+        over = (self.states == FLYING) & (self.ends <= self.time)
+        gone |= over & ~self.lands
+        landed = np.flatnonzero(over & self.lands)
+        if len(landed) == 0:
+            return
+        on_tanks = self.on_tanks[landed]
+        rollers = (self.weapons[landed] == weapons.index('roller')) & ~on_tanks
+        diggers = (self.weapons[landed] == weapons.index('digger')) & ~on_tanks
+        exploding = landed[~(rollers | diggers)]
+        exploded[exploding] = True
+        points[exploding] = np.stack((self.impacts_x[exploding], self.impacts_y[exploding]), axis=1)
+        # rollers go downhill, in the direction of flight on flat ground
+        rolling = landed[rollers]
+        columns = self.impacts_x[rolling].astype(np.int64)
+        heights = self.ground.heights
+        slopes = (heights[np.minimum(columns + tank_width // 2, self.ground.width - 1)] -
+                  heights[np.maximum(columns - tank_width // 2, 0)])
+        directions = np.where(slopes != 0, np.sign(slopes), np.sign(self.velocities_x[rolling]))
+        self.states[rolling] = ROLLING
+        self.velocities_x[rolling], self.velocities_y[rolling] = directions * roller_speed, 0.0
+        # diggers go on in the direction of flight
+        digging = landed[diggers]
+        times = self.ends[digging] - self.launched[digging]
+        velocities_x = self.velocities_x[digging]
+        velocities_y = self.velocities_y[digging] + shell_gravity * times
+        speeds = np.maximum(np.hypot(velocities_x, velocities_y), 1e-9)
+        self.states[digging] = DIGGING
+        self.velocities_x[digging] = velocities_x / speeds * digger_speed
+        self.velocities_y[digging] = velocities_y / speeds * digger_speed
+        moving = landed[rollers | diggers]
+        self.xs[moving], self.ys[moving] = self.impacts_x[moving], self.impacts_y[moving]
+
+    def roll(self, time_step, exploded, gone, points):
+        """
+        Rolls rollers along ground surface, they explode on a rise, on a tank or when they have rolled far enough
+        :param time_step: time of the step
+        :param exploded: boolean array where exploding projectiles are marked
+        :param gone: boolean array where projectiles which left the world are marked
+        :param points: array where explosion points are stored
+        :return: none
+        """
+        rolling = np.flatnonzero(self.states == ROLLING)
+        if len(rolling) == 0:
+            return
+        xs, ys = self.xs[rolling], self.ys[rolling]
+        new_xs = xs + self.velocities_x[rolling] * time_step
+        columns = new_xs.astype(np.int64)
+        outside = (columns < 0) | (columns >= self.ground.width)
+        surfaces = self.ground.heights[np.clip(columns, 0, self.ground.width - 1)].astype(np.float64)
+        blocked = ~outside & (surfaces < ys - roller_max_climb)
+        on_tanks = ~outside & ~blocked & self.tanks_hit(new_xs, surfaces - 1)
+        self.travelled[rolling] += roller_speed * time_step
+        tired = ~outside & ~blocked & (self.travelled[rolling] >= roller_max_distance)
+        gone[rolling[outside]] = True
+        exploded[rolling[blocked | on_tanks | tired]] = True
+        points[rolling] = np.stack((np.where(blocked, xs, new_xs), np.where(blocked, ys, surfaces)), axis=1)
+        self.xs[rolling], self.ys[rolling] = new_xs, surfaces
+
+    def dig(self, time_step, exploded, gone, points):
+        """
+        Moves diggers on through the ground, they explode on a tank, at the bottom of the display or when they have dug
+        far enough
+        :param time_step: time of the step
+        :param exploded: boolean array where exploding projectiles are marked
+        :param gone: boolean array where projectiles which left the world are marked
+        :param points: array where explosion points are stored
+        :return: list of ((x, y), radius) craters of tunnels of diggers which have finished
+        """
+        digging = np.flatnonzero(self.states == DIGGING)
+        if len(digging) == 0:
+            return []
+        self.xs[digging] += self.velocities_x[digging] * time_step
+        self.ys[digging] += self.velocities_y[digging] * time_step
+        # diggers stop at the bottom of the display instead of falling out of it
+        self.ys[digging] = np.minimum(self.ys[digging], display_height - 1)
+        xs, ys = self.xs[digging], self.ys[digging]
+        outside = (xs < 0) | (xs >= self.ground.width)
+        self.travelled[digging] += digger_speed * time_step
+        done = ~outside & ((self.travelled[digging] >= digger_length) | (ys >= display_height - 1) |
+                           self.tanks_hit(xs, ys))
+        gone[digging[outside]] = True
+        exploded[digging[done]] = True
+        points[digging] = np.stack((xs, ys), axis=1)
+        return self.tunnels(digging[outside | done])
+
+    def tunnels(self, diggers):
+        """
+        Returns tunnels of diggers, from where they landed to where they are now, so each tunnel is carved and
+        the ground above it sloughs once, when its digger has finished
+        :param diggers: array of indices of digging projectiles
+        :return: list of ((x, y), radius) craters, circles half a radius apart along each tunnel
+        """
+        craters = []
+        ends_x = np.clip(self.xs[diggers], 0, self.ground.width - 1)
+        for start_x, start_y, end_x, end_y in zip(self.impacts_x[diggers].tolist(), self.impacts_y[diggers].tolist(),
+                                                  ends_x.tolist(), self.ys[diggers].tolist()):
+            steps = int(np.hypot(end_x - start_x, end_y - start_y) / (digger_radius / 2)) + 1
+            xs, ys = np.linspace(start_x, end_x, steps + 1), np.linspace(start_y, end_y, steps + 1)
+            craters.extend(((int(x), int(y)), digger_radius) for x, y in zip(xs.tolist(), ys.tolist()))
+        return craters
+
+    def tanks_hit(self, xs, ys):
+        """
+        Tells which points are inside body boxes of tanks
+        :param xs: array of x coordinates
+        :param ys: array of y coordinates
+        :return: boolean array
+        """
+        hits = np.zeros(len(xs), dtype=bool)
+        if self.tank_index is None or len(xs) == 0:
+            return hits
+        for tank in self.tank_index.query(xs.min(), -inf, xs.max(), inf):
+            left, top, right, bottom = tank.get_body_box()
+            hits |= (left <= xs) & (xs <= right) & (top <= ys) & (ys <= bottom)
+        return hits
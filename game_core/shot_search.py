@@ -0,0 +1,143 @@
+import threading
+import numpy as np
+from random import Random
+from time import perf_counter
+from game_core.constants import *
+from game_core.explosions import damage_matrix
+from game_core.tank_sprites import turret_angles_number, turret_angle_index, tank_mask_array
+from game_core.trajectory import batch_impacts, tank_shots, flights_columns
+
+# the first pass tries every 8th turret angle and every 10th power, later passes halve both strides around the best
+# shots found so far, until every angle and power near them is tried
+first_strides = (8, 10)
+best_shots_kept = 4
+# one point of damage is worth landing this many pixels closer to the nearest enemy
+miss_distance = 100
+
+
+def tanks_rows(tanks):
+    """
+    Returns rows of tanks positions and healths, the search reads them instead of tanks changed by the game
+    :param tanks: list of Tank objects
+    :return: array of (x, y, health) rows
+    """
+    return np.array([tuple(tank.get_tank_position()) + (tank.get_tank_health(),) for tank in tanks],
+                    dtype=np.float64).reshape(-1, 3)
+
+
+def capped_damages(points, tanks):
+    """
+    Sums damage dealt to tanks by explosions of simple shells, damage to one tank is capped by its health
+    :param points: array of (x, y) explosion points
+    :param tanks: array of (x, y, health) rows of tanks
+    :return: array of summed damages, one per explosion
+    """
+    if len(tanks) == 0:
+        return np.zeros(len(points))
+    damages = damage_matrix(tanks[:, :2], points, simple_shell_power, simple_shell_radius)
+    return np.minimum(damages, tanks[:, 2]).sum(axis=1)
+
+
+def score_shots(impacts, enemies, allies):
+    """
+    Scores shots by damage dealt to enemies less damage dealt to own tanks, shots which hurt nobody are told apart by
+    distance from their impact to the nearest enemy
+    :param impacts: Impacts of the shots
+    :param enemies: array of (x, y, health) rows of enemy tanks
+    :param allies: array of (x, y, health) rows of own tanks, the firing one included
+    :return: array of scores, -inf for shells which leave the world
+    """
+    points = impacts.points.reshape(-1, 2).astype(np.float64)
+    scores = capped_damages(points, enemies) - capped_damages(points, allies)
+    if len(enemies) > 0:
+        distances = np.hypot(enemies[:, 0] - points[:, 0:1], enemies[:, 1] - points[:, 1:2]).min(axis=1)
+        scores = scores - distances / miss_distance
+    return np.where(np.isfinite(impacts.times.ravel()), scores, -np.inf)
+
+
+def search_shot(tank, enemies, allies, ground, tank_index=None, budget=1.0, pixel_accurate=False, masks=None):
+    """
+    Searches turret angle and power of the best shot, coarse to fine, until the time budget would be exceeded by
+    the next pass. The first pass is always finished
+    :param tank: Tank object firing the shell
+    :param enemies: array of (x, y, health) rows of enemy tanks
+    :param allies: array of (x, y, health) rows of own tanks, the firing one included
+    :param ground: Ground object
+    :param tank_index: TankIndex object with tanks which may be hit, only ground is checked if None
+    :param budget: time of the search in seconds
+    :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+    :param masks: dict of boolean arrays of drawn pixels by tank, masks are made from sprites for missing tanks
+    :return: (turret angle index, power) of the best found shot
+    """
+    started = perf_counter()
+    angle_stride, power_stride = first_strides
+    angles, powers = np.meshgrid(np.arange(0, turret_angles_number, angle_stride), np.arange(0, 101, power_stride))
+    angles, powers = angles.ravel(), powers.ravel()
+    best_angles, best_powers, best_scores = np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+    while True:
+        pass_started = perf_counter()
+        impacts = batch_impacts(tank, -pi / 2 + angles * angle_step, powers, ground, tank_index, pixel_accurate,
+                                masks)
+        best_angles = np.concatenate([best_angles, angles])
+        best_powers = np.concatenate([best_powers, powers])
+        best_scores = np.concatenate([best_scores, score_shots(impacts, enemies, allies)])
+        best = np.argsort(-best_scores, kind='stable')[:best_shots_kept]
+        best_angles, best_powers, best_scores = best_angles[best], best_powers[best], best_scores[best]
+        now = perf_counter()
+        if angle_stride == power_stride == 1 or now - started + 2 * (now - pass_started) > budget:
+            return int(best_angles[0]), int(best_powers[0])
+        angle_offsets = np.arange(-angle_stride, angle_stride + 1, max(angle_stride // 2, 1))
+        power_offsets = np.arange(-power_stride, power_stride + 1, max(power_stride // 2, 1))
+        angle_stride, power_stride = max(angle_stride // 2, 1), max(power_stride // 2, 1)
+        angles, powers = np.broadcast_arrays(
+            np.clip(best_angles[:, None, None] + angle_offsets[None, :, None], 0, turret_angles_number - 1),
+            np.clip(best_powers[:, None, None] + power_offsets[None, None, :], 0, 100))
+        shots = np.unique(angles.ravel() * 101 + powers.ravel())
+        shots = shots[~np.isin(shots, best_angles * 101 + best_powers)]
+        angles, powers = shots // 101, shots % 101
+
+
+class ShotSearch(threading.Thread):
+    """
+    Class which represents shot search of a computer player, run in background so the game keeps drawing frames
+    """
+    def __init__(self, tank, player, players, ground, tank_index=None, level=computer_level,
+                 pixel_accurate=False, rng=None):
+        """
+        Initialize search, positions and healths of tanks are read at once
+        :param tank: Tank object which shoots next
+        :param player: Player object owning the tank
+        :param players: list of Player objects in game
+        :param ground: Ground object, not changed until the search is done
+        :param tank_index: TankIndex object with tanks which may be hit
+        :param level: name of computer level from computer_levels
+        :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+        :param rng: Random object making aiming errors, new one if None
+        """
+        super().__init__(daemon=True)
+        self.tank = tank
+        self.enemies = tanks_rows([enemy for other in players if other is not player for enemy in other.active_tanks])
+        self.allies = tanks_rows(player.active_tanks)
+        self.ground = ground
+        self.tank_index = tank_index
+        self.budget, self.angle_error, self.power_error = computer_levels[level]
+        self.pixel_accurate = pixel_accurate
+        # masks are made from pygame surfaces, which are only touched by the main thread
+        self.masks = {target: tank_mask_array(turret_angle_index(target.turret_angle))
+                      for target in tank_index.boxes} if pixel_accurate and tank_index is not None else None
+        self.rng = rng if rng is not None else Random()
+        self.shot = None
+        # chunks under every shot the tank could fire are generated here, so the search only reads the ground
+        angles, powers = np.meshgrid(-pi / 2 + np.arange(turret_angles_number) * angle_step, np.arange(101))
+        ground.ensure_generated(*flights_columns(tank_shots(tank, angles, powers), ground.width))
+
+    def run(self):
+        """
+        Searches the shot and spoils it by aiming errors of the level
+        :return: none
+        """
+        angle_index, power = search_shot(self.tank, self.enemies, self.allies, self.ground, self.tank_index,
+                                         self.budget, self.pixel_accurate, self.masks)
+        angle_index += int(round(self.rng.gauss(0, self.angle_error / angle_step)))
+        power += int(round(self.rng.gauss(0, self.power_error)))
+        self.shot = min(max(angle_index, 0), turret_angles_number - 1), min(max(power, 0), 100)
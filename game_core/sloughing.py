@@ -0,0 +1,77 @@
+import numpy as np
+from math import sqrt, ceil
+from game_core.constants import *
+from game_core.column_spans import insert_span, landing_height
+
+
+class SloughingSolution:
+    """
+    Class which represents final resting positions of falling ground pieces together with their fall in time
+    """
+    def __init__(self, columns, tops, bottoms, rest_bottoms, gravity=sloughing_gravity):
+        """
+        Initialize solution
+        :param columns: array of pieces columns
+        :param tops: array of pieces top rows
+        :param bottoms: array of pieces bottom rows
+        :param rest_bottoms: array of pieces bottom rows after the fall
+        :param gravity: acceleration of falling ground in pixels per second squared
+        """
+        self.columns = columns
+        self.tops = tops
+        self.bottoms = bottoms
+        self.rest_bottoms = rest_bottoms
+        self.drops = rest_bottoms - bottoms
+        self.gravity = gravity
+        self.duration = sqrt(2 * int(self.drops.max()) / gravity) if len(self.drops) > 0 else 0
+
+    def sample(self, elapsed_time):
+        """
+        Returns positions of pieces at given time of the fall
+        :param elapsed_time: time since the fall started in seconds
+        :return: (tops, bottoms) arrays of pieces rows
+        """
+        offsets = np.minimum(self.drops, ceil(self.gravity * elapsed_time ** 2 / 2))
+        return self.tops + offsets, self.bottoms + offsets
+
+    def is_finished(self, elapsed_time):
+        """
+        Tells if all pieces have landed at given time
+        :param elapsed_time: time since the fall started in seconds
+        :return: flag True/False
+        """
+        return elapsed_time >= self.duration
+
+
+def solve_sloughing(ground, left_ground):
+    """
+    Computes resting positions of all falling ground pieces in one pass, pieces in the same column stack from the
+    lowest one up
+    :param ground: Ground object
+    :param left_ground: list of ground pieces [[x, bottom_y], [x, top_y]]
+    :return: SloughingSolution object
+    """
+    pieces = np.array([[line[0][0], line[1][1], line[0][1]] for line in left_ground], dtype=np.int64).reshape(-1, 3)
+    columns, tops, bottoms = pieces[:, 0], pieces[:, 1], pieces[:, 2]
+    lengths = bottoms - tops
+    rest_bottoms = np.zeros(len(pieces), dtype=np.int64)
+
+    order = np.lexsort((-bottoms, columns))
+    in_spans = np.array([column in ground.spans for column in columns.tolist()], dtype=bool)
+    simple = order[~in_spans[order]]
+    if len(simple) > 0:
+        simple_columns = columns[simple]
+        stacked = np.cumsum(lengths[simple]) - lengths[simple]
+        group_starts = np.concatenate(([True], simple_columns[1:] != simple_columns[:-1]))
+        group_offsets = np.maximum.accumulate(np.where(group_starts, np.arange(len(simple)), 0))
+        rest_bottoms[simple] = ground.heights[simple_columns] - (stacked - stacked[group_offsets])
+
+    column_spans = {}
+    for piece in order[in_spans[order]].tolist():
+        column = int(columns[piece])
+        spans = column_spans.get(column, ground.spans[column])
+        landing = landing_height(spans, int(tops[piece]), display_height)
+        column_spans[column] = insert_span(spans, landing - int(lengths[piece]), landing)
+        rest_bottoms[piece] = landing
+
+    return SloughingSolution(columns, tops, bottoms, rest_bottoms)
@@ -0,0 +1,129 @@
+from bisect import bisect_right
+from random import Random
+from game_core.constants import *
+
+
+def interval_capacity(left, right, spacing):
+    """
+    Returns how many tanks fit in interval of free positions
+    :param left: first free position
+    :param right: position after the last free one
+    :param spacing: minimal distance between tanks
+    :return: number of tanks
+    """
+    return (right - 1 - left) // spacing + 1 if right > left else 0
+
+
+def spawn_width(tanks_number, spacing=tank_width + 10, margin=5 + int(tank_width / 2)):
+    """
+    Returns the narrowest world width where given number of tanks fits
+    :param tanks_number: number of tanks
+    :param spacing: minimal distance between tanks
+    :param margin: minimal distance of tanks from world edges
+    :return: width in pixels
+    """
+    return 2 * margin + (tanks_number - 1) * spacing + 1
+
+
+class SpawnAllocator:
+    """
+    Class which represents free x intervals where tanks may still be placed. Positions are sampled straight from the
+    intervals, and a placement never leaves less room than the remaining tanks need, so setup always ends
+    """
+    def __init__(self, width, tanks_number, occupied=(), rng=None, spacing=tank_width + 10,
+                 margin=5 + int(tank_width / 2)):
+        """
+        Initialize allocator
+        :param width: width of the world
+        :param tanks_number: number of tanks to place
+        :param occupied: x coordinates of already placed tanks
+        :param rng: Random object, the same seed gives the same positions
+        :param spacing: minimal distance between tanks
+        :param margin: minimal distance of tanks from world edges
+        """
+        self.spacing = spacing
+        self.rng = rng if rng is not None else Random()
+        self.intervals = [(margin, width - margin)] if width - margin > margin else []
+        self.remaining = 0
+        for x_coord in occupied:
+            self.remove(x_coord)
+        self.remaining = tanks_number
+        if self.capacity() < tanks_number:
+            raise ValueError('{} tanks do not fit on battlefield {} pixels wide, at most {} do'.format(
+                tanks_number + len(occupied), width, self.capacity() + len(occupied)))
+
+    def capacity(self):
+        """
+        Returns how many tanks still fit
+        :return: number of tanks
+        """
+        return sum(interval_capacity(left, right, self.spacing) for left, right in self.intervals)
+
+    def remove(self, x_coord):
+        """
+        Marks tank at given position as placed, positions closer to it than spacing are no longer free
+        :param x_coord: x coordinate of the tank
+        :return: none
+        """
+        low, high = x_coord - self.spacing + 1, x_coord + self.spacing
+        first = max(bisect_right(self.intervals, (low,)) - 1, 0)
+        last = bisect_right(self.intervals, (high,))
+        pieces = []
+        for left, right in self.intervals[first:last]:
+            if right <= low or left >= high:
+                pieces.append((left, right))
+                continue
+            if left < low:
+                pieces.append((left, low))
+            if right > high:
+                pieces.append((high, right))
+        self.intervals[first:last] = pieces
+        self.remaining -= 1
+
+    def is_free(self, x_coord):
+        """
+        Tells if tank may be placed at given position
+        :param x_coord: x coordinate
+        :return: flag True/False
+        """
+        index = bisect_right(self.intervals, (x_coord, float('inf'))) - 1
+        return index >= 0 and self.intervals[index][0] <= x_coord < self.intervals[index][1]
+
+    def sample(self):
+        """
+        Returns position drawn uniformly from free intervals
+        :return: x coordinate
+        """
+        offset = self.rng.randrange(sum(right - left for left, right in self.intervals))
+        for left, right in self.intervals:
+            if offset < right - left:
+                return left + offset
+            offset -= right - left
+
+    def allocate(self, ground=None, slots=(), candidates=spawn_candidates):
+        """
+        Chooses position for the next tank and marks it as placed
+        :param ground: ground object, the flattest of sampled candidates is chosen if given
+        :param slots: preferred x coordinates, used while some of them are free
+        :param candidates: number of sampled candidates scored by flatness
+        :return: x coordinate
+        """
+        if self.remaining <= 0 or not self.intervals:
+            raise ValueError('no room left for another tank')
+        if self.capacity() > self.remaining:
+            # any placement takes room of at most two tanks, so there is room to spare
+            choices = [slot for slot in slots if self.is_free(slot)]
+            if not choices:
+                choices = [self.sample() for _ in range(candidates if ground is not None else 1)]
+        else:
+            # only the left end of an interval leaves room for all remaining tanks
+            choices = [left for left, _ in self.intervals]
+            if ground is None:
+                choices = [self.rng.choice(choices)]
+        if ground is not None and len(choices) > 1:
+            half_width = int(tank_width / 2)
+            x_coord = min(choices, key=lambda x: ground.window_flatness(x - half_width, x + half_width))
+        else:
+            x_coord = self.rng.choice(choices)
+        self.remove(x_coord)
+        return x_coord
@@ -1,8 +1,10 @@
 import pygame
-from math import sqrt, sin, cos
-from shapely.geometry import LineString
+from math import sqrt
 from game_core.constants import *
 from game_core.utils import sys_text_object, animate_explosion, halt_whole_game
+from game_core.camera import Camera
+from game_core.tank_sprites import tank_sprite, turret_angle_index, turret_end_offset_at, sprite_origin, \
+    highlight_color
 from random import randint
 
 
@@ -11,26 +13,36 @@ class Tank:
     Class which represents tank object in game
     """
 
-    def __init__(self, game_display, pos, health_bar_pos, color):
+    def __init__(self, game_display, pos, health_bar_pos, color, camera=None, tank_index=None,
+                 health_bar_size=(health_bar_length, health_bar_height)):
         """
         Initialize tank
         :param game_display: handle to display
         :param pos: initial position of the tank as list
         :param health_bar_pos: position of health bar os tuple
         :param color: color of this player tanks
+        :param camera: Camera object converting world coordinates to display ones
+        :param tank_index: TankIndex object kept up to date with tank's position
+        :param health_bar_size: (width, height) of health bar
         """
         self.position = list(pos)
         self.health_bar_position = health_bar_pos
+        self.health_bar_size = tuple(health_bar_size)
         self.tank_health = initial_tank_health
         self.turret_angle = initial_turret_angle + (randint(0, pi/angle_step) * angle_step)
         self.player_color = color
         self.turret_end_x = 0
         self.turret_end_y = 0
         self.tank_power = 50
+        self.weapon = weapons[0]
         self.game_display = game_display
         self.explosion_sound = pygame.mixer.Sound("assets/music/Explosion3.wav")
         self.fire_sound = pygame.mixer.Sound("assets/music/Cannon1.wav")
         self.special_counter = 0
+        self.camera = camera if camera else Camera()
+        self.tank_index = tank_index
+        if tank_index is not None:
+            tank_index.update(self)
 
     def calculate_distance_from_tank_center(self, explosion_point):
         """
@@ -40,83 +52,34 @@ class Tank:
         """
         return int(sqrt((explosion_point[0]-self.position[0])**2+(explosion_point[1]-self.position[1])**2))
 
-    def check_collision_with_tank(self, shell_line):
-        """
-        Checks whether there was a collision with tank and returns collision coordinates
-        :param shell_line: trajectory line of the shell
-        :return: intersection point coordinates or None
-        """
-        tank_line1 = LineString([[self.position[0] - int(tank_width / 2), self.position[1]],
-                                 [self.position[0] + int(tank_width / 2), self.position[1]]])
-        tank_line2 = LineString([[self.position[0] - int(tank_width / 2), self.position[1]],
-                                 [self.position[0] - int(tank_width / 2), self.position[1] + tank_height]])
-        tank_line3 = LineString([[self.position[0] + int(tank_width / 2), self.position[1]],
-                                 [self.position[0] + int(tank_width / 2), self.position[1] + tank_height]])
-        tank_line4 = LineString([[self.position[0] - int(tank_width / 2), self.position[1] + tank_height],
-                                 [self.position[0] + int(tank_width / 2), self.position[1] + tank_height]])
-        intersection = tank_line1.intersection(shell_line)
-        if intersection:
-            return int(intersection.x), int(intersection.y)
-
-        intersection = tank_line2.intersection(shell_line)
-        if intersection:
-            return int(intersection.x), int(intersection.y)
-
-        intersection = tank_line3.intersection(shell_line)
-        if intersection:
-            return int(intersection.x), int(intersection.y)
-
-        intersection = tank_line4.intersection(shell_line)
-        if intersection:
-            return int(intersection.x), int(intersection.y)
-        return None
-
-    def apply_damage(self, explosion_point, explosion_power, explosion_radius):
+    def take_damage(self, damage):
         """
-        Applies damage taken by tank regarding to position of explosion point and its power
-        :param explosion_radius: radius of explosion
-        :param explosion_point: coordinates of explosion point
-        :param explosion_power: power of explosion
+        Lowers tank's health by damage
+        :param damage: damage taken
         :return: True if tank is destructed, False otherwise
         """
-        distance_from_tank = self.calculate_distance_from_tank_center(explosion_point)
-        damage = 0
-        if distance_from_tank < explosion_radius:
-            damage = int(((explosion_radius - distance_from_tank) / explosion_radius) * explosion_power)
-
         self.tank_health = max(self.tank_health - damage, 0)
         if self.tank_health == 0:
             return True
         else:
             return False
 
-    def draw_tank(self):
+    def draw_tank(self, color=None):
         """
-        Draws this tank on specified game display
-        :param game_display: PyGame display where the tank should appear
+        Draws this tank on specified game display, blitting its cached sprite
+        :param color: color of the tank, player's color if None
         :return: none
         """
-        x = self.position[0]
-        y = self.position[1]
-        pygame.draw.circle(self.game_display, self.player_color,  (x, y), int(tank_height/4*3))
-        pygame.draw.rect(self.game_display, self.player_color, (x-int(tank_width/2), y, tank_width, tank_height))
+        angle_index = turret_angle_index(self.turret_angle)
+        offset_x, offset_y = turret_end_offset_at(angle_index)
+        self.turret_end_x = self.position[0] + offset_x
+        self.turret_end_y = self.position[1] + offset_y
+        if not self.camera.is_visible(self.position[0], tank_width):
+            return
 
-        self.turret_end_x = x + int(sin(self.turret_angle) * turret_length)
-        self.turret_end_y = (y-2) - int(cos(self.turret_angle) * turret_length)
-        pygame.draw.line(self.game_display,
-                         self.player_color,
-                         (x, y-2),
-                         (self.turret_end_x, self.turret_end_y),
-                         turret_width)
-
-        # draw wheels? is it needed??
-        pygame.draw.circle(self.game_display, self.player_color, (x - 15, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x - 10, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x - 5, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x + 5, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x + 10, y + tank_height), wheel_width)
-        pygame.draw.circle(self.game_display, self.player_color, (x + 15, y + tank_height), wheel_width)
+        x, y = self.camera.to_screen(self.position)
+        self.game_display.blit(tank_sprite(color or self.player_color, angle_index),
+                               (x - sprite_origin, y - sprite_origin))
 
     def get_turret_end_coordinates(self):
         """
@@ -161,27 +124,57 @@ class Tank:
         elif power_change < 0:
             self.tank_power = max(current_power + power_change, 0)
 
+    def change_weapon(self):
+        """
+        Switches to the next weapon
+        :return: none
+        """
+        self.weapon = weapons[(weapons.index(self.weapon) + 1) % len(weapons)]
+
+    def aim_at(self, angle_index, power, steps=computer_aim_steps):
+        """
+        Turns turret and changes power towards the aim by a few steps, as a player holding keys would
+        :param angle_index: index of aimed turret angle
+        :param power: aimed power
+        :param steps: largest change of turret angle, in angle steps, and of power
+        :return: True if the tank was already aimed, False if it has been changed
+        """
+        current_index = turret_angle_index(self.turret_angle)
+        if current_index == angle_index and self.tank_power == power:
+            return True
+        current_index += min(max(angle_index - current_index, -steps), steps)
+        self.turret_angle = initial_turret_angle + current_index * angle_step
+        self.update_tank_power(min(max(power - self.tank_power, -steps), steps))
+        return False
+
     def get_init_data_for_shell(self):
         """
-        Returns all required parameters to shoot a shell
+        Returns all required parameters to shoot a shell, the weapon is read separately
         :return: (tank_power, turret_angle, fire_sound, color, (turret_end_x, turret_end_y))
         """
         ret_color = self.player_color
         return self.tank_power, self.turret_angle, self.fire_sound, ret_color, (self.turret_end_x, self.turret_end_y)
 
-    def show_tanks_power(self):
+    def show_tanks_power(self, surface=None, y_coord=10):
         """
-        Displays tank's power to screen
-        :return: none
+        Displays tank's power and weapon to screen
+        :param surface: surface to draw on, game display if None
+        :param y_coord: y coordinate of the text
+        :return: pygame Rect covered by the text
         """
-        (text_surface, rect_size) = sys_text_object("Power: " + str(self.tank_power) + "%", white, FontSize.SMALL)
-        self.game_display.blit(text_surface, [int(display_width / 2) - int(rect_size.width / 2), 10])
+        surface = surface or self.game_display
+        (text_surface, rect_size) = sys_text_object("Power: " + str(self.tank_power) + "%   " + self.weapon.upper(),
+                                                    white, FontSize.SMALL)
+        return surface.blit(text_surface, [int(display_width / 2) - int(rect_size.width / 2), y_coord])
 
-    def draw_health_bar(self, active=False):
+    def draw_health_bar(self, active=False, surface=None):
         """
         Draws health bar of a tank on the screen
+        :param active: flag if the bar is drawn white, as for the chosen tank
+        :param surface: surface to draw on, game display if None
         :return: none
         """
+        surface = surface or self.game_display
         color = low_health_color
         if self.tank_health > 65:
             color = good_health_color
@@ -190,20 +183,64 @@ class Tank:
 
         if active:
             color = white
-        pygame.draw.rect(self.game_display,
+        pygame.draw.rect(surface, black, self.get_health_bar_rect())
+        width, height = self.health_bar_size
+        pygame.draw.rect(surface,
                          color,
-                         (self.health_bar_position[0], self.health_bar_position[1], self.tank_health, 25))
-        pygame.draw.rect(self.game_display,
+                         (self.health_bar_position[0], self.health_bar_position[1],
+                          int(self.tank_health * width / initial_tank_health), height))
+        pygame.draw.rect(surface,
                          white,
-                         (self.health_bar_position[0], self.health_bar_position[1], 100, 25),
-                         2)
+                         (self.health_bar_position[0], self.health_bar_position[1], width, height),
+                         2 if height > 10 else 1)
+
+    def get_health_bar_rect(self):
+        """
+        Returns display rectangle taken by health bar
+        :return: pygame Rect
+        """
+        return pygame.Rect(self.health_bar_position, self.health_bar_size)
+
+    def get_reach(self):
+        """
+        Returns horizontal distance from tank center to the farthest drawn point of the tank
+        :return: distance in pixels
+        """
+        return turret_length + wheel_width
+
+    def get_body_box(self):
+        """
+        Returns world box of tank's body, hit by shells unless collisions are pixel accurate
+        :return: (left, top, right, bottom) coordinates
+        """
+        x, y = self.position
+        return x - int(tank_width / 2), y, x + int(tank_width / 2), y + tank_height
+
+    def get_bounding_box(self):
+        """
+        Returns world box which may be covered by the tank
+        :return: (left, top, right, bottom) coordinates
+        """
+        reach = self.get_reach()
+        return (self.position[0] - reach, self.position[1] - reach, self.position[0] + reach,
+                self.position[1] + tank_height + wheel_width)
+
+    def get_screen_rect(self):
+        """
+        Returns display rectangle which may be covered by the tank
+        :return: pygame Rect
+        """
+        x, y = self.camera.to_screen(self.position)
+        reach = self.get_reach()
+        return pygame.Rect(x - reach, y - reach, 2 * reach, reach + tank_height + 2 * wheel_width)
 
     def self_destruct(self):
         """
         Animation of self destruction
         :return: none
         """
-        animate_explosion(self.game_display, self.position, self.explosion_sound, tank_explosion_radius)
+        animate_explosion(self.game_display, self.camera.to_screen(self.position), self.explosion_sound,
+                          tank_explosion_radius)
 
     def get_tank_health(self):
         """
@@ -226,20 +263,21 @@ class Tank:
         :return: none
         """
         self.position = list(new_coordinates)
+        if self.tank_index is not None:
+            self.tank_index.update(self)
 
     def show_tank_special(self):
         """
-        Show tank as white, when chosen
-        :return: none
+        Show tank highlighted when chosen, flashing white from time to time
+        :return: flag True if the tank flashed, its health bar is then shown white as well
         """
         self.special_counter += 1
         if self.special_counter % 10 == 0:
-            real_color = self.player_color
-            self.player_color = white
-            self.draw_tank()
-            self.draw_health_bar(True)
-            self.player_color = real_color
+            self.draw_tank(white)
             self.special_counter = 0
+            return True
+        self.draw_tank(highlight_color(self.player_color))
+        return False
 
     def animate_tank_fall(self, desirable_height):
         """
@@ -253,12 +291,10 @@ class Tank:
                 if event.type == pygame.QUIT:
                     halt_whole_game()
 
-            temp_color = self.player_color
-            self.player_color = black
-            self.draw_tank()
+            self.draw_tank(black)
+            previous_rect = self.get_screen_rect()
             self.position[1] += 1
-            self.player_color = temp_color
             self.draw_tank()
 
-            pygame.display.update()
+            pygame.display.update(previous_rect.union(self.get_screen_rect()))
             clock.tick(100)
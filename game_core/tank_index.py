@@ -0,0 +1,75 @@
+from game_core.constants import *
+
+
+class TankIndex:
+    """
+    Class which represents uniform grid of tanks bounding boxes over x axis, so that shell flights are tested only
+    against tanks standing near them
+    """
+    def __init__(self, cell_width=tank_index_cell_width):
+        """
+        Initialize index
+        :param cell_width: width of grid cell in pixels
+        """
+        self.cell_width = cell_width
+        self.cells = {}
+        self.boxes = {}
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def cells_range(self, left, right):
+        """
+        Returns grid cells covering range [left, right]
+        :param left: left x coordinate
+        :param right: right x coordinate
+        :return: range of cells
+        """
+        return range(int(left) // self.cell_width, int(right) // self.cell_width + 1)
+
+    def update(self, tank):
+        """
+        Inserts tank into the index or moves it after its position has changed
+        :param tank: Tank object
+        :return: none
+        """
+        self.remove(tank)
+        box = tank.get_bounding_box()
+        self.boxes[tank] = box
+        for cell in self.cells_range(box[0], box[2]):
+            self.cells.setdefault(cell, []).append(tank)
+
+    def remove(self, tank):
+        """
+        Removes tank from the index
+        :param tank: Tank object
+        :return: none
+        """
+        box = self.boxes.pop(tank, None)
+        if box is None:
+            return
+        for cell in self.cells_range(box[0], box[2]):
+            self.cells[cell].remove(tank)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def query(self, left, top, right, bottom):
+        """
+        Finds tanks which bounding boxes overlap given box
+        :param left: left x coordinate
+        :param top: top y coordinate
+        :param right: right x coordinate
+        :param bottom: bottom y coordinate
+        :return: list of tanks
+        """
+        # tanks spanning several cells are met once per cell, the set keeps the query linear in tanks found
+        found, seen = [], set()
+        for cell in self.cells_range(left, right):
+            for tank in self.cells.get(cell, ()):
+                if tank in seen:
+                    continue
+                seen.add(tank)
+                box = self.boxes[tank]
+                if box[0] <= right and box[2] >= left and box[1] <= bottom and box[3] >= top:
+                    found.append(tank)
+        return found
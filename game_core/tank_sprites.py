@@ -0,0 +1,107 @@
+import pygame
+import numpy as np
+from functools import lru_cache
+from math import sin, cos
+from game_core.constants import *
+
+# sprites and masks keep tank position at (sprite_origin, sprite_origin), turret and wheels fit around it
+sprite_origin = turret_length + wheel_width
+sprite_size = (2 * sprite_origin, sprite_origin + tank_height + wheel_width + 1)
+turret_angles_number = int(round(pi / angle_step)) + 1
+
+
+def turret_angle_index(turret_angle):
+    """
+    Returns index of turret angle, turret angles change by angle_step from -pi/2 to pi/2
+    :param turret_angle: turret angle
+    :return: index in range [0, turret_angles_number)
+    """
+    return min(max(int(round((turret_angle + pi / 2) / angle_step)), 0), turret_angles_number - 1)
+
+
+def turret_end_offset(turret_angle):
+    """
+    Returns turret end relative to tank position
+    :param turret_angle: turret angle
+    :return: (x, y) offset
+    """
+    return int(sin(turret_angle) * turret_length), -2 - int(cos(turret_angle) * turret_length)
+
+
+@lru_cache(maxsize=turret_angles_number)
+def turret_end_offset_at(angle_index):
+    """
+    Returns turret end relative to tank position, computed once for each turret angle
+    :param angle_index: index of turret angle
+    :return: (x, y) offset
+    """
+    return turret_end_offset(-pi / 2 + angle_index * angle_step)
+
+
+def highlight_color(color):
+    """
+    Returns lighter version of the color, used for the active tank
+    :param color: (r, g, b) color
+    :return: (r, g, b) color halfway to white
+    """
+    return tuple(part + (255 - part) // 2 for part in color[:3])
+
+
+def draw_tank_shape(surface, color, position, turret_end):
+    """
+    Draws tank body, turret and wheels
+    :param surface: surface to draw on
+    :param color: color of the tank
+    :param position: (x, y) position of the tank on the surface
+    :param turret_end: (x, y) position of the turret end on the surface
+    :return: none
+    """
+    x, y = position
+    pygame.draw.circle(surface, color, (x, y), int(tank_height/4*3))
+    pygame.draw.rect(surface, color, (x-int(tank_width/2), y, tank_width, tank_height))
+
+    pygame.draw.line(surface, color, (x, y-2), turret_end, turret_width)
+
+    # draw wheels? is it needed??
+    for wheel_x in range(x - 15, x + 16, 5):
+        pygame.draw.circle(surface, color, (wheel_x, y + tank_height), wheel_width)
+
+
+@lru_cache(maxsize=tank_sprites_cache_size)
+def tank_sprite(color, angle_index):
+    """
+    Returns tank rendered once on transparent surface. Highlighted and white tanks are just other colors, so all
+    variants share one bounded cache and the least recently drawn sprites are dropped first
+    :param color: (r, g, b) color of the tank
+    :param angle_index: index of turret angle
+    :return: pygame Surface with tank position at (sprite_origin, sprite_origin)
+    """
+    surface = pygame.Surface(sprite_size, pygame.SRCALPHA)
+    offset_x, offset_y = turret_end_offset_at(angle_index)
+    draw_tank_shape(surface, color, (sprite_origin, sprite_origin),
+                    (sprite_origin + offset_x, sprite_origin + offset_y))
+    return surface.convert_alpha() if pygame.display.get_surface() is not None else surface
+
+
+@lru_cache(maxsize=turret_angles_number)
+def tank_mask(angle_index):
+    """
+    Returns pixel collision mask of the tank, the shape does not depend on the color so one mask serves all colors
+    :param angle_index: index of turret angle
+    :return: pygame Mask with tank position at (sprite_origin, sprite_origin)
+    """
+    return pygame.mask.from_surface(tank_sprite(white, angle_index))
+
+
+@lru_cache(maxsize=turret_angles_number)
+def tank_mask_array(angle_index):
+    """
+    Returns pixel collision mask of the tank as array, for checking many points at once
+    :param angle_index: index of turret angle
+    :return: read-only boolean array indexed [y, x], with tank position at (sprite_origin, sprite_origin)
+    """
+    mask = tank_mask(angle_index)
+    width, height = mask.get_size()
+    bits = np.array([[mask.get_at((x, y)) for x in range(width)] for y in range(height)], dtype=bool)
+    bits.flags.writeable = False
+    return bits
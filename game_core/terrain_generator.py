@@ -0,0 +1,156 @@
+import numpy as np
+from functools import lru_cache
+from game_core.constants import *
+
+
+def hash_values(seed, indices, salt=0):
+    """
+    Returns deterministic pseudo random values for integer lattice indices
+    :param seed: terrain seed
+    :param indices: array of lattice indices
+    :param salt: additional value separating independent sequences of the same seed
+    :return: array of values in range [0, 1)
+    """
+    mask = 0xFFFFFFFFFFFFFFFF
+    key = np.uint64((seed * 0x9E3779B97F4A7C15 + salt * 0xD1B54A32D192ED03) & mask)
+    values = np.asarray(indices).astype(np.uint64) * np.uint64(0xBF58476D1CE4E5B9) ^ key
+    # splitmix64 finalizer
+    values ^= values >> np.uint64(30)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    values ^= values >> np.uint64(31)
+    return (values >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def value_noise(columns, seed, spacing, salt=0):
+    """
+    Smoothly interpolated random values on lattice with given spacing
+    :param columns: array of columns
+    :param seed: terrain seed
+    :param spacing: distance between lattice points
+    :param salt: additional value separating independent sequences of the same seed
+    :return: array of values in range [0, 1)
+    """
+    cells = np.floor_divide(columns, spacing)
+    fraction = (columns - cells * spacing) / spacing
+    fraction = fraction * fraction * (3 - 2 * fraction)
+    left = hash_values(seed, cells, salt)
+    right = hash_values(seed, cells + 1, salt)
+    return left + (right - left) * fraction
+
+
+def segments(columns, seed, spacing=int(display_width / 10)):
+    """
+    Straight lines between random control points, as in the original game
+    :param columns: array of columns
+    :param seed: terrain seed
+    :param spacing: distance between control points
+    :return: array of normalized heights in range [0, 1)
+    """
+    cells = np.floor_divide(columns, spacing)
+    fraction = (columns - cells * spacing) / spacing
+    left = hash_values(seed, cells)
+    right = hash_values(seed, cells + 1)
+    return left + (right - left) * fraction
+
+
+def fractal_noise(columns, seed, spacing=400, octaves=5, persistence=0.5, contrast=2.0):
+    """
+    Sum of value noise octaves with halving spacing
+    :param columns: array of columns
+    :param seed: terrain seed
+    :param spacing: lattice spacing of the first octave
+    :param octaves: number of octaves
+    :param persistence: amplitude ratio of consecutive octaves
+    :param contrast: stretch of the sum around the middle height, summed octaves flatten towards it
+    :return: array of normalized heights in range [0, 1)
+    """
+    result = np.zeros(len(columns))
+    amplitude, total = 1.0, 0.0
+    for octave in range(octaves):
+        result += amplitude * value_noise(columns, seed, max(spacing >> octave, 1), octave)
+        total += amplitude
+        amplitude *= persistence
+    return np.clip((result / total - 0.5) * contrast + 0.5, 0, 0.999)
+
+
+def midpoint_displacement(columns, seed, spacing=512, roughness=0.55):
+    """
+    Midpoint displacement inside lattice cells, computed only for cells covering requested columns
+    :param columns: array of consecutive columns
+    :param seed: terrain seed
+    :param spacing: size of the lattice cell, power of two
+    :param roughness: displacement ratio of consecutive subdivision levels
+    :return: array of normalized heights in range [0, 1)
+    """
+    first = int(columns[0]) // spacing * spacing
+    last = -(-(int(columns[-1]) + 1) // spacing) * spacing
+    values = hash_values(seed, np.arange(first, last + 1, spacing) // spacing) * 0.8 + 0.1
+    step, amplitude, level = spacing, 0.5, 1
+    while step > 1:
+        step //= 2
+        midpoints = np.arange(first + step, last, 2 * step)
+        displacement = (hash_values(seed, midpoints, level) - 0.5) * amplitude
+        refined = np.empty(2 * len(values) - 1)
+        refined[0::2] = values
+        refined[1::2] = (values[:-1] + values[1:]) / 2 + displacement
+        values = refined
+        amplitude *= roughness
+        level += 1
+    return np.clip(values[columns - first], 0, 0.999)
+
+
+def plateaus(columns, seed, spacing=400, levels=4, ramp=0.2):
+    """
+    Fractal noise cut into flat terraces joined by short ramps
+    :param columns: array of columns
+    :param seed: terrain seed
+    :param spacing: lattice spacing of the first noise octave
+    :param levels: number of terraces
+    :param ramp: part of each terrace step taken by the ramp
+    :return: array of normalized heights in range [0, 1)
+    """
+    scaled = fractal_noise(columns, seed, spacing, octaves=3) * levels
+    steps = np.floor(scaled)
+    return (steps + np.clip((scaled - steps - (1 - ramp)) / ramp, 0, 1)) / (levels + 1)
+
+
+terrain_algorithms = {
+    'segments': segments,
+    'noise': fractal_noise,
+    'midpoint': midpoint_displacement,
+    'plateaus': plateaus,
+}
+
+
+@lru_cache(maxsize=terrain_cache_size)
+def cached_world(algorithm, params, seed):
+    """
+    Returns heightmaps generated for one world, worlds are kept in LRU cache as a whole, so replaying a seed finds
+    all chunks of its world however wide it is
+    :param algorithm: name of the algorithm from terrain_algorithms
+    :param params: algorithm parameters as sorted tuple of (name, value) pairs
+    :param seed: terrain seed
+    :return: dictionary of read-only arrays of heights by (start, stop) column ranges
+    """
+    return {}
+
+
+def generate_heightmap(algorithm, seed, start=0, stop=display_width, **params):
+    """
+    Generates heightmap, the same algorithm, parameters and seed always give the same heights
+    :param algorithm: name of the algorithm from terrain_algorithms
+    :param seed: terrain seed
+    :param start: first column
+    :param stop: column after the last one
+    :param params: algorithm parameters
+    :return: read-only array of heights, one per column
+    """
+    heightmaps = cached_world(algorithm, tuple(sorted(params.items())), seed)
+    if (start, stop) not in heightmaps:
+        normalized = terrain_algorithms[algorithm](np.arange(start, stop), seed, **params)
+        heights = (ground_height_max - normalized * (ground_height_max - ground_height_min)).astype(np.int32)
+        heights.flags.writeable = False
+        heightmaps[(start, stop)] = heights
+    return heightmaps[(start, stop)]
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+class TerrainStats:
+    """
+    Class which represents Fenwick trees of heights and of heights weighted by column over the heightmap, giving sums
+    and least squares slopes of any column range in O(log n). Changed columns are applied as differences from the
+    heights seen last, in O(log n) steps for the whole change, the trees are rebuilt when most of the heightmap changed
+    """
+    def __init__(self, heights):
+        """
+        Initialize statistics
+        :param heights: heightmap array, one surface height per column
+        """
+        self.heights = heights
+        self.values = np.zeros(len(heights), dtype=np.int64)
+        # one-based trees, node i covers columns [i - lowbit(i), i)
+        self.sums = np.zeros(len(heights) + 1, dtype=np.int64)
+        self.moments = np.zeros(len(heights) + 1, dtype=np.int64)
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Builds both trees from the whole heightmap in O(n)
+        :return: none
+        """
+        self.values = self.heights.astype(np.int64)
+        nodes = np.arange(1, len(self.heights) + 1)
+        starts = nodes - (nodes & -nodes)
+        for tree, values in ((self.sums, self.values), (self.moments, self.values * np.arange(len(self.heights)))):
+            prefix = np.concatenate(([0], np.cumsum(values)))
+            tree[1:] = prefix[1:] - prefix[starts]
+
+    def update(self, left, right):
+        """
+        Applies changes of heights in columns [left, right) to the trees
+        :param left: first changed column
+        :param right: column after the last changed one
+        :return: none
+        """
+        left, right = max(left, 0), min(right, len(self.heights))
+        if right - left > len(self.heights) // 2:
+            self.rebuild()
+            return
+        deltas = self.heights[left:right].astype(np.int64) - self.values[left:right]
+        changed = np.flatnonzero(deltas)
+        if len(changed) == 0:
+            return
+        self.values[left:right] += deltas
+        columns, deltas = left + changed, deltas[changed]
+        for tree, tree_deltas in ((self.sums, deltas), (self.moments, deltas * columns)):
+            nodes = columns + 1
+            while len(nodes) > 0:
+                np.add.at(tree, nodes, tree_deltas)
+                nodes = nodes + (nodes & -nodes)
+                inside = nodes < len(tree)
+                nodes, tree_deltas = nodes[inside], tree_deltas[inside]
+
+    @staticmethod
+    def prefix(tree, count):
+        """
+        Returns sum of the first columns kept in the tree
+        :param tree: Fenwick tree
+        :param count: number of columns
+        :return: sum
+        """
+        total = 0
+        while count > 0:
+            total += int(tree[count])
+            count &= count - 1
+        return total
+
+    def range_sum(self, left, right):
+        """
+        Returns sum of heights in columns [left, right) inside the heightmap
+        :param left: first column
+        :param right: column after the last one
+        :return: sum of heights
+        """
+        return self.prefix(self.sums, right) - self.prefix(self.sums, left)
+
+    def range_moment(self, left, right):
+        """
+        Returns sum of heights multiplied by their columns in columns [left, right) inside the heightmap
+        :param left: first column
+        :param right: column after the last one
+        :return: sum of column * height
+        """
+        return self.prefix(self.moments, right) - self.prefix(self.moments, left)
+
+    def range_slope(self, left, right):
+        """
+        Returns slope of least squares line fitted to heights in columns [left, right) inside the heightmap
+        :param left: first column
+        :param right: column after the last one
+        :return: change of height per column, positive when ground goes down to the right
+        """
+        count = right - left
+        if count < 2:
+            return 0.0
+        columns_sum = (left + right - 1) * count / 2
+        columns_squares = ((right - 1) * right * (2 * right - 1) - (left - 1) * left * (2 * left - 1)) / 6
+        denominator = count * columns_squares - columns_sum ** 2
+        return (count * self.range_moment(left, right) - columns_sum * self.range_sum(left, right)) / denominator
@@ -0,0 +1,659 @@
+import numpy as np
+from bisect import bisect_right
+from collections import namedtuple
+from math import sin, cos, sqrt, copysign, inf
+from game_core.constants import *
+from game_core.column_spans import is_solid
+from game_core.tank_sprites import turret_angles_number, turret_end_offset_at, turret_angle_index, tank_mask_array, \
+    sprite_origin
+
+# first thing hit by a shell, tank is None when the shell hit the ground
+Impact = namedtuple('Impact', ['time', 'point', 'tank'])
+# impacts of many shells, as arrays of times, (x, y) points and tanks
+Impacts = namedtuple('Impacts', ['times', 'points', 'tanks'])
+# roots computed for the end of a time range may land just past it
+time_tolerance = 1e-9
+# shell fired from inside a tank's box counts as out of it that long after crossing the box side
+box_exit_delay = 1e-6
+
+
+def launch_velocity(power, turret_angle):
+    """
+    Returns initial velocity of a shell
+    :param power: tank's power, from 0 to 100
+    :param turret_angle: turret angle, 0 points straight up
+    :return: (x, y) velocity in pixels per time unit
+    """
+    speed = min_shell_speed + shell_speed_step * power
+    return speed * sin(turret_angle), -speed * cos(turret_angle)
+
+
+def quadratic_roots(a, b, c):
+    """
+    Returns real roots of a * t^2 + b * t + c = 0
+    :param a: quadratic coefficient
+    :param b: linear coefficient
+    :param c: constant coefficient
+    :return: sorted list of roots
+    """
+    if a == 0:
+        return [-c / b] if b != 0 else []
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return []
+    # this form does not lose precision when b is much larger than a * c
+    half = -0.5 * (b + copysign(sqrt(discriminant), b))
+    if half == 0:
+        return [0.0]
+    return sorted((half / a, c / half))
+
+
+class Trajectory:
+    """
+    Class which represents shell flight as analytic parabola, x(t) = x0 + vx * t and y(t) = y0 + vy * t + g * t^2 / 2
+    """
+    def __init__(self, start, velocity, gravity=shell_gravity):
+        """
+        Initialize trajectory
+        :param start: (x, y) coordinates of the shell at time 0
+        :param velocity: (x, y) initial velocity
+        :param gravity: gravity acceleration, pulls towards growing y
+        """
+        self.start = start
+        self.velocity = velocity
+        self.gravity = gravity
+
+    def position(self, time):
+        """
+        Returns position of the shell
+        :param time: time of flight
+        :return: (x, y) coordinates as floats
+        """
+        return (self.start[0] + self.velocity[0] * time,
+                self.start[1] + (self.velocity[1] + self.gravity * time / 2) * time)
+
+    def times_at_y(self, y_coord):
+        """
+        Returns times when the shell is at given height
+        :param y_coord: y coordinate
+        :return: sorted list of times, possibly negative
+        """
+        return quadratic_roots(self.gravity / 2, self.velocity[1], self.start[1] - y_coord)
+
+    def first_time_at_y(self, y_coord, time_from, time_to):
+        """
+        Returns first time in [time_from, time_to] when the shell is at given height
+        :param y_coord: y coordinate
+        :param time_from: start of time range
+        :param time_to: end of time range
+        :return: time or None
+        """
+        for time in self.times_at_y(y_coord):
+            if time_from - time_tolerance <= time <= time_to + time_tolerance:
+                return min(max(time, time_from), time_to)
+        return None
+
+    def x_window(self, left, right, time_from, time_to):
+        """
+        Returns time range when left <= x(t) <= right, clipped to [time_from, time_to]
+        :param left: left x coordinate
+        :param right: right x coordinate
+        :param time_from: start of time range
+        :param time_to: end of time range
+        :return: (start, end) times or None if the shell is never there
+        """
+        if self.velocity[0] == 0:
+            if not left <= self.start[0] <= right:
+                return None
+            return time_from, time_to
+        enter, leave = (left - self.start[0]) / self.velocity[0], (right - self.start[0]) / self.velocity[0]
+        if enter > leave:
+            enter, leave = leave, enter
+        enter, leave = max(enter, time_from), min(leave, time_to)
+        return (enter, leave) if enter <= leave else None
+
+    def end_time(self, width):
+        """
+        Returns time when the shell leaves the world through its side or falls to the bottom of the display
+        :param width: width of the world
+        :return: time
+        """
+        end = max(self.times_at_y(display_height) + [0.0])
+        if end == 0.0:
+            # without gravity the shell may never come down
+            end = inf
+        if self.velocity[0] != 0:
+            end = min(end, ((width if self.velocity[0] > 0 else 0) - self.start[0]) / self.velocity[0])
+        return max(end, 0.0) if end != inf else 0.0
+
+    def speed(self, time):
+        """
+        Returns speed of the shell
+        :param time: time of flight
+        :return: length of velocity vector
+        """
+        return sqrt(self.velocity[0] ** 2 + (self.velocity[1] + self.gravity * time) ** 2)
+
+    def lowest_y(self, time_from, time_to):
+        """
+        Returns the largest y, so the lowest point of the flight, in time range
+        :param time_from: start of time range
+        :param time_to: end of time range
+        :return: y coordinate
+        """
+        # y(t) is convex, so it is the largest at one of the ends
+        return max(self.position(time_from)[1], self.position(time_to)[1])
+
+    def box_entry(self, left, top, right, bottom, time_from, time_to):
+        """
+        Returns first time in [time_from, time_to] when the shell is inside the box
+        :param left: left side of the box
+        :param top: top side of the box
+        :param right: right side of the box
+        :param bottom: bottom side of the box
+        :param time_from: start of time range
+        :param time_to: end of time range
+        :return: time or None
+        """
+        window = self.x_window(left, right, time_from, time_to)
+        if window is None:
+            return None
+        y_coord = self.position(window[0])[1]
+        if top <= y_coord <= bottom:
+            return window[0]
+        return self.first_time_at_y(top if y_coord < top else bottom, *window)
+
+    def box_exit(self, left, top, right, bottom, time_from):
+        """
+        Returns time when the shell, inside the box at time_from, leaves it
+        :param left: left side of the box
+        :param top: top side of the box
+        :param right: right side of the box
+        :param bottom: bottom side of the box
+        :param time_from: time when the shell is inside the box
+        :return: time
+        """
+        exits = [time for y_coord in (top, bottom) for time in self.times_at_y(y_coord) if time > time_from]
+        if self.velocity[0] != 0:
+            exits.append(((right if self.velocity[0] > 0 else left) - self.start[0]) / self.velocity[0])
+        return min(exits)
+
+    def sample(self, time_step, end_time):
+        """
+        Returns positions of the shell along the known path, for drawing the flight
+        :param time_step: time between positions
+        :param end_time: time of the last position
+        :return: list of (time, (x, y)) pairs with integer coordinates, the last one at end_time
+        """
+        times = [step * time_step for step in range(int(end_time / time_step) + 1)]
+        if not times or times[-1] < end_time:
+            times.append(end_time)
+        return [(time, tuple(int(coord) for coord in self.position(time))) for time in times]
+
+
+def column_impact(trajectory, spans, column, time_from, time_to):
+    """
+    Finds exact first time when the shell gets into solid ground of one column
+    :param trajectory: Trajectory object
+    :param spans: solid spans of the column
+    :param column: x coordinate of the column
+    :param time_from: time when the shell enters the column
+    :param time_to: time when the shell leaves the column
+    :return: (time, (x, y)) pair or None
+    """
+    # bottom of the display stops shells like the ground does
+    solids = spans + [display_height, inf]
+    y_coord = trajectory.position(time_from)[1]
+    if is_solid(solids, y_coord):
+        return time_from, (column, int(y_coord))
+    # the shell is in a gap between solid spans, it hits either floor or ceiling of the gap
+    index = bisect_right(solids, y_coord)
+    hits = [(trajectory.first_time_at_y(solids[index], time_from, time_to), solids[index])]
+    if index > 0:
+        hits.append((trajectory.first_time_at_y(solids[index - 1], time_from, time_to), solids[index - 1] - 1))
+    hits = [hit for hit in hits if hit[0] is not None]
+    if not hits:
+        return None
+    time, y_coord = min(hits)
+    return time, (column, int(y_coord))
+
+
+def ground_impact(trajectory, ground, time_to, time_from=0.0):
+    """
+    Finds first impact of the shell with the ground. Heightmap pyramid brackets the columns where the flight gets
+    below the highest ground point, only those columns are solved exactly
+    :param trajectory: Trajectory object
+    :param ground: Ground object
+    :param time_to: end of the flight
+    :param time_from: time from which impacts are looked for
+    :return: (time, (x, y)) pair or None
+    """
+    x_from, x_to = sorted((trajectory.position(time_from)[0], trajectory.position(time_to)[0]))
+    first, last = max(int(x_from), 0), min(int(x_to), ground.width - 1)
+    if first > last:
+        return None
+    ground.ensure_generated(first, last + 1)
+    if trajectory.velocity[0] == 0:
+        # column boundaries would put vertical shell into two columns
+        return column_impact(trajectory, ground.get_column_spans(first), first, time_from, time_to)
+    levels = ground.index.levels
+    forward = trajectory.velocity[0] >= 0
+    stack = [(len(levels) - 1, 0)]
+    while stack:
+        level, index = stack.pop()
+        node_first = max(index << level, first)
+        node_last = min(((index + 1) << level) - 1, last)
+        if node_first > node_last:
+            continue
+        window = trajectory.x_window(node_first, node_last + 1, time_from, time_to)
+        if window is None or trajectory.lowest_y(*window) < levels[level][index]:
+            continue
+        if level > 0:
+            children = [(level - 1, 2 * index + 1), (level - 1, 2 * index)]
+            stack.extend(children if forward else children[::-1])
+            continue
+        hit = column_impact(trajectory, ground.get_column_spans(index), index, *window)
+        if hit is not None:
+            return hit
+    return None
+
+
+def mask_hits(tank, points_x, points_y, mask=None):
+    """
+    Tells which points are on drawn pixels of the tank, turret and wheels included
+    :param tank: Tank object
+    :param points_x: array of integer x coordinates
+    :param points_y: array of integer y coordinates, of the same shape
+    :param mask: boolean array of tank's drawn pixels, made from its sprite if None
+    :return: boolean array of the same shape
+    """
+    if mask is None:
+        mask = tank_mask_array(turret_angle_index(tank.turret_angle))
+    mask_x, mask_y = points_x - tank.position[0] + sprite_origin, points_y - tank.position[1] + sprite_origin
+    inside = (mask_x >= 0) & (mask_x < mask.shape[1]) & (mask_y >= 0) & (mask_y < mask.shape[0])
+    return inside & mask[np.where(inside, mask_y, 0), np.where(inside, mask_x, 0)]
+
+
+def tank_impact(tank, trajectory, time_to, pixel_accurate=False):
+    """
+    Finds first impact of the shell with the tank
+    :param tank: Tank object
+    :param trajectory: Trajectory object
+    :param time_to: end of the flight
+    :param pixel_accurate: flag if drawn pixels, turret and wheels included, are hit instead of tank body box
+    :return: (time, (x, y)) pair or None
+    """
+    box = tank.get_bounding_box() if pixel_accurate else tank.get_body_box()
+    time_from = 0.0
+    if box[0] <= trajectory.start[0] <= box[2] and box[1] <= trajectory.start[1] <= box[3]:
+        # shell is fired from inside the box, it is its own tank
+        time_from = trajectory.box_exit(*box, time_from) + box_exit_delay
+    entry = trajectory.box_entry(*box, time_from, time_to)
+    if entry is None:
+        return None
+    if not pixel_accurate:
+        return entry, tuple(int(coord) for coord in trajectory.position(entry))
+    leave = min(trajectory.box_exit(*box, entry), time_to)
+    # speed is the largest at one of the ends, so samples of the arc inside the box are at most a pixel apart
+    samples = int(min(max(trajectory.speed(entry), trajectory.speed(leave)) * (leave - entry), max_mask_samples)) + 2
+    times = np.linspace(entry, leave, samples)
+    points_x = (trajectory.start[0] + trajectory.velocity[0] * times).astype(np.int64)
+    points_y = trajectory.start[1] + (trajectory.velocity[1] + trajectory.gravity * times / 2) * times
+    points_y = points_y.astype(np.int64)
+    hits = mask_hits(tank, points_x, points_y)
+    if not hits.any():
+        return None
+    first = int(np.argmax(hits))
+    return float(times[first]), (int(points_x[first]), int(points_y[first]))
+
+
+def first_impact(trajectory, ground, tank_index=None, pixel_accurate=False):
+    """
+    Finds what the shell hits first
+    :param trajectory: Trajectory object
+    :param ground: Ground object
+    :param tank_index: TankIndex object with tanks which may be hit, only ground is checked if None
+    :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+    :return: Impact or None if the shell leaves the world
+    """
+    time_to = trajectory.end_time(ground.width)
+    hit = ground_impact(trajectory, ground, time_to)
+    target = None
+    if hit is not None:
+        time_to = hit[0]
+    if tank_index is not None:
+        (x_from, _), (x_to, _) = trajectory.position(0.0), trajectory.position(time_to)
+        for tank in tank_index.query(min(x_from, x_to), -inf, max(x_from, x_to), inf):
+            tank_hit = tank_impact(tank, trajectory, time_to, pixel_accurate)
+            if tank_hit is not None and (hit is None or tank_hit[0] < hit[0]):
+                hit, target = tank_hit, tank
+    if hit is None:
+        return None
+    return Impact(hit[0], hit[1], target)
+
+
+# columns of heightmap pyramid blocks which bracket impacts of many shots at once
+batch_block_level = 5
+# shots solved together, bounds memory taken by shots x blocks arrays
+batch_size = 4096
+# samples along an arc inside tank's box, a pixel apart, are capped for shells crawling through it
+max_mask_samples = 1024
+# x velocity of vertical shells in batches, keeps time windows finite without moving the shell to another column
+vertical_drift = 1e-9
+turret_end_offsets = np.array([turret_end_offset_at(index) for index in range(turret_angles_number)], dtype=np.float64)
+
+
+def larger_root_at_y(starts_y, velocities_y, gravity, y_coords):
+    """
+    Returns later times when shells are at given heights, shells are falling then
+    :param starts_y: array of start y coordinates
+    :param velocities_y: array of initial y velocities
+    :param gravity: gravity acceleration
+    :param y_coords: array of y coordinates
+    :return: array of times, nan where shell never gets that low
+    """
+    with np.errstate(invalid='ignore'):
+        return (-velocities_y + np.sqrt(velocities_y ** 2 - 2 * gravity * (starts_y - y_coords))) / gravity
+
+
+def smaller_root_at_y(starts_y, velocities_y, gravity, y_coords):
+    """
+    Returns earlier times when shells are at given heights, shells are rising then
+    :param starts_y: array of start y coordinates
+    :param velocities_y: array of initial y velocities
+    :param gravity: gravity acceleration
+    :param y_coords: array of y coordinates
+    :return: array of times, nan where shell never gets that high
+    """
+    with np.errstate(invalid='ignore'):
+        return (-velocities_y - np.sqrt(velocities_y ** 2 - 2 * gravity * (starts_y - y_coords))) / gravity
+
+
+def x_windows(starts_x, velocities_x, lefts, rights, ends):
+    """
+    Returns time ranges when shells are between lefts and rights
+    :param starts_x: array of start x coordinates
+    :param velocities_x: array of x velocities, none of them 0
+    :param lefts: array of left x coordinates
+    :param rights: array of right x coordinates
+    :param ends: array of flight end times
+    :return: arrays of range starts and ends, start is larger than end where shell is never there
+    """
+    enter, leave = (lefts - starts_x) / velocities_x, (rights - starts_x) / velocities_x
+    earlier = np.minimum(enter, leave)
+    np.maximum(enter, leave, out=leave)
+    np.maximum(earlier, 0.0, out=earlier)
+    np.minimum(leave, ends, out=leave)
+    return earlier, leave
+
+
+def batch_column_impacts(shots, ground, ends, blocks):
+    """
+    Solves exactly impacts of shells with columns of one pyramid block for each shell
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays of shells
+    :param ground: Ground object
+    :param ends: array of flight end times
+    :param blocks: array of block numbers, one per shell
+    :return: arrays of impact times, inf where the shell passes over the block, and impact (x, y) points
+    """
+    starts_x, starts_y, velocities_x, velocities_y = (shot[:, np.newaxis] for shot in shots)
+    gravity = shell_gravity
+    columns = blocks[:, np.newaxis] * (1 << batch_block_level) + np.arange(1 << batch_block_level)
+    valid_columns = columns < ground.width
+    np.minimum(columns, ground.width - 1, out=columns)
+    enter, leave = x_windows(starts_x, velocities_x, columns, columns + 1, ends[:, np.newaxis])
+    heights = ground.heights[columns]
+    y_enter = starts_y + (velocities_y + gravity * enter / 2) * enter
+    y_leave = starts_y + (velocities_y + gravity * leave / 2) * leave
+    inside = valid_columns & (enter <= leave)
+    # y is convex in time, so a shell above the column top at both ends stays above it
+    at_enter = inside & (y_enter >= heights)
+    crossing = inside & ~at_enter & (y_leave >= heights)
+    times = np.where(at_enter, enter, np.where(crossing, larger_root_at_y(starts_y, velocities_y, gravity, heights),
+                                               np.inf))
+    best = np.argmin(times, axis=1)
+    rows = np.arange(len(blocks))
+    points = np.stack((columns[rows, best], np.where(at_enter, y_enter, heights)[rows, best].astype(np.int64)), axis=1)
+    return times[rows, best], points
+
+
+def batch_ground_impacts(shots, ground, ends):
+    """
+    Finds first impacts of many shells with the ground. Shells march together over pyramid blocks along their
+    flight, block minimum brackets impacts and columns of bracketing blocks are solved exactly
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param ground: Ground object
+    :param ends: array of flight end times
+    :return: arrays of impact times, inf for no impact, and impact (x, y) points
+    """
+    starts_x, starts_y, velocities_x, velocities_y = shots
+    gravity = shell_gravity
+    block_width = 1 << batch_block_level
+    blocks_number = -(-ground.width // block_width)
+    block_heights = ground.index.levels[batch_block_level][:blocks_number]
+    times = np.full(len(ends), np.inf)
+    points = np.zeros((len(ends), 2), dtype=np.int64)
+    directions = np.where(velocities_x > 0, 1, -1)
+    blocks = np.clip(starts_x // block_width, 0, blocks_number - 1).astype(np.int64)
+    active = np.arange(len(ends))
+    while len(active) > 0:
+        block = blocks[active]
+        enter, leave = x_windows(starts_x[active], velocities_x[active], block * block_width,
+                                 (block + 1) * block_width, ends[active])
+        shot_y, shot_vy = starts_y[active], velocities_y[active]
+        lowest = np.maximum(shot_y + (shot_vy + gravity * enter / 2) * enter,
+                            shot_y + (shot_vy + gravity * leave / 2) * leave)
+        candidates = (enter <= leave) & (lowest >= block_heights[block])
+        if candidates.any():
+            solved = active[candidates]
+            part_times, part_points = batch_column_impacts(tuple(shot[solved] for shot in shots), ground,
+                                                           ends[solved], block[candidates])
+            times[solved], points[solved] = part_times, part_points
+        # shells which passed the block go on to the next one, until they leave the world or land
+        blocks[active] += directions[active]
+        following = blocks[active]
+        going = (enter <= leave) & ~(candidates & np.isfinite(times[active])) & (following >= 0) & \
+            (following < blocks_number) & (leave < ends[active])
+        active = active[going]
+
+    # shells getting into columns with caves through their side may fly on through a gap, solved one by one from
+    # the first column where they are below the ground top
+    if ground.spans:
+        for shot in np.nonzero(np.isfinite(times))[0]:
+            column = int(points[shot, 0])
+            if column in ground.spans and not is_solid(ground.spans[column], points[shot, 1]):
+                trajectory = Trajectory((shots[0][shot], shots[1][shot]), (shots[2][shot], shots[3][shot]))
+                hit = ground_impact(trajectory, ground, ends[shot], times[shot])
+                times[shot], points[shot] = (hit[0], hit[1]) if hit is not None else (np.inf, (0, 0))
+    return times, points
+
+
+def batch_box_exits(shots, box, times_from, leave):
+    """
+    Returns times when shells, inside the box at times_from, leave it
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param box: (left, top, right, bottom) box
+    :param times_from: array of times when shells are inside the box
+    :param leave: array of times when shells leave x range of the box
+    :return: array of times
+    """
+    starts_x, starts_y, velocities_x, velocities_y = shots
+    _, top, _, bottom = box
+    # shells get out through the top while rising and through the bottom while falling
+    through_top = smaller_root_at_y(starts_y, velocities_y, shell_gravity, top)
+    through_bottom = larger_root_at_y(starts_y, velocities_y, shell_gravity, bottom)
+    with np.errstate(invalid='ignore'):
+        return np.fmin(leave, np.fmin(np.where(through_top > times_from, through_top, np.nan),
+                                      np.where(through_bottom > times_from, through_bottom, np.nan)))
+
+
+def batch_mask_impacts(shots, tank, enter, leave, mask=None):
+    """
+    Finds first drawn pixels of the tank hit by shells, sampling the arcs inside tank's box at most a pixel apart
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays of shells getting into the box
+    :param tank: Tank object
+    :param enter: array of times when shells get into the box
+    :param leave: array of times when shells leave the box
+    :param mask: boolean array of tank's drawn pixels, made from its sprite if None
+    :return: arrays of impact times, inf for no impact, and impact (x, y) points
+    """
+    starts_x, starts_y, velocities_x, velocities_y = (shot[:, np.newaxis] for shot in shots)
+    speeds = np.sqrt(velocities_x[:, 0] ** 2 + np.maximum(np.abs(velocities_y[:, 0] + shell_gravity * enter),
+                                                           np.abs(velocities_y[:, 0] + shell_gravity * leave)) ** 2)
+    samples = int(min(np.max(speeds * (leave - enter), initial=0), max_mask_samples)) + 2
+    times = enter[:, np.newaxis] + (leave - enter)[:, np.newaxis] * np.linspace(0, 1, samples)
+    points_x = (starts_x + velocities_x * times).astype(np.int64)
+    points_y = (starts_y + (velocities_y + shell_gravity * times / 2) * times).astype(np.int64)
+    hits = mask_hits(tank, points_x, points_y, mask)
+    first = np.argmax(hits, axis=1)
+    rows = np.arange(len(enter))
+    found = hits[rows, first]
+    return (np.where(found, times[rows, first], np.inf),
+            np.stack((points_x[rows, first], points_y[rows, first]), axis=1))
+
+
+def batch_tank_impacts(shots, tank, ends, pixel_accurate=False, mask=None):
+    """
+    Finds first impacts of many shells with one tank
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param tank: Tank object
+    :param ends: array of times until which impacts are looked for
+    :param pixel_accurate: flag if drawn pixels, turret and wheels included, are hit instead of tank body box
+    :param mask: boolean array of tank's drawn pixels, made from its sprite if None
+    :return: arrays of impact times, inf for no impact, and impact (x, y) points
+    """
+    starts_x, starts_y, velocities_x, velocities_y = shots
+    gravity = shell_gravity
+    box = left, top, right, bottom = tank.get_bounding_box() if pixel_accurate else tank.get_body_box()
+    enter, leave = x_windows(starts_x, velocities_x, left, right, ends)
+    started_inside = (left <= starts_x) & (starts_x <= right) & (top <= starts_y) & (starts_y <= bottom)
+    if started_inside.any():
+        # shell fired from inside the box is its own tank's, it may only fall back in after leaving the box
+        enter = np.where(started_inside, batch_box_exits(shots, box, enter, leave) + box_exit_delay, enter)
+    y_enter = starts_y + (velocities_y + gravity * enter / 2) * enter
+    inside = enter <= leave
+    # shells above the box get in through its top while falling, shells below it through its bottom while rising
+    top_time = larger_root_at_y(starts_y, velocities_y, gravity, top)
+    bottom_time = smaller_root_at_y(starts_y, velocities_y, gravity, bottom)
+    with np.errstate(invalid='ignore'):
+        times = np.where(inside & (top <= y_enter) & (y_enter <= bottom), enter,
+                         np.where(inside & (y_enter < top) & (enter <= top_time) & (top_time <= leave), top_time,
+                                  np.where(inside & (y_enter > bottom) & (enter <= bottom_time) &
+                                           (bottom_time <= leave), bottom_time, np.inf)))
+        points = np.stack((starts_x + velocities_x * times,
+                           starts_y + (velocities_y + gravity * times / 2) * times), axis=1)
+    points = np.where(np.isfinite(times)[:, np.newaxis], points, 0).astype(np.int64)
+    if pixel_accurate:
+        entered = np.nonzero(np.isfinite(times))[0]
+        part_shots = tuple(shot[entered] for shot in shots)
+        exits = np.minimum(batch_box_exits(part_shots, box, times[entered], leave[entered]), ends[entered])
+        times[entered], points[entered] = batch_mask_impacts(part_shots, tank, times[entered], exits, mask)
+    return times, points
+
+
+def batch_impacts(tank, angles, powers, ground, tank_index=None, pixel_accurate=False, masks=None):
+    """
+    Finds what shells fired by the tank hit, for many turret angles and powers at once, with the same physics as
+    first_impact
+    :param tank: Tank object firing the shells
+    :param angles: array of turret angles
+    :param powers: array of powers, broadcast against angles
+    :param ground: Ground object
+    :param tank_index: TankIndex object with tanks which may be hit, only ground is checked if None
+    :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+    :param masks: dict of boolean arrays of drawn pixels by tank, masks are made from sprites for missing tanks
+    :return: Impacts of the broadcast shape, time is inf and tank is None for shells which leave the world
+    """
+    shape = np.broadcast(np.asarray(angles), np.asarray(powers)).shape
+    impacts = batch_flight_impacts(tank_shots(tank, angles, powers), ground, tank_index, pixel_accurate, masks)
+    return Impacts(impacts.times.reshape(shape), impacts.points.reshape(shape + (2,)), impacts.tanks.reshape(shape))
+
+
+def tank_shots(tank, angles, powers):
+    """
+    Returns starts and velocities of shells fired by the tank
+    :param tank: Tank object firing the shells
+    :param angles: array of turret angles
+    :param powers: array of powers, broadcast against angles
+    :return: (starts_x, starts_y, velocities_x, velocities_y) flat arrays
+    """
+    angles, powers = np.broadcast_arrays(np.asarray(angles, dtype=np.float64), np.asarray(powers, dtype=np.float64))
+    angles, powers = angles.ravel(), powers.ravel()
+    indices = np.clip(np.round((angles + pi / 2) / angle_step).astype(np.int64), 0, turret_angles_number - 1)
+    speeds = min_shell_speed + shell_speed_step * powers
+    return (tank.position[0] + turret_end_offsets[indices, 0], tank.position[1] + turret_end_offsets[indices, 1],
+            speeds * np.sin(angles), -speeds * np.cos(angles))
+
+
+def flights_columns(shots, width):
+    """
+    Returns range of columns shells fly over until they leave the world, whatever they hit on the way
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param width: width of the world
+    :return: (left, right) range of columns, it may reach outside the world
+    """
+    starts_x = np.asarray(shots[0], dtype=np.float64)
+    if starts_x.size == 0:
+        return 0, 0
+    ends_x = starts_x + np.asarray(shots[2], dtype=np.float64) * batch_end_times(shots, width)
+    return int(np.floor(min(starts_x.min(), ends_x.min()))), int(max(starts_x.max(), ends_x.max())) + 1
+
+
+def batch_flight_impacts(shots, ground, tank_index=None, pixel_accurate=False, masks=None):
+    """
+    Finds what shells flying from any points hit, with the same physics as first_impact
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param ground: Ground object
+    :param tank_index: TankIndex object with tanks which may be hit, only ground is checked if None
+    :param pixel_accurate: flag if drawn pixels of tanks are hit instead of tank body boxes
+    :param masks: dict of boolean arrays of drawn pixels by tank, masks are made from sprites for missing tanks
+    :return: Impacts of the shells, time is inf and tank is None for shells which leave the world
+    """
+    starts_x, starts_y, velocities_x, velocities_y = (np.asarray(shot, dtype=np.float64).ravel() for shot in shots)
+    # vertical shells drift by a negligible distance instead, so they stay in the column they start in
+    velocities_x = np.where(velocities_x == 0, vertical_drift, velocities_x)
+    shots = (starts_x, starts_y, velocities_x, velocities_y)
+    times = np.full(len(starts_x), np.inf)
+    points = np.zeros((len(starts_x), 2), dtype=np.int64)
+    targets = np.full(len(starts_x), None, dtype=object)
+    for first in range(0, len(starts_x), batch_size):
+        part = slice(first, first + batch_size)
+        part_shots = tuple(shot[part] for shot in shots)
+        ends = batch_end_times(part_shots, ground.width)
+        # only chunks under the flights are generated
+        ground.ensure_generated(*flights_columns(part_shots, ground.width))
+        part_times, part_points = batch_ground_impacts(part_shots, ground, ends)
+        if tank_index is not None:
+            # flights end on the ground or out of the world, only tanks within their x extent may be hit
+            flight_ends = np.minimum(part_times, ends)
+            ends_x = part_shots[0] + part_shots[2] * flight_ends
+            lefts, rights = np.minimum(part_shots[0], ends_x), np.maximum(part_shots[0], ends_x)
+            for target in tank_index.query(lefts.min(), -inf, rights.max(), inf):
+                left, _, right, _ = tank_index.boxes[target]
+                near = np.flatnonzero((lefts <= right) & (rights >= left))
+                if len(near) == 0:
+                    continue
+                tank_times, tank_points = batch_tank_impacts(tuple(shot[near] for shot in part_shots), target,
+                                                             flight_ends[near], pixel_accurate,
+                                                             None if masks is None else masks.get(target))
+                closer = tank_times < part_times[near]
+                hit = near[closer]
+                part_times[hit], part_points[hit] = tank_times[closer], tank_points[closer]
+                targets[first + hit] = target
+        times[part], points[part] = part_times, part_points
+    return Impacts(times, points, targets)
+
+
+def batch_end_times(shots, width):
+    """
+    Returns times when shells leave the world through its side or fall to the bottom of the display
+    :param shots: (starts_x, starts_y, velocities_x, velocities_y) arrays
+    :param width: width of the world
+    :return: array of times
+    """
+    starts_x, starts_y, velocities_x, velocities_y = (np.asarray(shot, dtype=np.float64) for shot in shots)
+    ends = larger_root_at_y(starts_y, velocities_y, shell_gravity, display_height)
+    # vertical shells never reach a side
+    sides = np.divide(np.where(velocities_x > 0, width - starts_x, -starts_x), velocities_x,
+                      out=np.full(velocities_x.shape, inf), where=velocities_x != 0)
+    return np.maximum(np.minimum(ends, sides), 0.0)
@@ -0,0 +1,69 @@
+class TurnRing:
+    """
+    Class which represents circular turn order, kept as doubly linked ring in dictionaries, so that advancing the
+    turn and removing any member take O(1)
+    """
+    def __init__(self, members=()):
+        """
+        Initialize ring
+        :param members: members in turn order, the first one has the first turn
+        """
+        self.next = {}
+        self.previous = {}
+        self.current = None
+        for member in members:
+            self.add(member)
+
+    def __len__(self):
+        return len(self.next)
+
+    def __contains__(self, member):
+        return member in self.next
+
+    def __iter__(self):
+        """
+        Iterates over members in turn order, starting from the current one
+        """
+        member = self.current
+        for _ in range(len(self.next)):
+            yield member
+            member = self.next[member]
+
+    def add(self, member):
+        """
+        Adds member at the end of turn order, just before the current one
+        :param member: new member
+        :return: none
+        """
+        if self.current is None:
+            self.next[member] = self.previous[member] = member
+            self.current = member
+            return
+        last = self.previous[self.current]
+        self.next[last] = self.previous[self.current] = member
+        self.next[member], self.previous[member] = self.current, last
+
+    def remove(self, member):
+        """
+        Removes member, if it was the current one its successor becomes current
+        :param member: removed member
+        :return: none
+        """
+        if member not in self.next:
+            return
+        following, preceding = self.next.pop(member), self.previous.pop(member)
+        if following == member:
+            self.current = None
+            return
+        self.next[preceding], self.previous[following] = following, preceding
+        if self.current == member:
+            self.current = following
+
+    def advance(self):
+        """
+        Passes the turn to the next member
+        :return: new current member
+        """
+        if self.current is not None:
+            self.current = self.next[self.current]
+        return self.current
@@ -75,17 +75,28 @@ def animate_explosion(game_display, start_point, sound, size=50):
     :param sound: sound of explosion
     :return: none
     """
+    animate_explosions(game_display, [(start_point, size)], sound)
+
+
+def animate_explosions(game_display, explosions, sound):
+    """
+    Animates simultaneous explosions together, so many explosions take as long as the largest one
+    :param game_display: display to operate with
+    :param explosions: list of ((x, y), size) pairs, coordinates and power (radius) of explosions
+    :param sound: sound of explosions, played once
+    :return: none
+    """
     clock = pygame.time.Clock()
     pygame.mixer.Sound.play(sound)
-    explode = True
     color_choices = [white, red, green, blue, nice_color]
-    while explode:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                halt_whole_game()
-
-        magnitude = 1
-        while magnitude < size:
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            halt_whole_game()
+
+    for magnitude in range(1, max([size for _, size in explosions], default=0)):
+        for start_point, size in explosions:
+            if magnitude >= size:
+                continue
             exploding_bit_x = start_point[0] + random.randrange(-1*magnitude, magnitude)
             exploding_bit_y = start_point[1] + random.randrange(-1*magnitude, magnitude)
 
@@ -93,43 +104,39 @@ def animate_explosion(game_display, start_point, sound, size=50):
                                random.choice(color_choices),
                                (exploding_bit_x, exploding_bit_y),
                                random.randrange(1, 5))
-            magnitude += 1
-            pygame.display.update()
-            clock.tick(100)
-
-        explode = False
+        pygame.display.update()
+        clock.tick(100)
 
 
-def animate_ground_sloughing(game_display, left_ground, ground):
+def animate_ground_sloughing(game_display, left_ground, ground, x_offset=0):
     """
-    Animates ground sloughing
+    Animates ground sloughing, sampling precomputed fall of all pieces by elapsed time
     :param game_display: display to operate with
     :param left_ground: list of all ground pieces to slough
     :param ground: Ground object
+    :param x_offset: horizontal shift from world to display coordinates
     :return: none
     """
     clock = pygame.time.Clock()
-    normalized = 0
-    while normalized < len(left_ground):
-        normalized = 0
+    solution = ground.solve_sloughing(left_ground)
+    columns = (solution.columns + x_offset).tolist()
+    previous_tops = solution.tops.tolist()
+    start_time = pygame.time.get_ticks()
+    finished = False
+    while not finished:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 halt_whole_game()
 
-        for line in left_ground:
-            pygame.draw.line(game_display,
-                             black,
-                             line[0],
-                             line[1])
-            if line[0][1] == ground.get_ground_height_at_point(line[0][0]):
-                normalized += 1
-            else:
-                line[0][1] += 1
-                line[1][1] += 1
-            pygame.draw.line(game_display,
-                             dark_green,
-                             line[0],
-                             line[1])
+        elapsed_time = (pygame.time.get_ticks() - start_time) / 1000
+        finished = solution.is_finished(elapsed_time)
+        tops, bottoms = solution.sample(elapsed_time)
+        tops, bottoms = tops.tolist(), bottoms.tolist()
+        for column, previous_top, top, bottom in zip(columns, previous_tops, tops, bottoms):
+            if top > previous_top:
+                pygame.draw.line(game_display, black, (column, previous_top), (column, top - 1))
+            pygame.draw.line(game_display, dark_green, (column, top), (column, bottom - 1))
+        previous_tops = tops
 
         pygame.display.update()
         clock.tick(100)
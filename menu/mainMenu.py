@@ -4,6 +4,8 @@ from game_core import constants
 from menu.option import Option, GroupedOptions
 from libs.pyIgnition import particleEffect, particles
 from game_core.game_manager import GameManager
+from game_core.terrain_generator import terrain_algorithms
+from game_core.map_library import MapLibrary
 
 effect_length = 1200
 effectTimeTable = (
@@ -52,6 +54,9 @@ light = pygame.transform.scale(light, (300, 300))
 bg = pygame.image.load("assets/images/background.jpg")
 bg = pygame.transform.scale(bg, size)
 
+# reason why the last game could not start, shown under main menu options
+start_error = ""
+
 
 def get_option_text(const, variable=""):
     """
@@ -86,10 +91,8 @@ def change_tanks():
     Changes number of tanks in settings
     :return: none
     """
-    if constants.tanks_number >= constants.max_tanks_number:
-        constants.tanks_number = 1
-    else:
-        constants.tanks_number += 1
+    larger = [number for number in constants.tanks_numbers if number > constants.tanks_number]
+    constants.tanks_number = larger[0] if larger else constants.tanks_numbers[0]
 
 
 def change_players():
@@ -97,18 +100,111 @@ def change_players():
     Changes number of players in settings
     :return: none
     """
-    if constants.players_number >= constants. max_players_number:
-        constants.players_number = 2
+    larger = [number for number in constants.players_numbers if number > constants.players_number]
+    constants.players_number = larger[0] if larger else constants.players_numbers[0]
+
+
+def change_computers():
+    """
+    Changes number of players the game plays for in settings
+    :return: none
+    """
+    constants.computer_players = (constants.computer_players + 1) % (constants.players_number + 1)
+
+
+def change_level():
+    """
+    Changes level of computer players in settings
+    :return: none
+    """
+    names = list(constants.computer_levels)
+    constants.computer_level = names[(names.index(constants.computer_level) + 1) % len(names)]
+
+
+def change_preview():
+    """
+    Switches predicted flight of the active tank's shell in settings
+    :return: none
+    """
+    constants.aim_preview = not constants.aim_preview
+
+
+def change_overhangs():
+    """
+    Switches craters leaving overhangs and tunnels in settings
+    :return: none
+    """
+    constants.ground_overhangs = not constants.ground_overhangs
+
+
+def change_granular():
+    """
+    Switches loose ground sliding down slopes in settings
+    :return: none
+    """
+    constants.granular_terrain = not constants.granular_terrain
+
+
+def change_occlusion():
+    """
+    Switches ground covering tanks from explosions in settings
+    :return: none
+    """
+    constants.damage_occlusion = not constants.damage_occlusion
+
+
+def change_terrain():
+    """
+    Changes terrain generation algorithm in settings
+    :return: none
+    """
+    names = list(terrain_algorithms)
+    constants.terrain_algorithm = names[(names.index(constants.terrain_algorithm) + 1) % len(names)]
+
+
+def change_world():
+    """
+    Changes width of the battlefield in settings, in screens
+    :return: none
+    """
+    if constants.world_screens >= constants.max_world_screens:
+        constants.world_screens = 1
     else:
-        constants.players_number += 1
+        constants.world_screens *= 2
+
+
+def change_map():
+    """
+    Changes map from map library in settings, randomly generated ground goes before the first map
+    :return: none
+    """
+    names = [None] + MapLibrary(constants.maps_directory).names()
+    if constants.map_name not in names:
+        constants.map_name = None
+    constants.map_name = names[(names.index(constants.map_name) + 1) % len(names)]
 
 
 def start_game():
     """
-    Function under New Game button
+    Function under New Game button, settings the game cannot start with, like more tanks than fit on the chosen map,
+    are reported on the menu instead
     :return: none
     """
-    GameManager(constants.players_number, constants.tanks_number).run()
+    global start_error
+    try:
+        game = GameManager(constants.players_number, constants.tanks_number, constants.ground_overhangs,
+                           constants.terrain_algorithm, constants.terrain_seed,
+                           constants.display_width * constants.world_screens, constants.map_name,
+                           constants.granular_terrain, constants.damage_occlusion, constants.pixel_accurate_collision,
+                           constants.computer_players, constants.computer_level, constants.aim_preview)
+    except ValueError as error:
+        start_error = str(error).upper()
+    else:
+        start_error = ""
+        game.run()
+    # message option is centered again for its new text
+    for option in mainMenu.options:
+        option.set_rect()
 
 
 def draw_black_screen_effect():
@@ -133,19 +229,42 @@ def init_menu():
     # initialize fonts
     menu_font = pygame.font.Font('assets/fonts/DeathFromAbove.ttf', 40)
     title_font = pygame.font.Font('assets/fonts/DeathFromAbove.ttf', 100)
+    message_font = pygame.font.Font('assets/fonts/DeathFromAbove.ttf', 20)
 
     # initialize menu options
     first, space = 250, 60
+    # settings have more options, their rows are closer so that all of them fit on display
+    row = 52
 
     mainMenu.add(Option(lambda: get_option_text("SCORCHED  EARTH"), 20, empty_func, title_font))
     mainMenu.add(Option(lambda: get_option_text("NEW  GAME"), first, start_game, menu_font))
     mainMenu.add(Option(lambda: get_option_text("SETTINGS"), (first + space), go_to_settings, menu_font))
     mainMenu.add(Option(lambda: get_option_text("EXIT"), (first + (space * 2)), sys.exit, menu_font))
+    mainMenu.add(Option(lambda: get_option_text(start_error), (first + (space * 3)), empty_func, message_font))
 
     settingsMenu.add(Option(lambda: get_option_text("SCORCHED  EARTH"), 20, empty_func, title_font))
     settingsMenu.add(Option(lambda: get_option_text("PLAYERS  :  ", constants.players_number), first, change_players, menu_font))
-    settingsMenu.add(Option(lambda: get_option_text("TANKS  :  ", constants.tanks_number), (first + space), change_tanks, menu_font))
-    settingsMenu.add(Option(lambda: get_option_text("BACK"), (first + (space * 2)), go_to_main_menu, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("TANKS  :  ", constants.tanks_number), (first + row), change_tanks, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("OVERHANGS  :  ", "ON" if constants.ground_overhangs else "OFF"),
+                            (first + (row * 2)), change_overhangs, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("TERRAIN  :  ", constants.terrain_algorithm.upper()),
+                            (first + (row * 3)), change_terrain, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("WORLD  :  ", constants.world_screens),
+                            (first + (row * 4)), change_world, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("MAP  :  ", (constants.map_name or "random").upper()),
+                            (first + (row * 5)), change_map, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("SAND  :  ", "ON" if constants.granular_terrain else "OFF"),
+                            (first + (row * 6)), change_granular, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("COVER  :  ", "ON" if constants.damage_occlusion else "OFF"),
+                            (first + (row * 7)), change_occlusion, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("COMPUTERS  :  ", min(constants.computer_players,
+                                                                          constants.players_number)),
+                            (first + (row * 8)), change_computers, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("LEVEL  :  ", constants.computer_level.upper()),
+                            (first + (row * 9)), change_level, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("PREVIEW  :  ", "ON" if constants.aim_preview else "OFF"),
+                            (first + (row * 10)), change_preview, menu_font))
+    settingsMenu.add(Option(lambda: get_option_text("BACK"), (first + (row * 11)), go_to_main_menu, menu_font))
 
     displayMenu = mainMenu
 
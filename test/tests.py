@@ -1,8 +1,32 @@
 import os
+import tempfile
 import unittest
+import warnings
+from math import inf
+from random import Random
 import pygame
+import numpy as np
 from menu.option import Option
 from game_core.tank import Tank
+from game_core.tank_sprites import turret_angle_index, tank_sprite, draw_tank_shape, sprite_origin, \
+    turret_end_offset, highlight_color, turret_angles_number, tank_mask_array
+from game_core.ground import Ground, merge_intervals, intervals_overlap
+from game_core.player import Player
+from game_core.camera import Camera
+from game_core.tank_index import TankIndex
+from game_core.spawn_allocator import SpawnAllocator, spawn_width
+from game_core.turn_ring import TurnRing
+from game_core.hud import Hud, health_bars_layout, players_colors
+from game_core.trajectory import Trajectory, first_impact, launch_velocity, quadratic_roots, batch_impacts
+from game_core.granular import GranularFlow
+from game_core.terrain_stats import TerrainStats
+from game_core.explosions import overlapping_groups, explosion_damages, damage_matrix
+from game_core.shot_search import ShotSearch, search_shot, tanks_rows
+from game_core.aim_preview import AimPreview
+from game_core.projectiles import Projectiles
+from game_core.map_library import MapLibrary, MapFile, map_file_name, save_map
+from game_core.column_spans import subtract_span, insert_span, landing_height
+from game_core.terrain_generator import terrain_algorithms, generate_heightmap, cached_world
 from game_core.constants import *
 
 os.chdir('..')
@@ -114,6 +138,928 @@ class TankTestCase(unittest.TestCase):
         tank.update_tank_position((200, 200))
         self.assertEquals(tank.position, [200, 200])
 
+    def test_tank_sprite_matches_drawn_tank(self):
+        pygame.init()
+        for angle in (-pi / 2, -pi / 5, 0, pi / 3):
+            drawn, blitted = pygame.Surface((200, 200)), pygame.Surface((200, 200))
+            offset_x, offset_y = turret_end_offset(angle)
+            draw_tank_shape(drawn, red, (100, 100), (100 + offset_x, 100 + offset_y))
+            blitted.blit(tank_sprite(red, turret_angle_index(angle)), (100 - sprite_origin, 100 - sprite_origin))
+            self.assertEqual(pygame.image.tostring(drawn, 'RGB'), pygame.image.tostring(blitted, 'RGB'))
+
+    def test_tank_sprite_cache(self):
+        pygame.init()
+        tank_sprite.cache_clear()
+        tank = Tank(pygame.Surface((200, 200)), (100, 100), (200, 200), red)
+        for _ in range(3):
+            tank.draw_tank()
+            tank.show_tank_special()
+        self.assertEqual(tank_sprite.cache_info().misses, 2)
+        self.assertEqual(tank.get_turret_end_coordinates(),
+                         tuple(map(sum, zip((100, 100), turret_end_offset(tank.turret_angle)))))
+        self.assertEqual(highlight_color(black), (127, 127, 127))
+        self.assertEqual(tank_sprite.cache_info().maxsize, tank_sprites_cache_size)
+
+
+class GroundTestCase(unittest.TestCase):
+
+    def test_ground_heights_generation(self):
+        ground = Ground(None)
+        ground.ensure_generated(0, display_width)
+        self.assertEqual(ground.heights.shape, (display_width,))
+        self.assertTrue(ground.heights.flags['C_CONTIGUOUS'])
+        self.assertTrue(ground.heights.min() >= ground_height_min)
+        self.assertTrue(ground.heights.max() <= ground_height_max)
+
+    def test_ground_points(self):
+        ground = Ground(None, width=4 * display_width)
+        self.assertEqual(len(ground.points), 0)
+        ground.ensure_generated(0, display_width)
+        points = ground.points
+        self.assertEqual(len(points), display_width)
+        self.assertEqual(points[10][0], 10)
+        self.assertEqual(points[10][1], ground.get_ground_height_at_point(10))
+
+    def test_ground_correct_heights(self):
+        ground = Ground(None)
+        ground.correct_heights((100, 140), 600)
+        self.assertEqual(ground.get_ground_height_at_point(100), 600)
+        self.assertEqual(ground.get_ground_height_at_point(139), 600)
+        self.assertEqual(ground.get_ground_height_at_point(-1), display_height)
+
+    def test_ground_crater_from_surface(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        left_ground = ground.update_after_explosion((800, 600), 50)
+        self.assertEqual(left_ground, [])
+        self.assertEqual(ground.get_ground_height_at_point(800), 650)
+        self.assertEqual(ground.get_ground_height_at_point(749), 600)
+        self.assertEqual(ground.get_ground_height_at_point(850), 600)
+
+    def test_ground_crater_leaves_floating_ground(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        left_ground = ground.update_after_explosion((800, 700), 50)
+        self.assertIn([[800, 650], [800, 600]], left_ground)
+        self.assertEqual(ground.get_ground_height_at_point(800), 750)
+        ground.update_after_sloughing(left_ground)
+        self.assertEqual(ground.get_ground_height_at_point(800), 700)
+
+    def test_ground_draw_repaints_changed_columns(self):
+        pygame.init()
+        display = pygame.Surface((display_width, display_height))
+        ground = Ground(display)
+        ground.correct_heights((0, display_width), 600)
+        ground.draw()
+        self.assertEqual(ground.changed_intervals, [])
+        self.assertEqual(display.get_at((800, 620))[:3], dark_green)
+        ground.update_after_explosion((800, 600), 50)
+        self.assertEqual(ground.changed_intervals, [(750, 850)])
+        ground.draw()
+        self.assertEqual(display.get_at((800, 620))[:3], black)
+        self.assertEqual(display.get_at((800, 660))[:3], dark_green)
+
+
+class WorldTestCase(unittest.TestCase):
+
+    def test_chunks_generated_on_demand(self):
+        ground = Ground(None, width=4 * display_width)
+        self.assertFalse(ground.generated.any())
+        ground.get_ground_height_at_point(2 * display_width)
+        self.assertEqual(ground.generated.sum(), 1)
+        ground.window_flatness(100, 100 + chunk_width)
+        self.assertEqual(ground.generated.sum(), 3)
+
+    def test_flights_generate_only_chunks_under_them(self):
+        pygame.init()
+        ground = Ground(None, width=16 * display_width)
+        tank_index = TankIndex()
+        tank = Tank(None, (3000, ground.get_ground_height_at_point(3000) - full_tank_height), (0, 0), red,
+                    tank_index=tank_index)
+        tank.turret_angle = pi / 4
+        AimPreview(ground, tank_index).flight(tank)
+        self.assertTrue(1 < ground.generated.sum() < len(ground.generated))
+        shooter, enemy = Player(None, 1, red, 0, computer_level='hard'), Player(None, 1, green, 1)
+        shooter.active_tanks = [tank]
+        search = ShotSearch(tank, shooter, [shooter, enemy], ground, tank_index, 'hard')
+        generated = ground.generated.copy()
+        self.assertFalse(generated.all())
+        search.start()
+        search.join()
+        self.assertTrue((ground.generated == generated).all())
+
+    def test_chunk_surfaces_evicted(self):
+        pygame.init()
+        display = pygame.Surface((display_width, display_height))
+        camera = Camera(4 * display_width)
+        ground = Ground(display, width=4 * display_width)
+        ground.draw(camera)
+        self.assertEqual(sorted(ground.chunk_surfaces), [0, 1, 2, 3])
+        camera.follow(3 * display_width)
+        ground.draw(camera)
+        ground.evict_chunk_surfaces([100], camera)
+        self.assertEqual(sorted(ground.chunk_surfaces), [0, 1, 10, 11, 12, 13])
+
+    def test_camera_follow(self):
+        camera = Camera(2 * display_width)
+        self.assertFalse(camera.follow(10))
+        self.assertTrue(camera.follow(display_width))
+        self.assertEqual(camera.to_screen((display_width, 5)), (int(display_width / 2), 5))
+        camera.follow(10 * display_width)
+        self.assertEqual(camera.x, display_width)
+
+
+class DirtyRegionTestCase(unittest.TestCase):
+
+    def test_intervals_overlap(self):
+        intervals = merge_intervals([(300, 350), (100, 150), (140, 200)])
+        self.assertEqual(intervals, [(100, 200), (300, 350)])
+        self.assertTrue(intervals_overlap(intervals, 190, 210))
+        self.assertTrue(intervals_overlap(intervals, 340, 400))
+        self.assertFalse(intervals_overlap(intervals, 200, 300))
+        self.assertFalse(intervals_overlap(intervals, 0, 100))
+        self.assertFalse(intervals_overlap([], 0, 100))
+
+    def test_explosion_dirty_interval(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        ground.take_dirty_intervals()
+        ground.update_after_explosion((800, 600), 50)
+        self.assertEqual(ground.take_dirty_intervals(), [(750, 850)])
+        self.assertEqual(ground.take_dirty_intervals(), [])
+
+    def test_only_tanks_over_dirty_interval_corrected(self):
+        pygame.init()
+        pygame.display.set_mode((1, 1))
+        display = pygame.Surface((display_width, display_height))
+        ground = Ground(display)
+        ground.correct_heights((0, display_width), 600)
+        player = Player(display, 2, red, 0)
+        player.active_tanks = [Tank(display, (300, 600 - full_tank_height), (10, 10), red),
+                               Tank(display, (800, 600 - full_tank_height), (10, 10), red)]
+        ground.take_dirty_intervals()
+        ground.update_after_explosion((800, 600), 50)
+        ground.heights[300] = 700
+        player.correct_tanks_heights(ground, ground.take_dirty_intervals())
+        self.assertEqual(player.active_tanks[0].get_tank_position()[1], 600 - full_tank_height)
+        self.assertTrue(player.active_tanks[1].get_tank_position()[1] > 600 - full_tank_height)
+
+    def test_ground_draws_only_dirty_columns(self):
+        pygame.init()
+        display = pygame.Surface((display_width, display_height))
+        ground = Ground(display)
+        ground.draw()
+        rects = ground.draw(None, [(100, 150), (390, 410)])
+        self.assertEqual([(rect.x, rect.width) for rect in rects], [(100, 50), (390, 10), (400, 10)])
+
+
+class OcclusionTestCase(unittest.TestCase):
+
+    def test_explosion_exposure(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 700)
+        ground.correct_heights((790, 810), 500)
+        exposures = ground.explosion_exposure((700, 650), [(760, 650), (860, 650), (700, 600)])
+        self.assertEqual(exposures.tolist()[0], 1.0)
+        self.assertTrue(0 < exposures[1] < 1)
+        self.assertEqual(exposures.tolist()[2], 1.0)
+        self.assertEqual(len(ground.explosion_exposure((700, 650), [])), 0)
+
+    def test_explosion_exposure_through_tunnel(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 700)
+        ground.correct_heights((790, 810), 500)
+        for column in range(790, 810):
+            ground.set_column_spans(column, [500, 640, 660, display_height])
+        self.assertEqual(ground.explosion_exposure((700, 650), [(860, 650)]).tolist(), [1.0])
+
+    def test_covered_tank_damage(self):
+        pygame.init()
+        tank = Tank(None, (100, 600), (10, 10), red)
+        damages = explosion_damages([tank.get_tank_position()], [((100, 650), 40, 100)], [[0.0]])
+        self.assertEqual(damages.tolist(), [int(0.5 * 40 * (1 - occlusion_attenuation))])
+
+
+class TankIndexTestCase(unittest.TestCase):
+
+    def test_tank_index_query(self):
+        pygame.init()
+        tank_index = TankIndex()
+        tanks = [Tank(None, (x, 600), (10, 10), red, tank_index=tank_index) for x in range(100, 1600, 100)]
+        self.assertEqual(len(tank_index), len(tanks))
+        self.assertEqual(tank_index.query(420, 590, 480, 610), [tanks[3], tanks[4]])
+        self.assertEqual(tank_index.query(450, 100, 450, 200), [])
+        self.assertEqual(tank_index.query(620, 500, 620, 700), [tanks[5]])
+
+    def test_tank_index_wide_query_lists_tanks_once(self):
+        pygame.init()
+        tank_index = TankIndex(cell_width=4)
+        tanks = [Tank(None, (x, 600), (10, 10), red, tank_index=tank_index) for x in range(1500, 0, -100)]
+        self.assertEqual(tank_index.query(0, 0, display_width, display_height), tanks[::-1])
+
+    def test_tank_index_update_and_remove(self):
+        pygame.init()
+        tank_index = TankIndex()
+        tank = Tank(None, (500, 600), (10, 10), red, tank_index=tank_index)
+        tank.update_tank_position((500, 700))
+        self.assertEqual(tank_index.query(500, 580, 500, 590), [])
+        self.assertEqual(tank_index.query(500, 690, 500, 700), [tank])
+        tank_index.remove(tank)
+        self.assertEqual(tank_index.query(500, 690, 500, 700), [])
+        self.assertEqual(tank_index.cells, {})
+
+
+class ExplosionsTestCase(unittest.TestCase):
+
+    def test_overlapping_groups(self):
+        craters = [((100, 600), 50), ((400, 600), 50), ((180, 600), 50), ((250, 600), 50)]
+        groups = overlapping_groups(craters)
+        self.assertEqual(groups, [[((100, 600), 50), ((180, 600), 50), ((250, 600), 50)], [((400, 600), 50)]])
+
+    def test_explosion_damages_sum_explosions(self):
+        explosions = [((100, 600), 40, 100), ((150, 620), 30, 50)]
+        positions = [(90, 590), (150, 600), (400, 600)]
+        # first tank is 14 pixels from the first explosion only, second tank 50 and 20 pixels from both
+        self.assertEqual(explosion_damages(positions, explosions).tolist(), [int(86 / 100 * 40), 20 + 18, 0])
+
+    def test_merged_craters_carve(self):
+        merged, sequential = Ground(None), Ground(None)
+        for ground in (merged, sequential):
+            ground.correct_heights((0, display_width), 600)
+        craters = [((800, 600), 50), ((850, 620), 50), ((820, 700), 30)]
+        merged.update_after_explosions(craters)
+        for point, radius in craters:
+            sequential.update_after_explosion(point, radius)
+        self.assertTrue((merged.heights == sequential.heights).all())
+
+    def test_merged_craters_stacked(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 500)
+        left_ground = ground.update_after_explosions([((800, 560), 20), ((800, 610), 20)])
+        self.assertEqual(ground.get_ground_height_at_point(800), 630)
+        self.assertIn([[800, 540], [800, 500]], left_ground)
+        self.assertIn([[800, 590], [800, 580]], left_ground)
+
+
+class SpawnAllocatorTestCase(unittest.TestCase):
+
+    def test_allocator_fills_whole_capacity(self):
+        capacity = SpawnAllocator(display_width, 0).capacity()
+        for seed in range(5):
+            allocator = SpawnAllocator(display_width, capacity, rng=Random(seed))
+            positions = sorted(allocator.allocate() for _ in range(capacity))
+            self.assertTrue(min(np.diff(positions)) >= tank_width + 10)
+            self.assertTrue(positions[0] >= 5 + int(tank_width / 2))
+            self.assertTrue(positions[-1] < display_width - 5 - int(tank_width / 2))
+
+    def test_allocator_fails_fast(self):
+        capacity = SpawnAllocator(display_width, 0).capacity()
+        self.assertRaises(ValueError, SpawnAllocator, display_width, capacity + 1)
+        self.assertRaises(ValueError, SpawnAllocator, display_width, capacity, [800])
+
+    def test_allocator_is_deterministic(self):
+        ground = Ground(None, seed=3)
+        first = [SpawnAllocator(display_width, 10, rng=Random(7)) for _ in range(2)]
+        self.assertEqual([first[0].allocate(ground) for _ in range(10)], [first[1].allocate(ground) for _ in range(10)])
+
+    def test_allocator_prefers_free_slots(self):
+        allocator = SpawnAllocator(display_width, 3, [500])
+        self.assertEqual(allocator.allocate(slots=[510, 900]), 900)
+        self.assertFalse(allocator.is_free(920))
+        self.assertTrue(allocator.is_free(950))
+
+    def test_spawn_width_fits_tanks(self):
+        for tanks in (1, 2, 40, 500):
+            SpawnAllocator(spawn_width(tanks), tanks)
+            self.assertRaises(ValueError, SpawnAllocator, spawn_width(tanks) - 1, tanks)
+
+
+class TurnRingTestCase(unittest.TestCase):
+
+    def test_ring_advances_in_order(self):
+        ring = TurnRing('abc')
+        self.assertEqual([ring.advance() for _ in range(4)], ['b', 'c', 'a', 'b'])
+        self.assertEqual(list(ring), ['b', 'c', 'a'])
+
+    def test_ring_removes_members(self):
+        ring = TurnRing('abcd')
+        ring.remove('a')
+        self.assertEqual(ring.current, 'b')
+        ring.remove('c')
+        self.assertEqual(ring.advance(), 'd')
+        self.assertEqual(ring.advance(), 'b')
+        ring.remove('x')
+        ring.remove('b')
+        ring.remove('d')
+        self.assertEqual(len(ring), 0)
+        self.assertIsNone(ring.advance())
+
+    def test_ring_adds_before_current(self):
+        ring = TurnRing('ab')
+        ring.advance()
+        ring.add('c')
+        self.assertEqual(list(ring), ['b', 'a', 'c'])
+
+
+class HudLayoutTestCase(unittest.TestCase):
+
+    def test_classic_layout(self):
+        self.assertEqual(health_bars_layout(1, 3, 2)[0][:2], health_bar_init_positions[1])
+        self.assertEqual(health_bars_layout(0, 2, 2)[1], (120, 10, health_bar_length, health_bar_height))
+
+    def test_large_layout_fits_display(self):
+        for players, tanks in ((50, 10), (8, 5), (5, 1)):
+            bars = [pygame.Rect(bar) for player in range(players) for bar in health_bars_layout(player, players, tanks)]
+            self.assertEqual(len(bars), players * tanks)
+            for index, bar in enumerate(bars):
+                self.assertTrue(bar.width > 0 and bar.height > 0)
+                self.assertTrue(pygame.Rect(0, 0, display_width, hud_height).contains(bar))
+                self.assertEqual(bar.collidelist(bars[index + 1:]), -1)
+
+    def test_players_colors_are_distinct(self):
+        colors = players_colors(50)
+        self.assertEqual(colors[:len(player_colors)], player_colors)
+        self.assertEqual(len(set(colors)), 50)
+
+
+class TrajectoryTestCase(unittest.TestCase):
+
+    def test_quadratic_roots(self):
+        self.assertEqual(quadratic_roots(1, -3, 2), [1.0, 2.0])
+        self.assertEqual(quadratic_roots(0, 2, -4), [2.0])
+        self.assertEqual(quadratic_roots(1, 0, 1), [])
+
+    def test_trajectory_hits_flat_ground(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        trajectory = Trajectory((100, 590), (2, -3), 0.3)
+        impact = first_impact(trajectory, ground)
+        self.assertAlmostEqual(impact.time, (3 + 15 ** 0.5) / 0.3)
+        self.assertEqual(impact.point, (145, 600))
+        self.assertIsNone(impact.tank)
+        self.assertEqual(trajectory.sample(10, impact.time)[-1], (impact.time, (145, 600)))
+
+    def test_trajectory_hits_tunnel_wall(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 500)
+        ground.update_after_explosion((800, 650), 50)
+        self.assertEqual(first_impact(Trajectory((780, 650), (-5, 0), 0), ground).point, (750, 650))
+        self.assertEqual(first_impact(Trajectory((800, 620), (0, 1), 0), ground).point, (800, 700))
+
+    def test_trajectory_leaves_world(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        self.assertIsNone(first_impact(Trajectory((display_width - 10, 500), (5, -1), 0.01), ground))
+
+    def test_trajectory_hits_tanks(self):
+        pygame.init()
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        tank_index = TankIndex()
+        tank = Tank(None, (300, 588), (200, 200), black, tank_index=tank_index)
+        impact = first_impact(Trajectory((200, 595), (5, 0), 0), ground, tank_index)
+        self.assertEqual((impact.point, impact.tank), ((280, 595), tank))
+        # shell fired straight up falls back on its own turret
+        tank.turret_angle = 0
+        trajectory = Trajectory((300, 561), launch_velocity(0, 0))
+        self.assertEqual(first_impact(trajectory, ground, tank_index).point, (300, 588))
+        impact = first_impact(trajectory, ground, tank_index, pixel_accurate=True)
+        self.assertIs(impact.tank, tank)
+        self.assertTrue(impact.time > 0 and impact.point[1] <= 562)
+
+    def test_trajectory_hits_tank_pixels(self):
+        pygame.init()
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 600)
+        tank_index = TankIndex()
+        tank = Tank(None, (100, 100), (200, 200), black, tank_index=tank_index)
+        tank.turret_angle = 0
+        tank_index.update(tank)
+        # turret sticks up above the body and wheels stick out below it, only pixel accurate impacts see them
+        for start in [(60, 80), (60, 116)]:
+            self.assertIsNone(first_impact(Trajectory(start, (1, 0), 0), ground, tank_index))
+            impact = first_impact(Trajectory(start, (1, 0), 0), ground, tank_index, pixel_accurate=True)
+            self.assertEqual((impact.point[1], impact.tank), (start[1], tank))
+        self.assertEqual(first_impact(Trajectory((60, 105), (1, 0), 0), ground, tank_index, True).point, (80, 105))
+
+    def test_batch_impacts_match_single_shots(self):
+        pygame.init()
+        ground = Ground(None, seed=5)
+        tank_index = TankIndex()
+        tanks = [Tank(None, (x, ground.get_ground_height_at_point(x) - full_tank_height), (0, 0), red,
+                      tank_index=tank_index) for x in (300, 700, 1200)]
+        angles = np.linspace(-pi / 2, pi / 2, 33)[:, np.newaxis]
+        powers = np.arange(0, 101, 10)
+        impacts = batch_impacts(tanks[1], angles, powers, ground, tank_index)
+        self.assertEqual(impacts.times.shape, (33, 11))
+        for row, angle in enumerate(angles[:, 0]):
+            offset = turret_end_offset(angle)
+            for column, power in enumerate(powers):
+                impact = first_impact(Trajectory((700 + offset[0], tanks[1].position[1] + offset[1]),
+                                                 launch_velocity(power, angle)), ground, tank_index)
+                if impact is None:
+                    self.assertEqual(impacts.times[row, column], np.inf)
+                    continue
+                self.assertAlmostEqual(impacts.times[row, column], impact.time)
+                self.assertTrue(np.abs(impacts.points[row, column] - impact.point).max() <= 1)
+                self.assertIs(impacts.tanks[row, column], impact.tank)
+        self.assertTrue(any(tank in impacts.tanks for tank in (tanks[0], tanks[2])))
+
+
+class ShotSearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.ground = Ground(None)
+        self.ground.correct_heights((0, display_width), 600)
+        self.tank_index = TankIndex()
+        self.shooter = Player(None, 1, red, 0, tank_index=self.tank_index, computer_level='hard')
+        self.enemy = Player(None, 1, blue, 1, tank_index=self.tank_index)
+        self.shooter.active_tanks = [Tank(None, (1100, 583), (0, 0), red, tank_index=self.tank_index)]
+        self.enemy.active_tanks = [Tank(None, (300, 583), (0, 0), blue, tank_index=self.tank_index)]
+
+    def test_search_hits_enemy(self):
+        tank, target = self.shooter.active_tanks[0], self.enemy.active_tanks[0]
+        angle_index, power = search_shot(tank, tanks_rows(self.enemy.active_tanks), tanks_rows([tank]), self.ground,
+                                         self.tank_index)
+        angle = initial_turret_angle + angle_index * angle_step
+        offset = turret_end_offset(angle)
+        impact = first_impact(Trajectory((tank.position[0] + offset[0], tank.position[1] + offset[1]),
+                                         launch_velocity(power, angle)), self.ground, self.tank_index)
+        self.assertTrue(target.calculate_distance_from_tank_center(impact.point) < simple_shell_radius / 2)
+
+    def test_background_search_and_aiming(self):
+        tank = self.shooter.active_tanks[0]
+        self.assertTrue(self.shooter.is_computer())
+        self.assertFalse(self.enemy.is_computer())
+        search = ShotSearch(tank, self.shooter, [self.shooter, self.enemy], self.ground, self.tank_index, 'hard')
+        # without time limit both searches finish every pass, so they find the same shot however slow they run
+        search.budget = inf
+        search.start()
+        search.join()
+        self.assertEqual(search.shot, search_shot(tank, search.enemies, search.allies, self.ground, self.tank_index,
+                                                  inf))
+        frames = 0
+        while not tank.aim_at(*search.shot):
+            frames += 1
+        self.assertEqual((turret_angle_index(tank.turret_angle), tank.tank_power), search.shot)
+        self.assertTrue(frames <= turret_angles_number // computer_aim_steps + 1)
+
+    def test_pixel_accurate_search_reads_masks_made_before_start(self):
+        tank = self.shooter.active_tanks[0]
+        search = ShotSearch(tank, self.shooter, [self.shooter, self.enemy], self.ground, self.tank_index, 'hard',
+                            pixel_accurate=True)
+        self.assertEqual(set(search.masks), set(self.tank_index.boxes))
+        search.budget = inf
+        tank_mask_array.cache_clear()
+        search.start()
+        search.join()
+        # the thread never reaches sprites, which are pygame surfaces
+        self.assertEqual(tank_mask_array.cache_info().misses, 0)
+        self.assertEqual(search.shot, search_shot(tank, search.enemies, search.allies, self.ground, self.tank_index,
+                                                  inf, pixel_accurate=True))
+
+    def test_damage_matrix_sums_to_explosion_damages(self):
+        positions = [(100, 500), (160, 500), (400, 500)]
+        matrix = damage_matrix(positions, [(120, 500), (150, 510)], simple_shell_power, simple_shell_radius)
+        self.assertEqual(matrix.shape, (2, 3))
+        self.assertEqual(matrix[:, 2].tolist(), [0, 0])
+        explosions = [((120, 500), simple_shell_power, simple_shell_radius),
+                      ((150, 510), simple_shell_power, simple_shell_radius)]
+        self.assertEqual(matrix.sum(axis=0).tolist(), explosion_damages(positions, explosions).tolist())
+
+
+class AimPreviewTestCase(unittest.TestCase):
+
+    def setUp(self):
+        pygame.init()
+        self.ground = Ground(None)
+        self.ground.correct_heights((0, display_width), 600)
+        self.tank_index = TankIndex()
+        self.tank = Tank(None, (400, 583), (0, 0), red, tank_index=self.tank_index)
+        self.tank.turret_angle = initial_turret_angle + 48 * angle_step
+        self.preview = AimPreview(self.ground, self.tank_index)
+
+    def test_flight_ends_at_impact(self):
+        offset = turret_end_offset(self.tank.turret_angle)
+        impact = first_impact(Trajectory((400 + offset[0], 583 + offset[1]),
+                                         launch_velocity(self.tank.tank_power, self.tank.turret_angle)), self.ground,
+                              self.tank_index)
+        flight = self.preview.flight(self.tank)
+        self.assertEqual(flight[0], (400 + offset[0], 583 + offset[1]))
+        self.assertEqual(flight[-1], impact.point)
+
+    def test_flight_is_memoized_until_ground_changes(self):
+        flight = self.preview.flight(self.tank)
+        self.assertIs(self.preview.flight(self.tank), flight)
+        self.tank.update_tank_power(10)
+        self.assertIsNot(self.preview.flight(self.tank), flight)
+        self.tank.update_tank_power(-10)
+        self.assertIs(self.preview.flight(self.tank), flight)
+        version = self.ground.version
+        self.ground.update_after_explosion(flight[-1], 30)
+        self.assertTrue(self.ground.version > version)
+        self.assertNotEqual(self.preview.flight(self.tank)[-1], flight[-1])
+        self.assertEqual(self.preview.flight_at.cache_info().misses, 3)
+
+
+class ProjectilesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ground = Ground(None)
+        self.ground.correct_heights((0, display_width), 600)
+
+    def fire(self, start, velocity, weapon):
+        projectiles = Projectiles(self.ground)
+        projectiles.launch([start], [velocity], weapon)
+        explosions, craters = [], []
+        while len(projectiles) > 0:
+            tick_explosions, tick_craters = projectiles.advance(shell_frame_time)
+            explosions.extend(tick_explosions)
+            craters.extend(tick_craters)
+        return explosions, craters
+
+    def test_shell_explodes_at_impact(self):
+        impact = first_impact(Trajectory((100, 590), (2, -3)), self.ground)
+        self.assertEqual(self.fire((100, 590), (2, -3), 'shell'), ([(impact.point, simple_shell_power,
+                                                                     simple_shell_radius)], []))
+        self.assertEqual(self.fire((display_width - 10, 500), (5, -1), 'shell'), ([], []))
+
+    def test_mirv_splits_into_warheads(self):
+        explosions, _ = self.fire((100, 590), (3, -8), 'mirv')
+        self.assertEqual(len(explosions), mirv_warheads)
+        self.assertEqual([point[1] for point, _, _ in explosions], [600] * mirv_warheads)
+        self.assertEqual(len(set(point[0] for point, _, _ in explosions)), mirv_warheads)
+        self.assertEqual(len(self.fire((100, 590), (3, 1), 'mirv')[0]), 1)
+
+    def test_roller_stops_in_valley(self):
+        self.ground.ensure_generated(0, display_width)
+        self.ground.heights[:] = 800 - np.abs(np.arange(display_width) - 800)
+        self.ground.mark_changed(0, display_width)
+        (point, power, radius), = self.fire((700, 600), (0, 0), 'roller')[0]
+        self.assertTrue(abs(point[0] - 800) <= roller_speed * shell_frame_time)
+        self.assertEqual(point[1], self.ground.heights[point[0]])
+        self.assertEqual((power, radius), weapon_explosions['roller'])
+
+    def test_digger_digs_tunnel(self):
+        projectiles = Projectiles(self.ground)
+        projectiles.launch([(100, 590)], [(2, -3)], 'digger')
+        steps = []
+        while len(projectiles) > 0:
+            steps.append(projectiles.advance(shell_frame_time))
+        # whole tunnel is carved at once, when the digger explodes
+        self.assertEqual([len(craters) > 0 for _, craters in steps], [False] * (len(steps) - 1) + [True])
+        (point, _, _), = steps[-1][0]
+        craters = steps[-1][1]
+        self.assertTrue(point[1] > 600)
+        self.assertTrue(len(craters) >= digger_length // (digger_radius / 2))
+        self.assertEqual(craters[-1], (point, digger_radius))
+        for ((x1, y1), _), ((x2, y2), _) in zip(craters, craters[1:]):
+            self.assertTrue(np.hypot(x2 - x1, y2 - y1) <= digger_radius / 2 + 2)
+
+    def test_digger_explodes_at_bottom(self):
+        self.ground.correct_heights((0, display_width), display_height - 30)
+        (point, _, _), = self.fire((100, display_height - 40), (0, 3), 'digger')[0]
+        self.assertEqual(point, (100, display_height - 1))
+
+    def test_vertical_shell_falls_out_of_hole(self):
+        self.ground.ensure_generated(0, display_width)
+        self.ground.heights[100] = display_height
+        self.ground.mark_changed(100, 101)
+        projectiles = Projectiles(self.ground)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            projectiles.launch([(100, 590)], [(0, -3)], 'shell')
+        self.assertAlmostEqual(projectiles.ends[0], Trajectory((100, 590), (0, -3)).end_time(display_width))
+        self.assertEqual(self.fire((100, 590), (0, -3), 'shell'), ([], []))
+
+    def test_flights_follow_ground_changes(self):
+        projectiles = Projectiles(self.ground)
+        projectiles.launch([(100, 590)], [(2, -3)], 'shell')
+        projectiles.advance(shell_frame_time)
+        self.ground.update_after_explosion((145, 600), 30)
+        explosions = []
+        while len(projectiles) > 0:
+            explosions.extend(projectiles.advance(shell_frame_time)[0])
+        self.assertEqual(explosions[0][0], first_impact(Trajectory((100, 590), (2, -3)), self.ground).point)
+        self.assertTrue(explosions[0][0][1] > 600)
+
+
+class HudTestCase(unittest.TestCase):
+
+    def test_hud_renders_only_changed_widgets(self):
+        pygame.init()
+        hud = Hud(2, 2)
+        tanks = [Tank(None, (100 + 100 * i, 100), (10 + 110 * i, 10), red) for i in range(2)]
+        self.assertEqual(len(hud.update_health_bars(tanks)), 2)
+        self.assertEqual(hud.update_health_bars(tanks), [])
+        tanks[1].take_damage(30)
+        self.assertEqual(hud.update_health_bars(tanks), [tanks[1].get_health_bar_rect()])
+        self.assertEqual(hud.update_health_bars(tanks, tanks[0]), [tanks[0].get_health_bar_rect()])
+        self.assertEqual(hud.surface.get_at((15, 15))[:3], white)
+        self.assertEqual(hud.update_health_bars(tanks[:1]), [tanks[1].get_health_bar_rect(),
+                                                            tanks[0].get_health_bar_rect()])
+        self.assertEqual(hud.surface.get_at((125, 15)).a, 0)
+
+    def test_hud_composited_only_onto_drawn_rects(self):
+        pygame.init()
+        hud = Hud(2, 2)
+        tank = Tank(None, (100, 100), (10, 10), red)
+        rect = hud.update_health_bars([tank])[0]
+        display = pygame.Surface((display_width, display_height))
+        display.fill(blue)
+        drawn = pygame.Rect(rect.x, 0, 10, display_height)
+        self.assertEqual(hud.draw(display, [drawn]), [drawn.clip(hud.surface.get_rect())])
+        self.assertEqual(display.get_at((rect.x + 5, rect.centery))[:3], hud.surface.get_at((rect.x + 5,
+                                                                                              rect.centery))[:3])
+        self.assertEqual(display.get_at((rect.right - 5, rect.centery))[:3], blue)
+        self.assertEqual(hud.draw(display, [pygame.Rect(0, display_height - 10, 10, 10)]), [])
+
+    def test_hud_power_readout(self):
+        pygame.init()
+        hud = Hud(2, 2)
+        tank = Tank(None, (100, 100), (10, 10), red)
+        self.assertEqual(len(hud.update_power(tank)), 1)
+        self.assertEqual(hud.update_power(tank), [])
+        tank.update_tank_power(5)
+        self.assertEqual(len(hud.update_power(tank)), 2)
+        tank.change_weapon()
+        self.assertEqual(tank.weapon, weapons[1])
+        self.assertEqual(len(hud.update_power(tank)), 2)
+        rect = hud.power_rect
+        self.assertEqual(hud.update_power(None), [rect])
+        self.assertEqual(hud.surface.get_bounding_rect().width, 0)
+        self.assertEqual(Hud(50, 2).power_y, hud_height + 5)
+
+
+class TerrainStatsTestCase(unittest.TestCase):
+
+    def test_window_average_matches_columns(self):
+        ground = Ground(None, seed=11)
+        for left, right in [(0, 40), (300, 340), (-20, 20), (display_width - 10, display_width + 30)]:
+            heights = [ground.get_ground_height_at_point(x) for x in range(left, right)]
+            self.assertEqual(ground.window_average(left, right), sum(heights) // len(heights))
+
+    def test_window_average_after_change(self):
+        ground = Ground(None, seed=11)
+        ground.window_average(0, display_width)
+        ground.correct_heights((100, 140), 600)
+        self.assertEqual(ground.window_average(100, 140), 600)
+        ground.update_after_explosion((120, 600), 20)
+        heights = [ground.get_ground_height_at_point(x) for x in range(100, 140)]
+        self.assertEqual(ground.window_average(100, 140), sum(heights) // len(heights))
+
+    def test_window_slope_and_flatness(self):
+        ground = Ground(None, seed=11)
+        ground.correct_heights((0, display_width), 600)
+        self.assertEqual(ground.window_slope(200, 300), 0.0)
+        self.assertEqual(ground.window_flatness(200, 300), 0)
+        ground.heights[200:300] = 500 + np.arange(100) // 2
+        ground.mark_changed(200, 300)
+        self.assertAlmostEqual(ground.window_slope(200, 300), 0.5, places=2)
+        self.assertEqual(ground.window_flatness(200, 300), 49)
+        self.assertEqual(ground.window_flatness(250, 320), 600 - 525)
+        self.assertEqual(ground.window_flatness(-10, 10), display_height - 600)
+
+    def test_stats_follow_random_changes(self):
+        rng = np.random.default_rng(3)
+        heights = rng.integers(500, 800, 1000).astype(np.int32)
+        stats = TerrainStats(heights)
+        for _ in range(50):
+            left = int(rng.integers(0, 1000))
+            right = min(1000, left + int(rng.integers(1, 60)))
+            heights[left:right] = rng.integers(500, 800, right - left)
+            stats.update(left, right)
+            first = int(rng.integers(0, 1000))
+            last = int(rng.integers(first, 1001))
+            self.assertEqual(stats.range_sum(first, last), int(heights[first:last].sum()))
+            self.assertEqual(stats.range_moment(first, last),
+                             int((heights[first:last].astype(np.int64) * np.arange(first, last)).sum()))
+        heights[:] = 600
+        stats.update(0, 1000)
+        self.assertEqual(stats.range_sum(0, 1000), 600000)
+
+    def test_tank_optimal_height(self):
+        ground = Ground(None, seed=11)
+        player = Player(None, 1, red, 0)
+        heights = [ground.get_ground_height_at_point(x) for x in range(480, 520)]
+        self.assertEqual(player.define_optimal_height(500, ground), int(sum(heights) / len(heights)))
+
+
+class GranularFlowTestCase(unittest.TestCase):
+
+    def test_granular_flow_piles_at_angle_of_repose(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 700)
+        ground.correct_heights((790, 810), 500)
+        volume = int(ground.heights.sum())
+        flow = GranularFlow(ground, 790, 810, max_step=1)
+        flow.settle()
+        self.assertTrue(flow.is_settled())
+        self.assertEqual(int(ground.heights.sum()), volume)
+        self.assertTrue(np.abs(np.diff(ground.heights)).max() <= 1)
+        self.assertTrue(ground.get_ground_height_at_point(800) < 700)
+        self.assertEqual(ground.get_ground_height_at_point(100), 700)
+        self.assertEqual(ground.window_average(0, display_width), volume // display_width)
+
+    def test_granular_flow_keeps_stable_ground(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 700)
+        ground.heights[600:700] = 700 - np.minimum(np.arange(100), 99 - np.arange(100)) // 2
+        ground.mark_changed(600, 700)
+        heights = ground.heights.copy()
+        flow = GranularFlow(ground, 0, display_width, max_step=1)
+        flow.settle()
+        self.assertTrue((ground.heights == heights).all())
+
+    def test_granular_flow_settles_separate_slopes(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 700)
+        ground.heights[:101] = 690
+        ground.heights[1000:] = 690
+        ground.mark_changed(0, display_width)
+        volume = int(ground.heights.sum())
+        GranularFlow(ground, 0, display_width, max_step=1).settle()
+        self.assertTrue(np.abs(np.diff(ground.heights)).max() <= 1)
+        self.assertEqual(int(ground.heights.sum()), volume)
+
+    def test_granular_flow_skips_cave_columns(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 700)
+        ground.correct_heights((400, 420), 500)
+        ground.set_column_spans(420, [500, 600, 650, display_height])
+        flow = GranularFlow(ground, 400, 421, max_step=1)
+        flow.settle()
+        self.assertEqual(ground.get_column_spans(420), [500, 600, 650, display_height])
+        self.assertEqual(ground.get_ground_height_at_point(421), 700)
+        self.assertTrue(ground.get_ground_height_at_point(400) > 500)
+
+
+class MapLibraryTestCase(unittest.TestCase):
+
+    def test_map_library(self):
+        with tempfile.TemporaryDirectory() as directory:
+            library = MapLibrary(directory)
+            heights = generate_heightmap('noise', 5)
+            library.add('Green hills', heights, [100, 900], 5, 'noise')
+            library = MapLibrary(directory)
+            self.assertEqual(library.names(), ['Green_hills'])
+            map_file = library.open(seed=5)
+            self.assertIs(map_file, library.open('Green hills'))
+            self.assertEqual(map_file.name, 'Green hills')
+            self.assertEqual(map_file.algorithm, 'noise')
+            self.assertEqual(map_file.width, display_width)
+            self.assertTrue((map_file.heights == heights).all())
+            self.assertEqual(map_file.spawn_slots.tolist(), [100, 900])
+            ground = Ground(None)
+            ground.load_map(map_file)
+            self.assertEqual(ground.seed, 5)
+            self.assertEqual(ground.spawn_slots, [100, 900])
+            self.assertEqual(ground.get_ground_height_at_point(700), heights[700])
+            map_file.close()
+
+    def test_saving_opened_map_under_its_name(self):
+        with tempfile.TemporaryDirectory() as directory:
+            library = MapLibrary(directory)
+            heights = generate_heightmap('noise', 5)
+            library.add('Green hills', heights, [100, 900], 5, 'noise')
+            map_file = library.open('Green hills')
+            library.add(map_file.name, map_file.heights, map_file.spawn_slots, map_file.seed, map_file.algorithm)
+            saved = library.open('Green hills')
+            self.assertIsNot(saved, map_file)
+            self.assertTrue((saved.heights == heights).all())
+            self.assertEqual(saved.spawn_slots.tolist(), [100, 900])
+            self.assertEqual(os.listdir(directory), [map_file_name('Green hills', 5)])
+            saved.close()
+
+    def test_saving_name_with_other_seed_replaces_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            library = MapLibrary(directory)
+            library.add('Green hills', generate_heightmap('noise', 5), [100], 5, 'noise')
+            heights = generate_heightmap('noise', 6)
+            library.add('Green hills', heights, [200], 6, 'noise')
+            self.assertEqual(os.listdir(directory), [map_file_name('Green hills', 6)])
+            self.assertRaises(KeyError, library.open, seed=5)
+            for library in (library, MapLibrary(directory)):
+                map_file = library.open('Green hills')
+                self.assertEqual(map_file.seed, 6)
+                self.assertTrue((map_file.heights == heights).all())
+                self.assertIs(map_file, library.open(seed=6))
+                map_file.close()
+
+    def test_library_indexes_newest_of_maps_with_same_name(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for seed, modified in ((7, 2000), (3, 1000)):
+                path = os.path.join(directory, map_file_name('Green hills', seed))
+                save_map(path, generate_heightmap('noise', seed), name='Green hills', seed=seed)
+                os.utime(path, (modified, modified))
+            map_file = MapLibrary(directory).open('Green hills')
+            self.assertEqual(map_file.seed, 7)
+            map_file.close()
+
+    def test_map_file_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'other.psem')
+            with open(path, 'wb') as other_file:
+                other_file.write(b'\0' * 64)
+            self.assertRaises(ValueError, MapFile, path)
+
+
+class ColumnSpansTestCase(unittest.TestCase):
+
+    def test_subtract_and_insert_span(self):
+        spans = subtract_span([500, 900], 600, 700)
+        self.assertEqual(spans, [500, 600, 700, 900])
+        self.assertEqual(insert_span(spans, 600, 700), [500, 900])
+
+    def test_ground_tunnel(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 500)
+        left_ground = ground.update_after_explosion((800, 650), 50)
+        self.assertEqual(left_ground, [])
+        self.assertEqual(ground.get_ground_height_at_point(800), 500)
+        self.assertEqual(ground.get_column_spans(800), [500, 600, 700, display_height])
+        self.assertEqual(first_impact(Trajectory((780, 650), (-10, 0)), ground).point, (750, 651))
+        self.assertEqual(first_impact(Trajectory((800, 620), (0, 0)), ground).point, (800, 700))
+        self.assertEqual(landing_height(ground.get_column_spans(800), 650, display_height), 700)
+
+    def test_ground_unsupported_span_falls(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 500)
+        ground.set_column_spans(800, [500, 520, 600, display_height])
+        ground.set_column_spans(799, [600, display_height])
+        ground.set_column_spans(801, [600, display_height])
+        left_ground = ground.update_after_explosion((800, 650), 10)
+        self.assertEqual(left_ground, [[[800, 520], [800, 500]]])
+        ground.update_after_sloughing(left_ground)
+        self.assertEqual(ground.get_column_spans(800), [580, 640, 660, display_height])
+
+
+    def test_ground_detached_island_falls(self):
+        ground = Ground(None, overhangs=True)
+        ground.correct_heights((0, display_width), 500)
+        ground.update_after_explosion((800, 590), 60)
+        left_ground = ground.update_after_explosions([((745, 520), 30), ((855, 520), 30)])
+        self.assertTrue(left_ground)
+        self.assertTrue(all(piece[0][0] in range(760, 841) for piece in left_ground))
+        ground.update_after_sloughing(left_ground)
+        self.assertEqual(ground.unsupported_spans(700, 900), [])
+        for column in range(770, 831):
+            spans = ground.get_column_spans(column)
+            self.assertEqual(spans[-1], display_height)
+            self.assertTrue(spans[0] > 600)
+
+class SloughingTestCase(unittest.TestCase):
+
+    def test_sloughing_stacks_pieces(self):
+        ground = Ground(None)
+        ground.correct_heights((0, display_width), 700)
+        left_ground = [[[10, 600], [10, 580]], [[10, 650], [10, 640]], [[11, 600], [11, 500]]]
+        solution = ground.solve_sloughing(left_ground)
+        self.assertEqual(solution.rest_bottoms.tolist(), [690, 700, 700])
+        tops, bottoms = solution.sample(0)
+        self.assertEqual(bottoms.tolist(), [600, 650, 600])
+        tops, bottoms = solution.sample(solution.duration)
+        self.assertEqual(bottoms.tolist(), [690, 700, 700])
+        ground.update_after_sloughing(left_ground)
+        self.assertEqual(ground.get_ground_height_at_point(10), 670)
+        self.assertEqual(ground.get_ground_height_at_point(11), 600)
+
+
+class TerrainGeneratorTestCase(unittest.TestCase):
+
+    def test_same_seed_same_terrain(self):
+        for algorithm in terrain_algorithms:
+            first = generate_heightmap(algorithm, 7)
+            cached_world.cache_clear()
+            second = generate_heightmap(algorithm, 7)
+            self.assertTrue((first == second).all())
+            self.assertFalse((first == generate_heightmap(algorithm, 8)).all())
+            self.assertTrue(first.min() >= ground_height_min)
+            self.assertTrue(first.max() <= ground_height_max)
+
+    def test_terrain_windows_match(self):
+        for algorithm in terrain_algorithms:
+            whole = generate_heightmap(algorithm, 3, 0, 2048)
+            left = generate_heightmap(algorithm, 3, 0, 1000)
+            right = generate_heightmap(algorithm, 3, 1000, 2048)
+            self.assertTrue((whole == np.concatenate((left, right))).all())
+
+    def test_terrain_cache(self):
+        cached_world.cache_clear()
+        self.assertIs(generate_heightmap('noise', 11), generate_heightmap('noise', 11))
+        ground = Ground(None, seed=11, algorithm='noise', width=(terrain_cache_size + 4) * chunk_width)
+        self.assertEqual(ground.seed, 11)
+        ground.ensure_generated(0, ground.width)
+        heights = ground.heights.copy()
+        # world wider than the cache size in chunks is replayed from the cache
+        ground.reinitialize(11)
+        ground.ensure_generated(0, ground.width)
+        self.assertTrue((ground.heights == heights).all())
+        self.assertEqual((cached_world.cache_info().hits, cached_world.cache_info().misses),
+                         (2 * len(ground.generated) + 1, 1))
+        self.assertEqual(len(cached_world('noise', (), 11)), len(ground.generated) + 1)
+        self.assertTrue((ground.heights[:chunk_width] == generate_heightmap('noise', 11)[:chunk_width]).all())
 
 if __name__ == '__main__':
     unittest.main()